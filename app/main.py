@@ -1,9 +1,40 @@
-from typing import Dict, List
+import asyncio
+import os
+import secrets
+import time
+from typing import Dict, List, Literal, Optional
 
-from fastapi import FastAPI, Request
+from fastapi import Body, Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from search_engine.search_ops import search_manual_mapping, search_color_mapping
-from search_engine.utils import search_engine_client, load_model, MANUAL_MAPPING, SEARCH_CONFIDENCE, COLOR_MAPPING
+from loguru import logger
+from pydantic import BaseModel
+from search_engine.batching import BatchingEncoder
+from search_engine.color_engine import ColorEngine, split_color_phrase, merge_color_results
+from search_engine.embedding_cache import CachedEncoder
+from search_engine.exact_match import ExactMatchIndex
+from search_engine.generation import index_generation, async_index_generation
+from search_engine.local_engine import LocalSearchEngine, AsyncLocalSearchEngine
+from search_engine.metrics import (start_request, stage, export_cache_stats, export_singleflight_stats,
+                                   render_metrics)
+from search_engine.profiling import SamplingProfiler, RequestTracer
+from search_engine.result_cache import ResultCache
+from search_engine.singleflight import SingleFlight
+from search_engine.search_ops import (search_manual_mapping, search_manual_mapping_batch, search_color_mapping,
+                                      async_search_manual_mapping, async_search_manual_mapping_batch,
+                                      async_search_color_mapping, search_color_mapping_batch,
+                                      async_search_color_mapping_batch, RANKING_STRATEGIES)
+from search_engine.warmup import read_hot_queries, warm_up
+from search_engine.utils import (search_engine_client, search_engine_async_client, encode_executor, load_model,
+                                 MANUAL_MAPPING, SEARCH_CONFIDENCE, COLOR_MAPPING, ASYNC_SEARCH, SENT_TRANSFORMER,
+                                 EMBEDDING_CACHE_SIZE, EMBEDDING_CACHE_DIR, RESULT_CACHE_SIZE,
+                                 RESULT_CACHE_CHECK_INTERVAL, SEARCH_BACKEND, MANUAL_MAPPING_FILE,
+                                 MANUAL_MAPPING_ARTIFACT, ENCODER_NAME, ENCODE_BATCH_SIZE, ENCODE_BATCH_WAIT_MS,
+                                 ENCODE_WORKERS, LAZY_STARTUP, COLOR_BACKEND, COLOR_MAPPING_FILE,
+                                 COLOR_FUZZY_THRESHOLD, SEARCH_RANKING, SEARCH_KNN_K, SEARCH_NUM_CANDIDATES,
+                                 RANKING_CONFIDENCE, EXACT_MATCH, SERVER_TIMING, ADMIN_TOKEN,
+                                 TRACE_SAMPLE_PERCENT, COALESCE_LOOKUPS, WARMUP_FILE, WARMUP_MAX_QUERIES,
+                                 WARMUP_RATE, WARMUP_LIMIT)
 
 # Initialize FastAPI app
 app = FastAPI()
@@ -20,20 +51,367 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
-# Load a machine learning model used for search scoring or embedding
-MODEL = load_model()
+
+# Profiles and traces of this worker, requested through the /admin endpoints
+PROFILER = SamplingProfiler()
+TRACER = RequestTracer(sample_rate=TRACE_SAMPLE_PERCENT / 100)
+
+
+@app.middleware("http")
+async def measure_request(request: Request, call_next):
+    """
+    Record the wall time and the per-stage times of every request in the metrics.
+
+    With SERVER_TIMING=true, the stage times are also returned in a `Server-Timing` header.
+    """
+    request_metrics = start_request()
+    start = time.perf_counter()
+    response = await call_next(request)
+    total = time.perf_counter() - start
+
+    # Label by route, not by raw path, so unknown paths cannot blow up the number of series
+    path = request.url.path
+    endpoint = path if any(getattr(route, "path", None) == path for route in app.routes) else "other"
+    request_metrics.observe(endpoint, response.status_code, total)
+    if TRACER.sampled() and not path.startswith("/admin"):
+        TRACER.record(endpoint, request.url.query, response.status_code, total, request_metrics.stages)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = request_metrics.server_timing(total)
+    return response
+
+
+# Ranking strategies accepted by the search endpoints
+RankingStrategy = Literal[RANKING_STRATEGIES]
+
+
+class SearchItem(BaseModel):
+    """
+    A single descriptor lookup inside a batch search request.
+    """
+    word: str
+    limit: int
+
 
 # Connect to the search engine client (e.g., Elasticsearch)
 SEARCH_ENGINE = search_engine_client()
 
+if SEARCH_BACKEND not in ('elasticsearch', 'local'):
+    raise ValueError(f"Invalid search backend {SEARCH_BACKEND}")
+if SEARCH_RANKING not in RANKING_STRATEGIES:
+    raise ValueError(f"Invalid ranking strategy {SEARCH_RANKING}")
+
+# Colors are resolved from the color_mappings index or, with COLOR_BACKEND=local, in memory from
+# the CSV that index_colors.py indexes, re-read whenever it changes
+if COLOR_BACKEND == 'local':
+    COLOR_ENGINE = ColorEngine(COLOR_MAPPING_FILE, fuzzy_threshold=COLOR_FUZZY_THRESHOLD)
+elif COLOR_BACKEND != 'elasticsearch':
+    raise ValueError(f"Invalid color backend {COLOR_BACKEND}")
+
+# Queries that literally name a descriptor of the manual mapping are answered from a hash table,
+# built from the JSONL that is indexed, without encoding them or querying the index
+EXACT_MATCH_INDEX = ExactMatchIndex(MANUAL_MAPPING_FILE) if EXACT_MATCH else None
+
+# Concurrent identical manual mapping and color lookups share one encode and search
+MANUAL_MAPPING_FLIGHTS = SingleFlight() if COALESCE_LOOKUPS else None
+COLOR_FLIGHTS = SingleFlight() if COALESCE_LOOKUPS else None
+
+# Coalesce concurrent single-query encodes into batched forward passes
+ENCODE_BATCHING = ENCODE_BATCH_WAIT_MS > 0 and ENCODE_BATCH_SIZE > 1
+
+# The model and, with SEARCH_BACKEND=local, the manual mapping engine are set by `load_encoder`
+MODEL = None
+BATCHER = None
+MAPPING_ENGINE = SEARCH_ENGINE if SEARCH_BACKEND == 'elasticsearch' else None
+
+# In async mode, searches go through a non-blocking client and encoding runs on its own executor,
+# so in-flight requests no longer hold a threadpool worker for the whole round trip
+if ASYNC_SEARCH:
+    ASYNC_SEARCH_ENGINE = search_engine_async_client()
+    ASYNC_MAPPING_ENGINE = ASYNC_SEARCH_ENGINE if SEARCH_BACKEND == 'elasticsearch' else None
+    # Threads waiting on the batcher are idle, so allow enough of them to fill a batch
+    ENCODE_EXECUTOR = encode_executor(max(ENCODE_WORKERS, ENCODE_BATCH_SIZE) if ENCODE_BATCHING else ENCODE_WORKERS)
+
+# Reported by /ready: the encoder is loaded and warm, and the manual mapping index answered
+READINESS = {"encoder": False, "index": False}
+
+# Popular queries searched in the background once the encoder is loaded and again after every
+# reindex, so their first live requests hit the caches; the worker is ready after the first pass
+HOT_QUERIES = read_hot_queries(WARMUP_FILE, WARMUP_MAX_QUERIES, default_limit=WARMUP_LIMIT) if WARMUP_FILE else []
+if HOT_QUERIES:
+    READINESS["warmup"] = False
+
+
+def load_encoder():
+    """
+    Load the model and everything built on it, then run one encode so the first request is not slow.
+    """
+    global MODEL, BATCHER, MAPPING_ENGINE, ASYNC_MAPPING_ENGINE
+
+    # Load a machine learning model used for search scoring or embedding
+    model = load_model()
+    model.encode(["warm up"])
+
+    # The manual mapping is either searched in Elasticsearch or, with SEARCH_BACKEND=local, entirely
+    # in process: from the embedding artifact written by the indexer if there is one, otherwise by
+    # encoding the same JSONL file that is indexed into Elasticsearch
+    if SEARCH_BACKEND == 'local':
+        if os.path.exists(MANUAL_MAPPING_ARTIFACT):
+            engine = LocalSearchEngine.from_artifact(MANUAL_MAPPING_ARTIFACT, model_name=SENT_TRANSFORMER)
+        else:
+            engine = LocalSearchEngine.from_file(MANUAL_MAPPING_FILE, model)
+        logger.info(f"Loaded {len(engine.documents)} manual mappings into the local search engine.")
+        if ASYNC_SEARCH:
+            ASYNC_MAPPING_ENGINE = AsyncLocalSearchEngine(engine)
+        MAPPING_ENGINE = engine
+
+    if ENCODE_BATCHING:
+        BATCHER = model = BatchingEncoder(model, max_batch_size=ENCODE_BATCH_SIZE,
+                                          max_wait=ENCODE_BATCH_WAIT_MS / 1000)
+
+    # Cache query embeddings, since the descriptor vocabulary in our traffic is highly repetitive
+    if EMBEDDING_CACHE_SIZE > 0:
+        model = CachedEncoder(model,
+                              model_name=ENCODER_NAME,
+                              max_size=EMBEDDING_CACHE_SIZE,
+                              directory=EMBEDDING_CACHE_DIR)
+
+    MODEL = model
+    READINESS["encoder"] = True
+    logger.info("Encoder loaded.")
+
+
+# With LAZY_STARTUP=true the encoder is loaded by a background task once the server is up, so
+# endpoints that do not need it, like /color_mapping, answer right away
+if not LAZY_STARTUP:
+    load_encoder()
+
+# Cache complete responses of popular words; emptied whenever the manual mapping index is rebuilt
+RESULT_CACHE = ResultCache(max_size=RESULT_CACHE_SIZE) if RESULT_CACHE_SIZE > 0 else None
+
+
+async def fetch_index_generation():
+    """
+    Read the current generation of the manual mapping index without blocking the event loop.
+    """
+    if ASYNC_SEARCH:
+        return await async_index_generation(ASYNC_MAPPING_ENGINE, MANUAL_MAPPING)
+    return await run_in_threadpool(index_generation, MAPPING_ENGINE, MANUAL_MAPPING)
+
+
+async def encoder_ready():
+    """
+    Wait until the encoder and the manual mapping engine are loaded.
+
+    Raises:
+        Exception: Whatever made the background loading fail.
+    """
+    if not READINESS["encoder"]:
+        await asyncio.shield(app.state.encoder_loading)
+
+
+async def warm_up_caches():
+    """
+    Search the hot queries, filling the embedding cache and the result cache, then report ready.
+    """
+    await encoder_ready()
+    generation = RESULT_CACHE.generation if RESULT_CACHE is not None else None
+
+    async def lookup(word: str, limit: int, collapse: bool = False, ranking: Optional[str] = None):
+        options = search_options(collapse, ranking)
+        results = await lookup_manual_mapping(word, limit, **options)
+        if RESULT_CACHE is not None:
+            RESULT_CACHE.set(word, limit, search_confidence(options["ranking"]), MANUAL_MAPPING, results,
+                             generation=generation, **options)
+
+    await warm_up(HOT_QUERIES, lookup, max_rate=WARMUP_RATE)
+    READINESS["warmup"] = True
+
+
+def start_warm_up():
+    """
+    Start warming up the caches, abandoning a warm-up still running for an older index generation.
+    """
+    warmup = getattr(app.state, "warmup", None)
+    if warmup is not None:
+        warmup.cancel()
+    app.state.warmup = asyncio.create_task(warm_up_caches())
+
+
+async def watch_index_generation():
+    """
+    Periodically check the manual mapping index generation and invalidate the result cache on change.
+    """
+    await encoder_ready()
+    while True:
+        try:
+            generation = await fetch_index_generation()
+            READINESS["index"] = True
+            if RESULT_CACHE.set_generation(generation):
+                logger.info(f"Index generation of {MANUAL_MAPPING} is now {RESULT_CACHE.generation}.")
+                if HOT_QUERIES:
+                    start_warm_up()
+        except Exception as e:
+            logger.warning(f"Could not read the index generation of {MANUAL_MAPPING}: {e}")
+        await asyncio.sleep(RESULT_CACHE_CHECK_INTERVAL)
+
+
+async def watch_exact_matches():
+    """
+    Periodically reload the exact match descriptors if the manual mapping JSONL changed.
+
+    Reloading folds every descriptor, so it runs on a worker thread and lookups keep using the
+    previous table until the new one is swapped in.
+    """
+    while True:
+        await asyncio.sleep(EXACT_MATCH_INDEX.check_interval)
+        if await run_in_threadpool(EXACT_MATCH_INDEX.reload_if_changed):
+            logger.info(f"Reloaded the exact match descriptors of {MANUAL_MAPPING_FILE}.")
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """
+    Start loading the encoder (in lazy startup mode), watching the index generation and the
+    exact match descriptors, and warming up the caches once the event loop is running.
+    """
+    if LAZY_STARTUP:
+        app.state.encoder_loading = asyncio.create_task(run_in_threadpool(load_encoder))
+    if RESULT_CACHE is not None:
+        app.state.generation_watch = asyncio.create_task(watch_index_generation())
+    elif HOT_QUERIES:
+        # Without a result cache only the embeddings are warmed up, which a reindex does not change
+        start_warm_up()
+    if EXACT_MATCH_INDEX is not None:
+        app.state.exact_match_watch = asyncio.create_task(watch_exact_matches())
+
+
+@app.on_event("shutdown")
+async def close_search_engine():
+    """
+    Release the async client's connection pool, the encode executor and the batcher on shutdown.
+    """
+    if RESULT_CACHE is not None:
+        app.state.generation_watch.cancel()
+    if getattr(app.state, "warmup", None) is not None:
+        app.state.warmup.cancel()
+    if EXACT_MATCH_INDEX is not None:
+        app.state.exact_match_watch.cancel()
+    if ASYNC_SEARCH:
+        await ASYNC_SEARCH_ENGINE.close()
+        ENCODE_EXECUTOR.shutdown(wait=False)
+    if BATCHER is not None:
+        BATCHER.close()
+
+
+def search_options(collapse: bool = False, ranking: Optional[str] = None) -> dict:
+    """
+    Collect the manual mapping search options of a request, filling in the configured defaults.
+    """
+    return {"collapse": collapse,
+            "ranking": ranking or SEARCH_RANKING,
+            "k": SEARCH_KNN_K or None,
+            "num_candidates": SEARCH_NUM_CANDIDATES or None}
+
+
+def exact_match(word: str, limit: int, collapse: bool = False):
+    """
+    Look a query up in the exact match index; None if it is disabled or the query must be searched.
+    """
+    if EXACT_MATCH_INDEX is None:
+        return None
+    with stage("exact_match"):
+        return EXACT_MATCH_INDEX.search(word, limit=limit, collapse=collapse)
+
+
+def search_confidence(ranking: str) -> float:
+    """
+    Confidence threshold of a ranking strategy; scores of the strategies are on different scales.
+    """
+    return RANKING_CONFIDENCE.get(ranking, SEARCH_CONFIDENCE)
+
+
+async def resolve_manual_mapping(word: str, limit: int, **options):
+    """
+    Run a manual mapping search on the configured (sync or async) serving path.
+
+    `options` are passed on to the search function, see `search_options`.
+    """
+    await encoder_ready()
+    if ASYNC_SEARCH:
+        return await async_search_manual_mapping(word=word,
+                                                 model=MODEL,
+                                                 client=ASYNC_MAPPING_ENGINE,
+                                                 executor=ENCODE_EXECUTOR,
+                                                 limit=limit,
+                                                 confidence=search_confidence(options["ranking"]),
+                                                 index_name=MANUAL_MAPPING,
+                                                 **options)
+
+    return await run_in_threadpool(search_manual_mapping,
+                                   word=word,
+                                   model=MODEL,
+                                   client=MAPPING_ENGINE,
+                                   limit=limit,
+                                   confidence=search_confidence(options["ranking"]),
+                                   index_name=MANUAL_MAPPING,
+                                   **options)
+
+
+async def lookup_manual_mapping(word: str, limit: int, **options):
+    """
+    Resolve a manual mapping search, sharing it with identical lookups in flight.
+
+    Lookups only share a search started under the same index generation, so results of the
+    previous index are never cached under the current one.
+    """
+    if MANUAL_MAPPING_FLIGHTS is None:
+        return await resolve_manual_mapping(word, limit, **options)
+    generation = RESULT_CACHE.generation if RESULT_CACHE is not None else None
+    return await MANUAL_MAPPING_FLIGHTS.do((word, limit, generation, *sorted(options.items())),
+                                           lambda: resolve_manual_mapping(word, limit, **options))
+
+
+async def resolve_manual_mapping_batch(words: List[str], limits: List[int], **options):
+    """
+    Run a batch manual mapping search on the configured (sync or async) serving path.
+
+    `options` are passed on to the search function, see `search_options`.
+    """
+    await encoder_ready()
+    if ASYNC_SEARCH:
+        return await async_search_manual_mapping_batch(words=words,
+                                                       limits=limits,
+                                                       model=MODEL,
+                                                       client=ASYNC_MAPPING_ENGINE,
+                                                       executor=ENCODE_EXECUTOR,
+                                                       confidence=search_confidence(options["ranking"]),
+                                                       index_name=MANUAL_MAPPING,
+                                                       **options)
+
+    return await run_in_threadpool(search_manual_mapping_batch,
+                                   words=words,
+                                   limits=limits,
+                                   model=MODEL,
+                                   client=MAPPING_ENGINE,
+                                   confidence=search_confidence(options["ranking"]),
+                                   index_name=MANUAL_MAPPING,
+                                   **options)
+
+
 @app.get("/search_osm_tag_v2")
-def func_search_in_manual_mapping(word: str, limit: int):
+async def func_search_in_manual_mapping(word: str, limit: int, collapse: bool = False,
+                                        ranking: Optional[RankingStrategy] = None):
     """
     Search for OSM (OpenStreetMap) tags using a manually defined mapping index.
 
     Args:
         word (str): The search keyword to look up in the manual mapping.
         limit (int): Maximum number of results to return.
+        collapse (bool): Return at most one result per cluster, so `limit` results are
+                         distinct tag bundles, each with its 'matched_descriptor'.
+        ranking (str, optional): Ranking strategy, `SEARCH_RANKING` by default. `sum` adds the
+                                 raw BM25 and k-NN scores; `rrf`, `weighted` and `knn` return
+                                 scores between 0 and 1.
 
     Returns:
         List[Dict]: A list of matched results with scores and tags.
@@ -42,16 +420,69 @@ def func_search_in_manual_mapping(word: str, limit: int):
         This endpoint uses a custom search engine and preloaded model to perform
         a semantic search over a manually curated OSM tag index. The results are
         filtered by confidence threshold and limited by the `limit` parameter.
+        With EXACT_MATCH=true and `limit=1`, a word naming a known descriptor returns its
+        bundle with score 1.0, without a search.
+    """
+    results = exact_match(word, limit, collapse)
+    if results is not None:
+        return results
+
+    options = search_options(collapse, ranking)
+    if RESULT_CACHE is None:
+        return await lookup_manual_mapping(word, limit, **options)
+
+    confidence = search_confidence(options["ranking"])
+    results = RESULT_CACHE.get(word, limit, confidence, MANUAL_MAPPING, **options)
+    if results is None:
+        generation = RESULT_CACHE.generation
+        results = await lookup_manual_mapping(word, limit, **options)
+        RESULT_CACHE.set(word, limit, confidence, MANUAL_MAPPING, results, generation=generation, **options)
+    return results
+
+@app.post("/search_osm_tag_v2/batch")
+async def func_search_in_manual_mapping_batch(items: List[SearchItem], collapse: bool = False,
+                                              ranking: Optional[RankingStrategy] = None):
+    """
+    Search for OSM tags for many descriptors in a single call.
+
+    Args:
+        items (List[SearchItem]): The descriptors to look up, each with its own `limit`.
+        collapse (bool): Return at most one result per cluster for every descriptor.
+        ranking (str, optional): Ranking strategy, `SEARCH_RANKING` by default.
+
+    Returns:
+        List[List[Dict]]: One result list per item, in request order. Each list is the
+                          same as what `/search_osm_tag_v2` returns for that word and limit.
+
+    Description:
+        All words are encoded with a single model call and resolved with one
+        Elasticsearch `_msearch` request, instead of one round trip per word.
+        Words found in the exact match index or the result cache are not sent to
+        Elasticsearch at all.
     """
-    return search_manual_mapping(word=word,
-                                 model=MODEL,
-                                 client=SEARCH_ENGINE,
-                                 limit=limit,
-                                 confidence=SEARCH_CONFIDENCE,
-                                 index_name=MANUAL_MAPPING)
+    options = search_options(collapse, ranking)
+    confidence = search_confidence(options["ranking"])
+    results = [exact_match(item.word, item.limit, collapse) for item in items]
+    if RESULT_CACHE is not None:
+        results = [result if result is not None
+                   else RESULT_CACHE.get(item.word, item.limit, confidence, MANUAL_MAPPING, **options)
+                   for item, result in zip(items, results)]
+
+    missing = [idx for idx, result in enumerate(results) if result is None]
+    if missing:
+        generation = RESULT_CACHE.generation if RESULT_CACHE is not None else None
+        resolved = await resolve_manual_mapping_batch([items[idx].word for idx in missing],
+                                                      [items[idx].limit for idx in missing],
+                                                      **options)
+        for idx, result in zip(missing, resolved):
+            if RESULT_CACHE is not None:
+                RESULT_CACHE.set(items[idx].word, items[idx].limit, confidence, MANUAL_MAPPING, result,
+                                 generation=generation, **options)
+            results[idx] = result
+    return results
 
 @app.get("/color_mapping")
-def func_color_mapping(color: str):
+async def func_color_mapping(color: str):
     """
     Search for a tag mapping related to a given color.
 
@@ -65,7 +496,193 @@ def func_color_mapping(color: str):
         This endpoint queries the color mapping index to find semantic matches
         for the provided color string. It returns the top result (limit = 1).
     """
-    return search_color_mapping(word=color,
-                                client=SEARCH_ENGINE,
-                                index_name=COLOR_MAPPING,
-                                limit=1)
\ No newline at end of file
+    if COLOR_BACKEND == 'local':
+        return COLOR_ENGINE.search(color)
+
+    if COLOR_FLIGHTS is None:
+        return await resolve_color(color)
+    return await COLOR_FLIGHTS.do(color, lambda: resolve_color(color))
+
+async def resolve_color(color: str):
+    """
+    Run a color mapping search on the configured (sync or async) Elasticsearch serving path.
+    """
+    if ASYNC_SEARCH:
+        return await async_search_color_mapping(word=color,
+                                                client=ASYNC_SEARCH_ENGINE,
+                                                index_name=COLOR_MAPPING,
+                                                limit=1)
+
+    return await run_in_threadpool(search_color_mapping,
+                                   word=color,
+                                   client=SEARCH_ENGINE,
+                                   index_name=COLOR_MAPPING,
+                                   limit=1)
+
+async def resolve_colors(words: List[str]):
+    """
+    Resolve single color descriptors on the configured color backend, one result per word.
+    """
+    if COLOR_BACKEND == 'local':
+        return [COLOR_ENGINE.search(word) for word in words]
+
+    if ASYNC_SEARCH:
+        return await async_search_color_mapping_batch(words=words,
+                                                      client=ASYNC_SEARCH_ENGINE,
+                                                      index_name=COLOR_MAPPING)
+
+    return await run_in_threadpool(search_color_mapping_batch,
+                                   words=words,
+                                   client=SEARCH_ENGINE,
+                                   index_name=COLOR_MAPPING)
+
+
+@app.post("/color_mapping/batch")
+async def func_color_mapping_batch(colors: List[str] = Body(...)):
+    """
+    Resolve many color phrases, including compound ones, in one call.
+
+    Args:
+        colors (List[str]): Color phrases such as "red", "red and white" or "dark gray/black".
+
+    Returns:
+        List[Dict or None]: One entry per phrase, in request order, with the matched descriptors
+                            under 'names' and their merged, de-duplicated 'color_values', or
+                            None if no color of the phrase is known.
+
+    Description:
+        Phrases are split on "and", "or", "/", ",", "&", "+" and ";". The distinct colors of all
+        phrases are resolved together, with a single `_msearch` on the Elasticsearch backend.
+    """
+    parts = [split_color_phrase(color) for color in colors]
+    words = list(dict.fromkeys(word for phrase_parts in parts for word in phrase_parts))
+    resolved = dict(zip(words, await resolve_colors(words)))
+    return [merge_color_results([resolved[word] for word in phrase_parts]) for phrase_parts in parts]
+
+@app.get("/cache_stats")
+def func_cache_stats():
+    """
+    Report hit/miss counters of the in-process caches and of the lookup coalescing.
+
+    Returns:
+        Dict: Counters per cache, keyed by cache name.
+    """
+    stats = {}
+    if isinstance(MODEL, CachedEncoder):
+        stats["embeddings"] = MODEL.stats()
+    if RESULT_CACHE is not None:
+        stats["results"] = RESULT_CACHE.stats()
+    if EXACT_MATCH_INDEX is not None:
+        stats["exact_match"] = EXACT_MATCH_INDEX.stats()
+    if MANUAL_MAPPING_FLIGHTS is not None:
+        stats["coalesced_manual_mapping"] = MANUAL_MAPPING_FLIGHTS.stats()
+    if COLOR_FLIGHTS is not None:
+        stats["coalesced_color_mapping"] = COLOR_FLIGHTS.stats()
+    return stats
+
+@app.get("/metrics")
+def func_metrics():
+    """
+    Expose request, stage, result and cache metrics in the Prometheus text format.
+
+    Returns:
+        Response: The metrics page.
+    """
+    if isinstance(MODEL, CachedEncoder):
+        export_cache_stats("embeddings", MODEL.stats())
+    if RESULT_CACHE is not None:
+        export_cache_stats("results", RESULT_CACHE.stats())
+    if EXACT_MATCH_INDEX is not None:
+        export_cache_stats("exact_match", EXACT_MATCH_INDEX.stats())
+    if MANUAL_MAPPING_FLIGHTS is not None:
+        export_singleflight_stats("manual_mapping", MANUAL_MAPPING_FLIGHTS.stats())
+    if COLOR_FLIGHTS is not None:
+        export_singleflight_stats("color_mapping", COLOR_FLIGHTS.stats())
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def require_admin(authorization: Optional[str] = Header(None)):
+    """
+    Allow a request to the /admin endpoints only with the `ADMIN_TOKEN` bearer token.
+
+    Raises:
+        HTTPException: 404 if ADMIN_TOKEN is not set, 401 if the token is missing or wrong.
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404)
+    if authorization is None or not secrets.compare_digest(authorization.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)], include_in_schema=False)
+async def func_admin_profile(seconds: float = Query(10, gt=0, le=120), interval_ms: float = Query(5, ge=1, le=1000)):
+    """
+    Sample the stacks of all threads of the worker answering the request.
+
+    Args:
+        seconds (float): Duration of the profile; the request returns when it is done.
+        interval_ms (float): Time between two samples in milliseconds.
+
+    Returns:
+        Response: The folded stacks, which flamegraph.pl or speedscope render as a flame graph.
+                  The `X-Worker-Pid` header names the profiled worker process.
+    """
+    try:
+        stacks = await run_in_threadpool(PROFILER.profile, seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return Response(stacks, media_type="text/plain", headers={"X-Worker-Pid": str(os.getpid())})
+
+@app.get("/admin/tracing", dependencies=[Depends(require_admin)], include_in_schema=False)
+def func_admin_traces():
+    """
+    Report the trace sample rate of the worker and its most recent traces.
+
+    Returns:
+        Dict: The sample percentage and the traces, oldest first.
+    """
+    return {"pid": os.getpid(), "sample_percent": TRACER.sample_rate * 100, "traces": list(TRACER.traces)}
+
+@app.put("/admin/tracing", dependencies=[Depends(require_admin)], include_in_schema=False)
+def func_admin_set_tracing(sample_percent: float = Query(..., ge=0, le=100)):
+    """
+    Set the share of requests whose stage times are traced; 0 disables tracing.
+
+    Args:
+        sample_percent (float): Percentage of requests traced.
+
+    Returns:
+        Dict: The new sample percentage.
+    """
+    TRACER.sample_rate = sample_percent / 100
+    logger.info(f"Tracing {sample_percent}% of requests.")
+    return {"pid": os.getpid(), "sample_percent": sample_percent}
+
+@app.get("/encoder_stats")
+def func_encoder_stats():
+    """
+    Report batch sizes and queueing delays of the encode micro-batcher.
+
+    Returns:
+        Dict: Batcher counters, empty if micro-batching is disabled.
+    """
+    return BATCHER.stats() if BATCHER is not None else {}
+
+@app.get("/ready")
+async def func_ready(response: Response):
+    """
+    Report whether the service can answer manual mapping searches.
+
+    Returns:
+        Dict: Overall readiness and the state of the encoder, the manual mapping index and, with
+              WARMUP_FILE, the first cache warm-up. The status code is 503 until all are ready,
+              so it can back a readiness probe.
+    """
+    if READINESS["encoder"] and not READINESS["index"]:
+        try:
+            await fetch_index_generation()
+            READINESS["index"] = True
+        except Exception as e:
+            logger.warning(f"Manual mapping index {MANUAL_MAPPING} is not reachable: {e}")
+
+    ready = all(READINESS.values())
+    response.status_code = 200 if ready else 503
+    return {"ready": ready, **READINESS}
\ No newline at end of file
@@ -0,0 +1,189 @@
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+ARTIFACT_VERSION = 2
+EMBEDDINGS_FILE = "embeddings.f32"
+DOCUMENTS_FILE = "documents.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+
+class ArtifactWriter:
+    """
+    Streams the manual mapping embeddings and their metadata into a versioned artifact directory.
+
+    The artifact holds a raw, row-major matrix of L2-normalized float32 embeddings, a JSONL
+    sidecar with the `name`, `imr`, `cluster_id`, `descriptors` and document id of each row,
+    and a manifest with the shape. Rows are appended batch by batch, so the whole matrix never has to be in
+    memory. Everything is written to a temporary directory and moved into place by `close`,
+    so readers never see a partial artifact.
+    """
+
+    def __init__(self, path: str, model_name: str):
+        """
+        Args:
+            path (str): Target artifact directory.
+            model_name (str): Name of the model that produces the embeddings.
+        """
+        self.path = path
+        self.model_name = model_name
+        self.count = 0
+        self.dims = 0
+        self._tmp_path = f"{path}.tmp"
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+        os.makedirs(self._tmp_path)
+        self._embeddings = open(os.path.join(self._tmp_path, EMBEDDINGS_FILE), 'wb')
+        self._documents = open(os.path.join(self._tmp_path, DOCUMENTS_FILE), 'w')
+
+    def append(self, documents, embeddings, ids=None):
+        """
+        Append a batch of documents and their embeddings.
+
+        Args:
+            documents (List[dict]): Document sources, in the same order as `embeddings`.
+            embeddings (np.ndarray): Embedding matrix with one row per document.
+            ids (List[str], optional): Elasticsearch document ids, stored in the sidecar so that
+                                       later delta reindexing can reuse unchanged embeddings.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if len(embeddings) != len(documents):
+            raise ValueError(f"{len(embeddings)} embeddings for {len(documents)} documents")
+        if len(documents) == 0:
+            return
+        if self.dims and embeddings.shape[1] != self.dims:
+            raise ValueError(f"Expected {self.dims}-dimensional embeddings, got {embeddings.shape[1]}")
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._embeddings.write(np.ascontiguousarray(embeddings / norms).tobytes())
+
+        for idx, document in enumerate(documents):
+            metadata = {"name": document["name"],
+                        "imr": document["imr"],
+                        "cluster_id": document["cluster_id"],
+                        "descriptors": document["descriptors"]}
+            if ids is not None:
+                metadata["id"] = ids[idx]
+            self._documents.write(json.dumps(metadata) + "\n")
+
+        self.dims = embeddings.shape[1]
+        self.count += len(documents)
+
+    def close(self, generation: str = None) -> str:
+        """
+        Write the manifest and move the artifact into place, replacing the previous one.
+
+        Args:
+            generation (str, optional): Index generation the artifact belongs to.
+
+        Returns:
+            str: The artifact directory.
+        """
+        self._embeddings.close()
+        self._documents.close()
+
+        manifest = {
+            "version": ARTIFACT_VERSION,
+            "model": self.model_name,
+            "generation": generation,
+            "count": self.count,
+            "dims": self.dims,
+            "dtype": "float32",
+            "normalized": True,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        with open(os.path.join(self._tmp_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Move the previous artifact aside instead of deleting it first, so it only disappears for
+        # the instant between two renames and is still on disk if the process dies in between
+        old_path = f"{self.path}.old"
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.lexists(self.path):
+            os.replace(self.path, old_path)
+        os.replace(self._tmp_path, self.path)
+        shutil.rmtree(old_path, ignore_errors=True)
+        return self.path
+
+    def abort(self):
+        """
+        Discard a partially written artifact.
+        """
+        self._embeddings.close()
+        self._documents.close()
+        shutil.rmtree(self._tmp_path, ignore_errors=True)
+
+
+def write_artifact(path: str, documents, embeddings, model_name: str, generation: str = None) -> str:
+    """
+    Write a complete artifact in one call.
+
+    Args:
+        path (str): Target artifact directory.
+        documents (List[dict]): Document sources, in the same order as `embeddings`.
+        embeddings (np.ndarray): Embedding matrix with one row per document.
+        model_name (str): Name of the model that produced the embeddings.
+        generation (str, optional): Index generation the artifact belongs to.
+
+    Returns:
+        str: The artifact directory.
+    """
+    writer = ArtifactWriter(path, model_name=model_name)
+    writer.append(documents, embeddings)
+    return writer.close(generation=generation)
+
+
+def read_manifest(path: str) -> dict:
+    """
+    Read the manifest of an artifact directory.
+
+    Args:
+        path (str): Artifact directory.
+
+    Returns:
+        dict: The manifest.
+    """
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def load_artifact(path: str, model_name: str = None):
+    """
+    Memory-map an artifact written by `ArtifactWriter`.
+
+    The embedding matrix is opened read-only with `np.memmap`, so several worker
+    processes share one page-cached copy instead of each holding its own.
+
+    Args:
+        path (str): Artifact directory.
+        model_name (str, optional): Expected model name; a mismatch raises an error.
+
+    Returns:
+        Tuple[List[dict], np.memmap, dict]: Documents, embedding matrix and manifest.
+
+    Raises:
+        ValueError: If the artifact format, model or row count does not match.
+    """
+    manifest = read_manifest(path)
+    if manifest["version"] != ARTIFACT_VERSION:
+        raise ValueError(f"Unsupported artifact version {manifest['version']} at {path}")
+    if model_name is not None and manifest["model"] != model_name:
+        raise ValueError(f"Artifact at {path} was built with {manifest['model']}, not {model_name}")
+
+    embeddings = np.memmap(os.path.join(path, EMBEDDINGS_FILE), dtype=np.float32, mode='r',
+                           shape=(manifest["count"], manifest["dims"]))
+
+    documents = []
+    with open(os.path.join(path, DOCUMENTS_FILE)) as f:
+        for line in f:
+            document = json.loads(line)
+            document["description"] = document["name"]
+            documents.append(document)
+
+    if len(documents) != manifest["count"]:
+        raise ValueError(f"Artifact at {path} has {manifest['count']} embeddings for {len(documents)} documents")
+
+    return documents, embeddings, manifest
@@ -0,0 +1,152 @@
+import queue
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# Number of recent queueing delays kept for the percentiles in `stats`
+DELAY_WINDOW = 10000
+
+
+class BatchingEncoder:
+    """
+    Coalesces concurrent `encode` calls into batched model calls.
+
+    Every text is queued with a future. A worker thread takes the first waiting text,
+    collects more for at most `max_wait` seconds or until `max_batch_size` texts are
+    queued, encodes them with one `model.encode` call and resolves the futures. Callers
+    block until their embeddings are ready, so the wrapper can be passed anywhere a model
+    is expected, e.g. behind a `CachedEncoder`.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait: float = 0.002):
+        """
+        Args:
+            model: The model used to encode the batches.
+            max_batch_size (int): Maximum number of texts per model call.
+            max_wait (float): Maximum time in seconds the first text of a batch waits for others.
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._delays = deque(maxlen=DELAY_WINDOW)
+        self._delay_total = 0.0
+        self._delay_count = 0
+        self._worker = threading.Thread(target=self._run, name="encode-batcher", daemon=True)
+        self._worker.start()
+
+    def encode(self, text, **kwargs):
+        """
+        Encode one text or a list of texts in the next batch.
+
+        Args:
+            text (str or List[str]): The text or texts to encode.
+            **kwargs: Arguments for `model.encode`, e.g. `normalize_embeddings`. Batches are encoded
+                      with the model's defaults, so a call with arguments bypasses the batcher.
+
+        Returns:
+            np.ndarray: One embedding for a string, or a matrix with one row per text.
+
+        Raises:
+            Exception: Whatever `model.encode` raised for this text.
+        """
+        if kwargs:
+            return self.model.encode(text, **kwargs)
+        if isinstance(text, str):
+            return self._submit(text).result()
+        futures = [self._submit(item) for item in text]
+        if not futures:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([future.result() for future in futures])
+
+    def _submit(self, text: str) -> Future:
+        future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        if batch[0] is None:
+            return None
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Finish the current batch before stopping
+                self._queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            started = time.perf_counter()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+                for _, _, queued in batch:
+                    self._delays.append(started - queued)
+                    self._delay_total += started - queued
+                self._delay_count += len(batch)
+
+            try:
+                embeddings = self.model.encode([text for text, _, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Encode the texts one by one, so only the callers of a failing text get its error
+                for text, future, _ in batch:
+                    try:
+                        future.set_result(self.model.encode([text])[0])
+                    except Exception as item_error:
+                        future.set_exception(item_error)
+                continue
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+    def close(self):
+        """
+        Stop the worker thread once the queued texts are encoded.
+        """
+        self._queue.put(None)
+        self._worker.join()
+
+    def stats(self) -> dict:
+        """
+        Report achieved batch sizes and queueing delays.
+
+        Returns:
+            dict: Number of batches and texts, mean batch size, the batch size histogram and
+                  the mean, median, 99th percentile and maximum queueing delay in milliseconds
+                  (percentiles over the last `DELAY_WINDOW` texts).
+        """
+        with self._lock:
+            batches = sum(self._batch_sizes.values())
+            delays = np.array(self._delays) * 1000 if self._delays else np.zeros(1)
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": batches,
+                "items": self._delay_count,
+                "mean_batch_size": self._delay_count / batches if batches else 0.0,
+                "batch_sizes": dict(sorted(self._batch_sizes.items())),
+                "queue_delay_ms": {
+                    "mean": self._delay_total * 1000 / self._delay_count if self._delay_count else 0.0,
+                    "p50": float(np.percentile(delays, 50)),
+                    "p99": float(np.percentile(delays, 99)),
+                    "max": float(delays.max())
+                }
+            }
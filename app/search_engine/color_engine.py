@@ -0,0 +1,161 @@
+import csv
+import os
+import re
+import threading
+import time
+
+from loguru import logger
+from thefuzz import fuzz, process
+
+
+def parse_color_bundle(row: dict):
+    """
+    Split a row of `datasets/colour_bundles.csv` into its descriptors and color values.
+
+    Args:
+        row (dict): The row, keyed by the CSV header.
+
+    Returns:
+        Tuple[List[str], List[str]]: The color descriptors and the color values of the bundle.
+    """
+    color_values = [value.strip() for value in row['Colour Values'].split(',')]
+    color_descriptors = [descriptor.strip() for descriptor in row['Colour Descriptors'].split(',')]
+    return color_descriptors, color_values
+
+
+def fold_color(text: str) -> str:
+    """
+    Fold case, hyphens, underscores and whitespace out of a color descriptor.
+
+    Args:
+        text (str): Color descriptor, e.g. "Off-White".
+
+    Returns:
+        str: The folded key, e.g. "offwhite".
+    """
+    return re.sub(r"[\s\-_]+", "", text.lower())
+
+
+def split_color_phrase(phrase: str):
+    """
+    Split a compound color phrase into its colors.
+
+    Args:
+        phrase (str): A phrase such as "red and white" or "dark gray/black".
+
+    Returns:
+        List[str]: The single lowercased color descriptors, e.g. ["dark gray", "black"].
+    """
+    parts = re.split(r"\s*(?:/|,|&|\+|;|\band\b|\bor\b)\s*", phrase.strip().lower())
+    return [part for part in parts if part]
+
+
+def merge_color_results(results):
+    """
+    Merge the color mapping results of the parts of one phrase.
+
+    Args:
+        results (List[dict or None]): Results of `ColorEngine.search` or `search_color_mapping`.
+
+    Returns:
+        dict or None: The matched descriptors under 'names' and their color values under
+                      'color_values', without duplicates (compared case-insensitively, so
+                      "#ffffff" and "#FFFFFF" count once), or None if no part matched.
+    """
+    names, color_values, seen = [], [], set()
+    for result in results:
+        if result is None:
+            continue
+        if result["name"] not in names:
+            names.append(result["name"])
+        for color_value in result["color_values"]:
+            if color_value.lower() not in seen:
+                seen.add(color_value.lower())
+                color_values.append(color_value)
+    return {"names": names, "color_values": color_values} if names else None
+
+
+class ColorEngine:
+    """
+    Resolves color descriptors from the color bundles CSV in memory.
+
+    Lookups try the exact descriptor, then the folded descriptor (see `fold_color`), then the
+    closest descriptor by `thefuzz` ratio above `fuzzy_threshold`. Results have the same shape
+    as `search_color_mapping`. The CSV is re-read when its modification time or size changes,
+    checked at most every `check_interval` seconds; a CSV that fails to parse keeps the previous
+    bundles in service.
+    """
+
+    def __init__(self, fpath: str, fuzzy_threshold: int = 85, check_interval: float = 5.0):
+        """
+        Args:
+            fpath (str): Path to the color bundles CSV.
+            fuzzy_threshold (int): Minimum `thefuzz` ratio (0-100) of a fuzzy match; 100 disables fuzzy matching.
+            check_interval (float): Minimum seconds between checks of the CSV for changes.
+        """
+        self.fpath = fpath
+        self.fuzzy_threshold = fuzzy_threshold
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked_at = time.monotonic()
+        self._signature, self._tables = self._load()
+
+    def _load(self):
+        stat = os.stat(self.fpath)
+        exact, folded = {}, {}
+        with open(self.fpath, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                color_descriptors, color_values = parse_color_bundle(row)
+                for color_descriptor in color_descriptors:
+                    result = {"name": color_descriptor, "color_values": color_values}
+                    # A descriptor listed in several bundles resolves to the first one
+                    exact.setdefault(color_descriptor, result)
+                    folded.setdefault(fold_color(color_descriptor), result)
+
+        logger.info(f"Loaded {len(exact)} color descriptors from {self.fpath}.")
+        return (stat.st_mtime_ns, stat.st_size), (exact, folded)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-read the CSV if it changed since it was loaded.
+
+        Returns:
+            bool: True if new bundles were loaded.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked_at = now
+            stat = os.stat(self.fpath)
+            if (stat.st_mtime_ns, stat.st_size) == self._signature:
+                return False
+            self._signature, self._tables = self._load()
+            return True
+        except (OSError, KeyError, csv.Error) as e:
+            logger.warning(f"Keeping the previous color bundles, could not reload {self.fpath}: {e}")
+            return False
+        finally:
+            self._lock.release()
+
+    def search(self, word: str):
+        """
+        Resolve a color descriptor.
+
+        Args:
+            word (str): The color descriptor to look up.
+
+        Returns:
+            dict or None: A dictionary with the matched 'name' and its corresponding 'color_values',
+                          or None if no descriptor is close enough.
+        """
+        self.reload_if_changed()
+        exact, folded = self._tables
+
+        result = exact.get(word) or folded.get(fold_color(word))
+        if result is not None or self.fuzzy_threshold >= 100:
+            return result
+
+        match = process.extractOne(fold_color(word), list(folded), scorer=fuzz.ratio,
+                                   score_cutoff=self.fuzzy_threshold)
+        return folded[match[0]] if match else None
@@ -0,0 +1,136 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+MODEL_KEY = "__model__"
+
+
+def normalize_query(text: str) -> str:
+    """
+    Normalize a query before encoding so that trivial variants share a cache entry.
+
+    Args:
+        text (str): Raw query text.
+
+    Returns:
+        str: Lowercased text with surrounding and repeated whitespace removed.
+    """
+    return " ".join(text.lower().split())
+
+
+class CachedEncoder:
+    """
+    Caches query embeddings in front of a sentence transformer.
+
+    The wrapper exposes the same `encode` method as the model, so it can be passed
+    anywhere a model is expected. Embeddings are kept in a bounded in-memory LRU and,
+    optionally, in a persistent `diskcache` tier shared across restarts. Entries are
+    tied to `model_name`, so switching `SENT_TRANSFORMER` never serves stale vectors.
+    """
+
+    def __init__(self, model, model_name: str, max_size: int = 10000, directory: str = None):
+        """
+        Args:
+            model: The model used to encode cache misses.
+            model_name (str): Name of the model; embeddings from other models are discarded.
+            max_size (int): Maximum number of embeddings kept in memory.
+            directory (str, optional): Directory of the persistent cache tier. Disabled if None.
+        """
+        self.model = model
+        self.model_name = model_name
+        self.max_size = max_size
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = None
+
+        if directory:
+            import diskcache
+
+            self._disk = diskcache.Cache(directory)
+            if self._disk.get(MODEL_KEY) != model_name:
+                self._disk.clear()
+                self._disk.set(MODEL_KEY, model_name)
+
+    def _get(self, key: str):
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return embedding
+
+        if self._disk is not None:
+            embedding = self._disk.get(key)
+            if embedding is not None:
+                self._put(key, embedding, persist=False)
+                with self._lock:
+                    self.disk_hits += 1
+                return embedding
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put(self, key: str, embedding, persist: bool = True):
+        with self._lock:
+            self._memory[key] = embedding
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+        if persist and self._disk is not None:
+            self._disk.set(key, embedding)
+
+    def encode(self, text, **kwargs):
+        """
+        Encode one query or a list of queries, running the model only for cache misses.
+
+        Args:
+            text (str or List[str]): The query or queries to encode.
+            **kwargs: Extra arguments forwarded to `model.encode`.
+
+        Returns:
+            np.ndarray: One embedding for a string, or a matrix with one row per query.
+        """
+        if isinstance(text, str):
+            return self._encode_many([text], **kwargs)[0]
+        return self._encode_many(list(text), **kwargs)
+
+    def _encode_many(self, texts, **kwargs):
+        keys = [normalize_query(text) for text in texts]
+        embeddings = [self._get(key) for key in keys]
+
+        missing = list(OrderedDict.fromkeys(key for key, embedding in zip(keys, embeddings) if embedding is None))
+        if missing:
+            encoded = dict(zip(missing, self.model.encode(missing, **kwargs)))
+            for key, embedding in encoded.items():
+                self._put(key, embedding)
+            embeddings = [encoded[key] if embedding is None else embedding
+                          for key, embedding in zip(keys, embeddings)]
+
+        if len(embeddings) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack(embeddings)
+
+    def stats(self) -> dict:
+        """
+        Report cache counters.
+
+        Returns:
+            dict: Hit/miss counters, hit ratio and current in-memory size.
+        """
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "model": self.model_name,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "size": len(self._memory),
+                "max_size": self.max_size
+            }
@@ -0,0 +1,98 @@
+from argparse import ArgumentParser
+
+import numpy as np
+from loguru import logger
+
+from app.search_engine.reader import read_jsonl, MANUAL_MAPPING_FIELDS
+
+
+def mapping_vocabulary(fpath: str):
+    """
+    Collect the distinct keys and descriptors of the manual mapping.
+
+    Args:
+        fpath (str): Path to the manual mapping JSONL file.
+
+    Returns:
+        List[str]: Lowercased terms, in order of first appearance.
+    """
+    vocabulary = {}
+    for row in read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS):
+        for term in [row['key'], *row['descriptors']]:
+            vocabulary.setdefault(term.strip().lower(), None)
+    return list(vocabulary)
+
+
+def _normalize(embeddings):
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+
+
+def measure_drift(reference, candidate, k: int = 10) -> dict:
+    """
+    Compare the embeddings of a candidate encoder with the fp32 reference on the same terms.
+
+    Besides the cosine similarity of each pair of vectors, every term is used as a query
+    against all terms, so ranking parity is measured the way the search uses the vectors.
+
+    Args:
+        reference (np.ndarray): Reference embeddings, one row per term.
+        candidate (np.ndarray): Candidate embeddings of the same terms.
+        k (int): Number of neighbours compared per term.
+
+    Returns:
+        dict: Mean, minimum and 1st percentile cosine similarity, the share of terms with the
+              same nearest neighbour ("top1_agreement") and the mean overlap of the top k ("overlap_at_k").
+    """
+    reference, candidate = _normalize(reference), _normalize(candidate)
+    cosine = (reference * candidate).sum(axis=1)
+
+    k = min(k, len(reference) - 1)
+    top1 = overlap = 0.0
+    for start in range(0, len(reference), 1024):
+        # Exclude the term itself, which is trivially its own nearest neighbour
+        rows = np.arange(start, min(start + 1024, len(reference)))
+        reference_scores = reference[rows] @ reference.T
+        candidate_scores = candidate[rows] @ candidate.T
+        reference_scores[np.arange(len(rows)), rows] = -np.inf
+        candidate_scores[np.arange(len(rows)), rows] = -np.inf
+
+        reference_top = np.argsort(-reference_scores, axis=1)[:, :k]
+        candidate_top = np.argsort(-candidate_scores, axis=1)[:, :k]
+        top1 += (reference_top[:, 0] == candidate_top[:, 0]).sum()
+        overlap += sum(len(set(r) & set(c)) / k for r, c in zip(reference_top, candidate_top))
+
+    return {"terms": len(reference),
+            "cosine_mean": float(cosine.mean()),
+            "cosine_min": float(cosine.min()),
+            "cosine_p01": float(np.percentile(cosine, 1)),
+            "top1_agreement": float(top1 / len(reference)),
+            "overlap_at_k": float(overlap / len(reference))}
+
+
+if __name__ == '__main__':
+    from app.search_engine.utils import load_model, MANUAL_MAPPING_FILE
+
+    parser = ArgumentParser(description="Measure the drift of a faster encoder backend from the fp32 model.")
+    parser.add_argument("--fpath", type=str, default=MANUAL_MAPPING_FILE)
+    parser.add_argument("--backend", type=str, default="onnx", choices=["onnx", "torch-int8"])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch_size", type=int, default=64)
+    parser.add_argument("--min_cosine", type=float, default=0.98,
+                        help="Fail if any term's embedding is less similar to the fp32 one.")
+    parser.add_argument("--min_top1_agreement", type=float, default=0.95)
+
+    args = parser.parse_args()
+    terms = mapping_vocabulary(args.fpath)
+    logger.info(f"Encoding {len(terms)} terms with the fp32 and the {args.backend} encoder.")
+    reference = load_model('torch').encode(terms, batch_size=args.batch_size)
+    candidate = load_model(args.backend).encode(terms, batch_size=args.batch_size)
+
+    drift = measure_drift(reference, candidate, k=args.k)
+    for name, value in drift.items():
+        logger.info(f"{name}: {value:.4f}" if isinstance(value, float) else f"{name}: {value}")
+
+    if drift["cosine_min"] < args.min_cosine or drift["top1_agreement"] < args.min_top1_agreement:
+        logger.error(f"{args.backend} drifts too far from the fp32 model; keep ENCODER_BACKEND=torch.")
+        raise SystemExit(1)
+    logger.info(f"{args.backend} keeps ranking parity with the fp32 model.")
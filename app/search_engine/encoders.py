@@ -0,0 +1,184 @@
+import json
+import os
+from argparse import ArgumentParser
+
+import numpy as np
+from loguru import logger
+
+ONNX_CONFIG_FILE = "encoder.json"
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_MODEL_FILE = "model.int8.onnx"
+
+
+class OnnxEncoder:
+    """
+    Runs a sentence transformer exported by `export_onnx` with ONNX Runtime on the CPU.
+
+    The exported graph only covers the transformer; tokenization, pooling and normalization
+    are done here as configured at export time, so `encode` returns the same embeddings as
+    `SentenceTransformer.encode` up to numerical drift (see `app.search_engine.encoder_drift`).
+    """
+
+    def __init__(self, model_dir: str, model_file: str = ONNX_MODEL_FILE, threads: int = None):
+        """
+        Args:
+            model_dir (str): Directory written by `export_onnx`.
+            model_file (str): ONNX graph inside `model_dir`, e.g. the int8 quantized one.
+            threads (int, optional): Intra-op threads of ONNX Runtime; its default if None.
+
+        Raises:
+            ImportError: If `onnxruntime` or `transformers` is not installed.
+        """
+        try:
+            import onnxruntime
+            from transformers import AutoTokenizer
+        except ImportError as e:
+            raise ImportError("The onnx encoder backend requires onnxruntime (pip install onnxruntime)") from e
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE)) as f:
+            self.config = json.load(f)
+
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(os.path.join(model_dir, model_file), sess_options=options,
+                                                    providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def _encode_batch(self, texts):
+        features = self.tokenizer(texts, padding=True, truncation=True, max_length=self.config["max_seq_length"],
+                                  return_tensors="np")
+        inputs = {name: value.astype(np.int64) for name, value in features.items() if name in self.input_names}
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        if self.config["pooling"] == "cls":
+            embeddings = token_embeddings[:, 0]
+        else:
+            mask = features["attention_mask"][..., None].astype(np.float32)
+            embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.config["normalize"]:
+            embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        """
+        Encode one sentence or a list of sentences, like `SentenceTransformer.encode`.
+
+        Args:
+            sentences (Union[str, List[str]]): Text to encode.
+            batch_size (int): Number of sentences per inference call.
+            show_progress_bar (bool): Accepted for compatibility and ignored.
+
+        Returns:
+            np.ndarray: A vector for a single sentence, otherwise a matrix with one row per sentence.
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.config["dims"]), dtype=np.float32)
+
+        embeddings = np.concatenate([self._encode_batch(texts[start:start + batch_size])
+                                     for start in range(0, len(texts), batch_size)])
+        return embeddings[0] if single else embeddings
+
+
+def quantize_dynamic(model):
+    """
+    Replace the linear layers of a sentence transformer by dynamically int8-quantized ones.
+
+    Weights are quantized once, activations on the fly, which speeds up CPU inference
+    without an export step.
+
+    Args:
+        model (SentenceTransformer): The fp32 model; it is left unchanged.
+
+    Returns:
+        SentenceTransformer: A quantized copy of the model.
+    """
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def export_onnx(model_path: str, output_dir: str, opset: int = 14, quantize: bool = False):
+    """
+    Export the transformer of a sentence transformer to ONNX for `OnnxEncoder`.
+
+    Args:
+        model_path (str): Sentence transformer to export, e.g. `SENT_TRANSFORMER`.
+        output_dir (str): Directory for the graph, the tokenizer and the encoder config.
+        opset (int): ONNX opset version.
+        quantize (bool): Also write a dynamically int8-quantized graph.
+
+    Raises:
+        ValueError: If the model uses a pooling mode other than mean or CLS pooling.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_path, device="cpu")
+    transformer = model[0]
+    pooling = next((module for module in model if type(module).__name__ == "Pooling"), None)
+    pooling_config = pooling.get_config_dict() if pooling is not None else {"pooling_mode_mean_tokens": True}
+    if pooling_config.get("pooling_mode_cls_token"):
+        pooling_mode = "cls"
+    elif pooling_config.get("pooling_mode_mean_tokens"):
+        pooling_mode = "mean"
+    else:
+        raise ValueError(f"Unsupported pooling configuration {pooling_config}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    transformer.tokenizer.save_pretrained(output_dir)
+
+    features = transformer.tokenizer(["an example sentence"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in features]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["token_embeddings"] = {0: "batch", 1: "sequence"}
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *args):
+            return self.auto_model(**dict(zip(input_names, args)), return_dict=False)[0]
+
+    with torch.no_grad():
+        torch.onnx.export(TokenEmbeddings(transformer.auto_model.eval()),
+                          tuple(features[name] for name in input_names),
+                          os.path.join(output_dir, ONNX_MODEL_FILE),
+                          input_names=input_names,
+                          output_names=["token_embeddings"],
+                          dynamic_axes=dynamic_axes,
+                          opset_version=opset)
+
+    config = {"source": model_path,
+              "pooling": pooling_mode,
+              "normalize": any(type(module).__name__ == "Normalize" for module in model),
+              "max_seq_length": model.get_max_seq_length(),
+              "dims": model.get_sentence_embedding_dimension()}
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), 'w') as f:
+        json.dump(config, f, indent=2)
+    logger.info(f"Exported {model_path} to {output_dir} ({pooling_mode} pooling).")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic as quantize_onnx
+
+        quantize_onnx(os.path.join(output_dir, ONNX_MODEL_FILE), os.path.join(output_dir, ONNX_INT8_MODEL_FILE),
+                      weight_type=QuantType.QInt8)
+        logger.info(f"Wrote the int8 quantized graph {ONNX_INT8_MODEL_FILE}.")
+
+
+if __name__ == '__main__':
+    from app.search_engine.utils import SENT_TRANSFORMER, ONNX_MODEL_DIR
+
+    parser = ArgumentParser()
+    parser.add_argument("--model", type=str, default=SENT_TRANSFORMER)
+    parser.add_argument("--output_dir", type=str, default=ONNX_MODEL_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--quantize", action="store_true", help="Also write an int8 quantized graph.")
+
+    args = parser.parse_args()
+    export_onnx(args.model, args.output_dir, opset=args.opset, quantize=args.quantize)
@@ -0,0 +1,149 @@
+import os
+import threading
+import unicodedata
+
+import inflect
+from loguru import logger
+
+from .reader import read_jsonl, manual_mapping_document, MANUAL_MAPPING_FIELDS
+
+
+def fold_descriptor(text: str, inflect_engine) -> str:
+    """
+    Fold case, accents, whitespace and the plural of the last word out of a descriptor.
+
+    Args:
+        text (str): Descriptor or query, e.g. "Cafés " or "bus stops".
+        inflect_engine (inflect.engine): Engine used to singularize the last word.
+
+    Returns:
+        str: The folded key, e.g. "cafe" or "bus stop".
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    words = "".join(char for char in folded if not unicodedata.combining(char)).split()
+    if not words:
+        return ""
+    # Only the head noun of English compounds is inflected ("bus stops", not "buses stop")
+    words[-1] = inflect_engine.singular_noun(words[-1]) or words[-1]
+    return " ".join(words)
+
+
+class ExactMatchIndex:
+    """
+    Answers manual mapping queries that literally name a known descriptor, without encoding them.
+
+    Every `key` and every entry of `descriptors` in the manual mapping JSONL is folded with
+    `fold_descriptor` into a hash table pointing to its row. A query whose folded form is in the
+    table resolves to that row with score 1.0; other queries, and folded forms shared by rows of
+    different clusters, fall through to the hybrid search. Only single-result lookups are
+    answered, since one bundle cannot fill a larger `limit`. `reload_if_changed` re-reads the
+    JSONL when its modification time or size changes; it is slow, so call it off the request
+    path, e.g. from a background task, and `search` keeps serving the previous table meanwhile.
+    """
+
+    def __init__(self, fpath: str, check_interval: float = 5.0):
+        """
+        Args:
+            fpath (str): Path to the manual mapping JSONL, the file `index_from_file` indexes.
+            check_interval (float): Seconds between two checks of the file for changes by the caller
+                                    of `reload_if_changed`.
+        """
+        self.fpath = fpath
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._inflect = inflect.engine()
+        self._lock = threading.Lock()
+        self._signature, self._table = self._load()
+
+    def _load(self):
+        stat = os.stat(self.fpath)
+        table, clusters, folds = {}, {}, {}
+        # Keys are indexed before descriptors, so a descriptor that is also a key resolves to its own row
+        rows = [manual_mapping_document(row) for row in read_jsonl(self.fpath, required_fields=MANUAL_MAPPING_FIELDS)]
+        terms = [(doc['name'], doc) for doc in rows] + \
+                [(descriptor, doc) for doc in rows for descriptor in doc['descriptors']]
+        for term, doc in terms:
+            # Descriptors repeat on every row of their cluster and inflect is slow, so fold each term once
+            if term not in folds:
+                folds[term] = fold_descriptor(term, self._inflect)
+            folded = folds[term]
+            clusters.setdefault(folded, set()).add(doc['cluster_id'])
+            table.setdefault(folded, doc)
+
+        ambiguous = [folded for folded, cluster_ids in clusters.items() if len(cluster_ids) > 1]
+        for folded in ambiguous:
+            del table[folded]
+        logger.info(f"Loaded {len(table)} exact match descriptors from {self.fpath}, "
+                    f"skipped {len(ambiguous)} shared by several clusters.")
+        return (stat.st_mtime_ns, stat.st_size), table
+
+    def reload_if_changed(self) -> bool:
+        """
+        Re-read the JSONL if it changed since it was loaded, then swap in the new table.
+
+        Returns:
+            bool: True if new descriptors were loaded.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            stat = os.stat(self.fpath)
+            if (stat.st_mtime_ns, stat.st_size) == self._signature:
+                return False
+            self._signature, self._table = self._load()
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"Keeping the previous exact match descriptors, could not reload {self.fpath}: {e}")
+            return False
+        finally:
+            self._lock.release()
+
+    def search(self, word: str, limit: int = 1, collapse: bool = False):
+        """
+        Resolve a query that names a known descriptor.
+
+        Args:
+            word (str): The search query.
+            limit (int): Maximum number of results; only a limit of 1 can be answered from the table.
+            collapse (bool): Also return the matched descriptor as 'matched_descriptor',
+                             like collapsed hybrid searches do.
+
+        Returns:
+            List[dict] or None: The matching document with score 1.0, in the schema of
+                                `search_manual_mapping`, no results for a `limit` below 1,
+                                or None if the query must be searched.
+        """
+        if limit <= 0:
+            return []
+        if limit > 1:
+            # The hybrid search ranks the other bundles a larger limit asks for
+            return None
+        doc = self._table.get(fold_descriptor(word, self._inflect))
+        # Counters are only approximate under concurrency, which is fine for a hit rate
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+
+        result = {'imr': doc['imr'],
+                  'cluster_id': doc['cluster_id'],
+                  'name': doc['name'],
+                  'score': 1.0,
+                  'descriptors': doc['descriptors']}
+        if collapse:
+            result['matched_descriptor'] = doc['name']
+        return [result]
+
+    def stats(self) -> dict:
+        """
+        Report the size of the table and how many queries it answered.
+
+        Returns:
+            dict: Number of descriptors, hits, misses and the hit rate.
+        """
+        total = self.hits + self.misses
+        return {"descriptors": len(self._table),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
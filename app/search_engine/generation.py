@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+GENERATION_KEY = "generation"
+
+
+def record_index_generation(client, index_name: str) -> str:
+    """
+    Stamp an index with a fresh generation identifier in its mapping `_meta`.
+
+    Called by the indexers once an index has been (re)built, so that serving
+    processes can tell that anything they cached from it is stale.
+
+    Args:
+        client (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the index that was rebuilt.
+
+    Returns:
+        str: The generation identifier that was recorded.
+    """
+    generation = uuid4().hex
+    client.indices.put_mapping(index=index_name,
+                               meta={GENERATION_KEY: generation,
+                                     "indexed_at": datetime.now(timezone.utc).isoformat()})
+    return generation
+
+
+def parse_index_generation(resp) -> str:
+    """
+    Build a generation string from a `get_mapping` response.
+
+    The concrete index names are part of the result, so repointing an alias to
+    another index changes the generation even if both carry the same stamp.
+
+    Args:
+        resp (dict): Elasticsearch `indices.get_mapping` response.
+
+    Returns:
+        str: A string identifying the current generation of the index or alias.
+    """
+    generations = []
+    for concrete_index, body in sorted(resp.items()):
+        meta = body["mappings"].get("_meta", {})
+        generations.append(f"{concrete_index}:{meta.get(GENERATION_KEY, '')}")
+    return "|".join(generations)
+
+
+def index_generation(client, index_name: str) -> str:
+    """
+    Read the current generation of an index or alias.
+
+    Args:
+        client (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the index or alias.
+
+    Returns:
+        str: A string identifying the current generation.
+    """
+    return parse_index_generation(client.indices.get_mapping(index=index_name))
+
+
+async def async_index_generation(client, index_name: str) -> str:
+    """
+    Awaitable version of `index_generation`.
+
+    Args:
+        client (AsyncElasticsearch): Non-blocking Elasticsearch client instance.
+        index_name (str): Name of the index or alias.
+
+    Returns:
+        str: A string identifying the current generation.
+    """
+    return parse_index_generation(await client.indices.get_mapping(index=index_name))
@@ -1,9 +1,21 @@
+import hashlib
 import json
 import os
+import random
+import re
+import shutil
+import time
 from argparse import ArgumentParser
+from contextlib import nullcontext
+from datetime import datetime, timezone
 
-import pandas as pd
-from app.search_engine.utils import OSMTag, encode, load_model, connect_search_engine
+import numpy as np
+from app.search_engine.artifact import ArtifactWriter, load_artifact
+from app.search_engine.generation import record_index_generation
+from app.search_engine.ingest import ingest, bulk_indexing_settings, INGEST_THREADS, INGEST_CHUNK_SIZE, INGEST_CHUNK_BYTES
+from app.search_engine.reader import read_jsonl, read_batches, manual_mapping_document, MANUAL_MAPPING_FIELDS
+from app.search_engine.search_ops import search_manual_mapping
+from app.search_engine.utils import load_model, SENT_TRANSFORMER, EMBEDDING_ARTIFACT_DIR
 from dotenv import load_dotenv
 from elasticsearch import Elasticsearch
 from elasticsearch import helpers
@@ -26,24 +38,172 @@ def read_config(config_path: str) -> dict:
     return config
 
 
-def index_from_file(fpath: str, index_name: str, clear_index: bool, config: dict):
+def length_buckets(names, batch_size: int):
+    """
+    Group document positions into encoding batches of similar name length.
+
+    Sorting by length before batching keeps the padding inside each batch small.
+
+    Args:
+        names (List[str]): The names to encode, in document order.
+        batch_size (int): Number of names per batch.
+
+    Returns:
+        List[List[int]]: Batches of positions into `names`.
+    """
+    order = sorted(range(len(names)), key=lambda idx: len(names[idx]))
+    return [order[idx:idx + batch_size] for idx in range(0, len(order), batch_size)]
+
+
+def content_hash(row: dict) -> str:
+    """
+    Compute a stable hash of the indexed content of a manual mapping row.
+
+    Args:
+        row (dict): A row of the manual mapping JSONL.
+
+    Returns:
+        str: SHA-1 over key, imr, cluster_id and descriptors, independent of key order.
+    """
+    content = {field: row[field] for field in MANUAL_MAPPING_FIELDS}
+    return hashlib.sha1(json.dumps(content, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def document_id(document: dict) -> str:
+    """
+    Derive a deterministic Elasticsearch id for a manual mapping document.
+
+    Args:
+        document (dict): A document built by `manual_mapping_document`.
+
+    Returns:
+        str: SHA-1 over the cluster id and the normalized name.
+    """
+    return hashlib.sha1(f"{document['cluster_id']}\x00{document['name']}".encode('utf-8')).hexdigest()
+
+
+def hashed_documents(window):
+    """
+    Build the documents of a window of rows together with their ids.
+
+    Args:
+        window (List[dict]): Rows of the manual mapping JSONL.
+
+    Returns:
+        Tuple[List[dict], List[str]]: Documents carrying a `content_hash`, and their ids.
+    """
+    documents = []
+    for row in window:
+        document = manual_mapping_document(row)
+        document["content_hash"] = content_hash(row)
+        documents.append(document)
+    return documents, [document_id(document) for document in documents]
+
+
+def encode_buckets(model, documents, batch_size: int, timings: dict):
+    """
+    Encode document names in length buckets, storing each vector under `embeddings`.
+
+    Args:
+        model: The model used to encode document names.
+        documents (List[dict]): The documents to encode.
+        batch_size (int): Number of names encoded per forward pass.
+        timings (dict): Accumulates the encoding time under "encode".
+
+    Yields:
+        List[int]: Positions into `documents` of each bucket, once it is encoded.
+    """
+    for bucket in length_buckets([doc["name"] for doc in documents], batch_size):
+        encode_start = time.perf_counter()
+        embeddings = model.encode([documents[idx]["name"] for idx in bucket], batch_size=batch_size)
+        timings["encode"] += time.perf_counter() - encode_start
+
+        for idx, embedding in zip(bucket, embeddings):
+            documents[idx]["embeddings"] = embedding
+        yield bucket
+
+
+def timed_windows(fpath: str, window_size: int, timings: dict):
+    """
+    Stream validated manual mapping rows in windows, timing the reads.
+
+    Args:
+        fpath (str): Path to the input JSONL file.
+        window_size (int): Number of rows per window.
+        timings (dict): Accumulates the read time under "read".
+
+    Yields:
+        List[dict]: Consecutive windows of rows.
+    """
+    windows = read_batches(read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS), window_size)
+    while True:
+        read_start = time.perf_counter()
+        window = next(windows, None)
+        timings["read"] += time.perf_counter() - read_start
+        if window is None:
+            return
+        yield window
+
+
+def indexed_hashes(es: Elasticsearch, index_name: str) -> dict:
+    """
+    Fetch the content hash of every document already in the index.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the index.
+
+    Returns:
+        dict: Mapping of document id to content hash (None for documents indexed without one).
+    """
+    return {hit["_id"]: hit["_source"].get("content_hash")
+            for hit in helpers.scan(es, index=index_name, _source=["content_hash"], size=1000)}
+
+
+def log_timings(stats: dict, timings: dict, pipeline_time: float):
+    """
+    Report throughput and time per stage of an indexing run.
+    """
+    logger.info(f"Indexed {stats['indexed']} documents in {pipeline_time:.1f}s "
+                f"({stats['indexed'] / max(pipeline_time, 1e-9):.1f} docs/sec), {stats['failed']} failed. "
+                f"Read: {timings['read']:.1f}s, encode: {timings['encode']:.1f}s, "
+                f"bulk: {timings['bulk']:.1f}s (summed over ingestion threads).")
+
+
+def index_from_file(fpath: str, index_name: str, clear_index: bool, config: dict, artifact_dir: str = None,
+                    encode_batch_size: int = 64, ingest_options: dict = None, window_size: int = 4096, model=None):
     """
     Indexes documents from a file into an Elasticsearch index.
 
     Args:
-        fpath (str): Path to the input JSONL file (one JSON object per line).
+        fpath (str): Path to the input JSONL file (one JSON object per line), optionally gzip/zstd compressed.
         index_name (str): Name of the Elasticsearch index to use/create.
         clear_index (bool): Whether to delete and recreate the index before indexing.
         config (dict): Configuration dictionary with keys:
                        - 'settings': Path to index settings JSON file.
                        - 'mappings': Path to index mappings JSON file.
+        artifact_dir (str, optional): Directory to write the embedding artifact to, in a
+                                      sub-directory named after the index. Skipped if None.
+        encode_batch_size (int): Number of names encoded per forward pass.
+        ingest_options (dict, optional): Keyword arguments for `ingest`, e.g. `thread_count`,
+                                         `chunk_size` and `max_chunk_bytes`.
+        window_size (int): Number of rows read, length-sorted and encoded together.
+        model (optional): The model used to encode document names; loaded with `load_model` if None.
 
     Behavior:
         - Optionally deletes the existing index.
         - Creates a new index with provided settings and mappings.
-        - Reads input data from file.
-        - Encodes document names using a loaded ML model.
-        - Indexes the documents in batches.
+        - Streams input data from file in windows of `window_size` rows.
+        - Encodes document names using a loaded ML model, in batches of similar length.
+        - Indexes the documents with parallel bulk requests while the next batches are being
+          encoded. On a full rebuild, refreshes and replicas are disabled until indexing is done.
+        - Reports docs/sec and the time spent per stage.
+        - Records a new index generation, which invalidates the serving result caches.
+        - Optionally writes the embeddings and their metadata as an artifact that serving
+          processes and validation scripts can memory-map instead of re-encoding.
+
+    Returns:
+        dict: Number of indexed and failed documents, and the recorded index generation.
     """
     es = Elasticsearch(
         os.getenv("SEARCH_ENGINE_HOST"),  # Elasticsearch endpoint
@@ -57,6 +217,7 @@ def index_from_file(fpath: str, index_name: str, clear_index: bool, config: dict
     settings = read_config(config["settings"])
     mappings = read_config(config["mappings"])
 
+    full_rebuild = not es.indices.exists(index=index_name)
     es.indices.create(
         index=index_name,
         settings=settings,
@@ -66,48 +227,408 @@ def index_from_file(fpath: str, index_name: str, clear_index: bool, config: dict
 
     logger.info(f"Created index {index_name}.")
 
-    logger.info(f"Loading data at {fpath}")
+    if model is None:
+        model = load_model()
+        logger.info(f"ML model is loaded.")
 
-    with open(fpath, 'r') as json_file:
-        data = list(json_file)
+    timings = {"read": 0.0, "encode": 0.0, "bulk": 0.0}
+    writer = ArtifactWriter(os.path.join(artifact_dir, index_name), model_name=SENT_TRANSFORMER) \
+        if artifact_dir else None
 
-    logger.info(f"Data loaded. It has {len(data)} entries.")
+    def encoded_actions():
+        # Rows are streamed from the file in windows, so memory stays bounded whatever its size.
+        # Encoding runs on this thread while the ingestion threads submit finished batches
+        # to Elasticsearch, so the CPU keeps encoding while Elasticsearch ingests
+        progress = tqdm(unit="docs")
+        for window in timed_windows(fpath, window_size, timings):
+            documents, ids = hashed_documents(window)
 
-    model = load_model()
+            for bucket in encode_buckets(model, documents, encode_batch_size, timings):
+                for idx in bucket:
+                    yield {"_index": index_name, "_id": ids[idx], "_source": documents[idx]}
+                progress.update(len(bucket))
 
-    logger.info(f"ML model is loaded.")
+            if writer is not None:
+                writer.append(documents, np.stack([doc["embeddings"] for doc in documents]), ids=ids)
+        progress.close()
+
+    logger.info(f"Document indexing of {fpath} started.")
+    pipeline_start = time.perf_counter()
+    try:
+        with bulk_indexing_settings(es, index_name) if full_rebuild else nullcontext():
+            stats = ingest(es, encoded_actions(), **(ingest_options or {}))
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    timings["bulk"] = stats["bulk_time"]
+    log_timings(stats, timings, time.perf_counter() - pipeline_start)
 
-    actions = []
-    batch_size = 500
-    logger.info(f"Document indexing started.")
-    for row in tqdm(data, total=len(data)):
-        row = json.loads(row)
-        imr = row['imr']
-        name = row['key'].strip().lower()
-        cluster_id = row['cluster_id']
-        descriptors = row['descriptors']
-
-        action = {"index": {"_index": index_name}}
-
-        doc = {
-            "name": name,
-            "imr": imr,
-            "cluster_id": cluster_id,
-            "description": name,
-            "embeddings": model.encode(name),
-            "descriptors": descriptors
-        }
-        actions.append(action)
-        actions.append(doc)
-
-        if len(actions) == batch_size:
-            es.bulk(index=index_name, operations=actions)
-            actions.clear()
-    if len(actions) > 0:
-        es.bulk(index=index_name, operations=actions)
     result = es.count(index=index_name)
     logger.info(f"{result.body['count']} tags indexed.")
 
+    generation = record_index_generation(es, index_name)
+    logger.info(f"Recorded index generation {generation}.")
+
+    if writer is not None:
+        artifact_path = writer.close(generation=generation)
+        logger.info(f"Embedding artifact written to {artifact_path}.")
+
+    return {"indexed": stats["indexed"], "failed": stats["failed"], "generation": generation}
+
+
+def delta_index_from_file(fpath: str, index_name: str, artifact_dir: str = None, encode_batch_size: int = 64,
+                          ingest_options: dict = None, window_size: int = 4096):
+    """
+    Bring an existing index in line with a file by re-embedding only rows that changed.
+
+    Args:
+        fpath (str): Path to the input JSONL file, optionally gzip/zstd compressed.
+        index_name (str): Name of the existing Elasticsearch index.
+        artifact_dir (str, optional): Directory of the embedding artifact to update. Skipped if None.
+        encode_batch_size (int): Number of names encoded per forward pass.
+        ingest_options (dict, optional): Keyword arguments for `ingest`.
+        window_size (int): Number of rows read, length-sorted and encoded together.
+
+    Behavior:
+        - Reads the content hash of every indexed document.
+        - Streams the file and compares each row's content hash with the indexed one, matched
+          by deterministic document id.
+        - Encodes and upserts new or changed rows only, and deletes documents whose row is gone.
+        - Rebuilds the artifact, reusing the embeddings of unchanged rows from the previous one.
+        - Records a new index generation if anything changed.
+
+    Raises:
+        ValueError: If the index does not exist yet.
+        RuntimeError: If documents failed to index; no new generation is recorded and the
+                      artifact is left as it was.
+    """
+    es = Elasticsearch(
+        os.getenv("SEARCH_ENGINE_HOST"),  # Elasticsearch endpoint
+        request_timeout = 120
+    )
+
+    if not es.indices.exists(index=index_name):
+        raise ValueError(f"Index {index_name} does not exist, index it in full first.")
+
+    existing = indexed_hashes(es, index_name)
+    logger.info(f"{len(existing)} documents are indexed in {index_name}.")
+
+    model = load_model()
+
+    logger.info(f"ML model is loaded.")
+
+    timings = {"read": 0.0, "encode": 0.0, "bulk": 0.0}
+    changes = {"upserts": 0, "deletes": 0}
+    seen = set()
+
+    # Resolve the alias symlink of blue/green builds, so the artifact of the concrete index is updated
+    artifact_path = os.path.realpath(os.path.join(artifact_dir, index_name)) if artifact_dir else None
+    previous_rows = {}
+    previous_embeddings = None
+    if artifact_path and os.path.exists(artifact_path):
+        try:
+            previous_documents, previous_embeddings, _ = load_artifact(artifact_path, model_name=SENT_TRANSFORMER)
+            previous_rows = {document["id"]: row for row, document in enumerate(previous_documents)
+                             if "id" in document}
+        except ValueError as e:
+            logger.warning(f"Not reusing the artifact at {artifact_path}: {e}")
+    writer = ArtifactWriter(artifact_path, model_name=SENT_TRANSFORMER) if artifact_path else None
+
+    def delta_actions():
+        for window in timed_windows(fpath, window_size, timings):
+            documents, ids = hashed_documents(window)
+            seen.update(ids)
+
+            changed = {idx for idx, doc_id in enumerate(ids)
+                       if existing.get(doc_id) != documents[idx]["content_hash"]}
+            # Unchanged rows keep the embedding of the previous artifact; if it has none, they
+            # are encoded as well, but only to complete the artifact
+            to_encode = []
+            for idx, doc_id in enumerate(ids):
+                if idx in changed:
+                    to_encode.append(idx)
+                elif writer is not None:
+                    if doc_id in previous_rows:
+                        documents[idx]["embeddings"] = previous_embeddings[previous_rows[doc_id]]
+                    else:
+                        to_encode.append(idx)
+
+            for bucket in encode_buckets(model, [documents[idx] for idx in to_encode], encode_batch_size, timings):
+                for idx in (to_encode[pos] for pos in bucket):
+                    if idx in changed:
+                        changes["upserts"] += 1
+                        yield {"_index": index_name, "_id": ids[idx], "_source": documents[idx]}
+
+            if writer is not None:
+                writer.append(documents, np.stack([doc["embeddings"] for doc in documents]), ids=ids)
+
+        for doc_id in existing.keys() - seen:
+            changes["deletes"] += 1
+            yield {"_op_type": "delete", "_index": index_name, "_id": doc_id}
+
+    logger.info(f"Delta indexing of {fpath} started.")
+    pipeline_start = time.perf_counter()
+    try:
+        stats = ingest(es, delta_actions(), **(ingest_options or {}))
+    except Exception:
+        if writer is not None:
+            writer.abort()
+        raise
+    timings["bulk"] = stats["bulk_time"]
+    log_timings(stats, timings, time.perf_counter() - pipeline_start)
+    if stats["failed"] > 0:
+        # Serving workers would flush their caches for, and load an artifact of, an index that
+        # does not hold what the file says; rerunning the delta retries the failed rows
+        if writer is not None:
+            writer.abort()
+        raise RuntimeError(f"{stats['failed']} documents failed to index into {index_name}; "
+                           f"index generation and artifact unchanged.")
+    logger.info(f"{changes['upserts']} documents upserted, {changes['deletes']} deleted, "
+                f"{len(seen) - changes['upserts']} unchanged.")
+
+    if changes["upserts"] == 0 and changes["deletes"] == 0:
+        if writer is not None:
+            writer.abort()
+        logger.info(f"{index_name} is up to date.")
+        return
+
+    es.indices.refresh(index=index_name)
+    generation = record_index_generation(es, index_name)
+    logger.info(f"Recorded index generation {generation}.")
+
+    if writer is not None:
+        artifact_path = writer.close(generation=generation)
+        logger.info(f"Embedding artifact written to {artifact_path}.")
+
+
+def generation_indices(es: Elasticsearch, alias: str):
+    """
+    List the indices built for an alias by `blue_green_index_from_file`, oldest first.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        alias (str): Name of the read alias.
+
+    Returns:
+        List[str]: Index names; their timestamp suffix makes lexical order chronological.
+    """
+    # Only match timestamped names, so unrelated indices such as `<alias>_v5` are never pruned
+    pattern = re.compile(rf"{re.escape(alias)}_\d{{14}}")
+    return sorted(index_name for index_name in es.indices.get(index=f"{alias}_*", expand_wildcards="open")
+                  if pattern.fullmatch(index_name))
+
+
+def alias_indices(es: Elasticsearch, alias: str):
+    """
+    List the indices an alias currently points to.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        alias (str): Name of the read alias.
+
+    Returns:
+        List[str]: Index names, empty if the alias does not exist.
+    """
+    if not es.indices.exists_alias(name=alias):
+        return []
+    return sorted(es.indices.get_alias(name=alias).keys())
+
+
+def point_alias(es: Elasticsearch, alias: str, index_name: str, artifact_dir: str = None):
+    """
+    Atomically repoint an alias to a single index.
+
+    The removal from the previous indices and the addition to the new one are sent in
+    one `_aliases` request, so searches on the alias never see an empty or mixed state.
+    If artifacts are used, the `<artifact_dir>/<alias>` symlink is swapped to the
+    artifact of the new index as well. An artifact directory found there instead, written
+    before blue/green builds were used, is moved to `<alias>.legacy`.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        alias (str): Name of the read alias.
+        index_name (str): Index the alias should point to.
+        artifact_dir (str, optional): Directory holding one artifact per index.
+
+    Raises:
+        ValueError: If `<artifact_dir>/<alias>` is a file; the alias is left untouched.
+    """
+    link = None
+    if artifact_dir and os.path.exists(os.path.join(artifact_dir, index_name)):
+        link = os.path.join(artifact_dir, alias)
+        # Check before the alias moves, so a failure cannot leave the index and the artifact out of step
+        if os.path.lexists(link) and not os.path.islink(link) and not os.path.isdir(link):
+            raise ValueError(f"{link} is neither a symlink nor an artifact directory; remove it to swap {alias}.")
+
+    actions = [{"remove": {"index": previous, "alias": alias}}
+               for previous in alias_indices(es, alias) if previous != index_name]
+    actions.append({"add": {"index": index_name, "alias": alias}})
+    es.indices.update_aliases(actions=actions)
+    logger.info(f"Alias {alias} now points to {index_name}.")
+
+    if link is not None:
+        tmp_link = f"{link}.tmp"
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(index_name, tmp_link)
+        if os.path.isdir(link) and not os.path.islink(link):
+            # An artifact written straight to <artifact_dir>/<alias> before the first blue/green
+            # build; a symlink cannot replace a directory, so move it aside first
+            legacy = f"{link}.legacy"
+            shutil.rmtree(legacy, ignore_errors=True)
+            os.replace(link, legacy)
+            logger.info(f"Moved the artifact directory {link} to {legacy}.")
+        os.replace(tmp_link, link)
+        logger.info(f"Artifact {link} now points to {index_name}.")
+
+
+def smoke_test(es: Elasticsearch, index_name: str, fpath: str, model, sample_size: int = 50,
+               min_accuracy: float = 0.9, seed: int = 0) -> float:
+    """
+    Warm a freshly built index and check that it answers known descriptors correctly.
+
+    The index is force-merged to one segment, so k-NN searches a single graph, and a random
+    sample of dataset rows is queried by their key; the top hit must be in the row's cluster.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the new index.
+        fpath (str): The JSONL file the index was built from.
+        model: The model the index was built with, used to encode the queries.
+        sample_size (int): Number of rows to query.
+        min_accuracy (float): Minimum share of queries whose top hit is in the expected cluster.
+        seed (int): Seed of the row sample.
+
+    Returns:
+        float: The share of correctly answered queries.
+
+    Raises:
+        RuntimeError: If the accuracy is below `min_accuracy`.
+    """
+    es.indices.forcemerge(index=index_name, max_num_segments=1)
+    es.indices.refresh(index=index_name)
+
+    # Reservoir sampling keeps memory bounded whatever the file size
+    rng = random.Random(seed)
+    sample = []
+    for count, row in enumerate(read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS)):
+        if len(sample) < sample_size:
+            sample.append(row)
+        elif (pos := rng.randrange(count + 1)) < sample_size:
+            sample[pos] = row
+    if not sample:
+        raise RuntimeError(f"No rows to smoke test {index_name} with.")
+
+    correct = 0
+    for row in sample:
+        results = search_manual_mapping(word=row['key'].strip().lower(), client=es, model=model,
+                                        index_name=index_name, confidence=0.0, limit=1)
+        if results and results[0]['cluster_id'] == row['cluster_id']:
+            correct += 1
+        else:
+            logger.warning(f"Smoke query {row['key']} did not return cluster {row['cluster_id']}.")
+
+    accuracy = correct / len(sample)
+    logger.info(f"Smoke test of {index_name}: {correct}/{len(sample)} queries correct.")
+    if accuracy < min_accuracy:
+        raise RuntimeError(f"Smoke test of {index_name} failed with accuracy {accuracy:.2f} < {min_accuracy}.")
+    return accuracy
+
+
+def prune_generations(es: Elasticsearch, alias: str, keep: int, artifact_dir: str = None):
+    """
+    Delete old generations of an alias, keeping the live index and `keep` previous ones.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        alias (str): Name of the read alias.
+        keep (int): Number of previous generations kept for rollback.
+        artifact_dir (str, optional): Directory holding one artifact per index; pruned alongside.
+    """
+    live = set(alias_indices(es, alias))
+    previous = [index_name for index_name in generation_indices(es, alias) if index_name not in live]
+    for index_name in previous[:max(len(previous) - keep, 0)]:
+        es.indices.delete(index=index_name)
+        if artifact_dir:
+            shutil.rmtree(os.path.join(artifact_dir, index_name), ignore_errors=True)
+        logger.info(f"Deleted old generation {index_name}.")
+
+
+def blue_green_index_from_file(fpath: str, alias: str, config: dict, keep: int = 2, artifact_dir: str = None,
+                               smoke_size: int = 50, min_smoke_accuracy: float = 0.9, **index_options) -> str:
+    """
+    Rebuild the manual mapping without downtime: build a new index, check it, then swap the alias.
+
+    Args:
+        fpath (str): Path to the input JSONL file.
+        alias (str): Name of the read alias the API queries (`MANUAL_MAPPING`).
+        config (dict): Index settings and mappings paths, as for `index_from_file`.
+        keep (int): Number of previous generations kept for instant rollback.
+        artifact_dir (str, optional): Directory to write the embedding artifact to.
+        smoke_size (int): Number of dataset rows queried before the swap.
+        min_smoke_accuracy (float): Minimum smoke test accuracy required to swap.
+        **index_options: Further keyword arguments for `index_from_file`.
+
+    Returns:
+        str: Name of the new index.
+
+    Raises:
+        ValueError: If a concrete index already uses the alias name.
+        RuntimeError: If documents failed to index or the smoke test failed; the alias is left untouched.
+    """
+    es = Elasticsearch(
+        os.getenv("SEARCH_ENGINE_HOST"),  # Elasticsearch endpoint
+        request_timeout = 120
+    )
+
+    if es.indices.exists(index=alias) and not es.indices.exists_alias(name=alias):
+        raise ValueError(f"{alias} is an index, not an alias. Choose another alias name or remove the index.")
+
+    index_name = f"{alias}_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}"
+    logger.info(f"Building {index_name} for alias {alias}.")
+
+    # Load the model once for building and smoke testing the index
+    model = load_model()
+    stats = index_from_file(fpath=fpath, index_name=index_name, clear_index=True, config=config,
+                            artifact_dir=artifact_dir, model=model, **index_options)
+    if stats["failed"] > 0:
+        raise RuntimeError(f"{stats['failed']} documents failed to index into {index_name}; alias {alias} unchanged.")
+
+    smoke_test(es, index_name, fpath, model, sample_size=smoke_size, min_accuracy=min_smoke_accuracy)
+
+    point_alias(es, alias, index_name, artifact_dir=artifact_dir)
+    prune_generations(es, alias, keep=keep, artifact_dir=artifact_dir)
+    return index_name
+
+
+def rollback_alias(alias: str, artifact_dir: str = None) -> str:
+    """
+    Point an alias back to the generation built before the one it serves now.
+
+    Args:
+        alias (str): Name of the read alias.
+        artifact_dir (str, optional): Directory holding one artifact per index.
+
+    Returns:
+        str: Name of the index the alias points to after the rollback.
+
+    Raises:
+        RuntimeError: If there is no older generation to roll back to.
+    """
+    es = Elasticsearch(
+        os.getenv("SEARCH_ENGINE_HOST"),  # Elasticsearch endpoint
+        request_timeout = 120
+    )
+
+    live = alias_indices(es, alias)
+    older = [index_name for index_name in generation_indices(es, alias) if live and index_name < min(live)]
+    if not older:
+        raise RuntimeError(f"No generation older than {live} to roll {alias} back to.")
+
+    point_alias(es, alias, older[-1], artifact_dir=artifact_dir)
+    return older[-1]
+
 
 if __name__ == '__main__':
     # CLI argument parser for running the script
@@ -118,12 +639,60 @@ if __name__ == '__main__':
     parser.add_argument("--config_settings", type=str)
     parser.add_argument("--config_mappings", type=str)
     parser.add_argument("--fpath", type=str)
+    parser.add_argument("--artifact_dir", type=str, default=EMBEDDING_ARTIFACT_DIR)
+    parser.add_argument("--skip_artifact", action="store_true")
+    parser.add_argument("--encode_batch_size", type=int, default=64)
+    parser.add_argument("--thread_count", type=int, default=INGEST_THREADS)
+    parser.add_argument("--chunk_size", type=int, default=INGEST_CHUNK_SIZE)
+    parser.add_argument("--max_chunk_bytes", type=int, default=INGEST_CHUNK_BYTES)
+    parser.add_argument("--window_size", type=int, default=4096)
+    parser.add_argument("--delta", action="store_true",
+                        help="Only re-embed and upsert changed rows of an existing index, and delete removed ones.")
+    parser.add_argument("--alias", type=str,
+                        help="Build a new timestamped index and atomically point this alias to it.")
+    parser.add_argument("--keep", type=int, default=2,
+                        help="Number of previous generations kept for rollback.")
+    parser.add_argument("--smoke_size", type=int, default=50)
+    parser.add_argument("--min_smoke_accuracy", type=float, default=0.9)
+    parser.add_argument("--rollback", action="store_true",
+                        help="Point the alias back to its previous generation.")
 
     args = parser.parse_args()
+    if args.rollback and not args.alias:
+        parser.error("--rollback requires --alias")
+    artifact_dir = None if args.skip_artifact else args.artifact_dir
+    ingest_options = {"thread_count": args.thread_count,
+                      "chunk_size": args.chunk_size,
+                      "max_chunk_bytes": args.max_chunk_bytes}
 
-    if args.index_manual_mappings:
+    if args.rollback:
+        rollback_alias(alias=args.alias, artifact_dir=artifact_dir)
+    elif args.index_manual_mappings and args.alias:
+        blue_green_index_from_file(fpath=args.fpath,
+                                   alias=args.alias,
+                                   config={"settings": args.config_settings,
+                                           "mappings": args.config_mappings},
+                                   keep=args.keep,
+                                   artifact_dir=artifact_dir,
+                                   smoke_size=args.smoke_size,
+                                   min_smoke_accuracy=args.min_smoke_accuracy,
+                                   encode_batch_size=args.encode_batch_size,
+                                   ingest_options=ingest_options,
+                                   window_size=args.window_size)
+    elif args.index_manual_mappings and args.delta:
+        delta_index_from_file(fpath=args.fpath,
+                              index_name=args.index_name,
+                              artifact_dir=artifact_dir,
+                              encode_batch_size=args.encode_batch_size,
+                              ingest_options=ingest_options,
+                              window_size=args.window_size)
+    elif args.index_manual_mappings:
         index_from_file(fpath=args.fpath,
                         index_name=args.index_name,
                         clear_index=args.clear_index,
                         config={"settings": args.config_settings,
-                                "mappings": args.config_mappings})
+                                "mappings": args.config_mappings},
+                        artifact_dir=artifact_dir,
+                        encode_batch_size=args.encode_batch_size,
+                        ingest_options=ingest_options,
+                        window_size=args.window_size)
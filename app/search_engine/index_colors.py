@@ -1,12 +1,37 @@
 import os
+from contextlib import nullcontext
+
 from dotenv import load_dotenv
 from tqdm import tqdm
 from loguru import logger
 from elasticsearch import Elasticsearch
 import pandas as pd
+from app.search_engine.color_engine import parse_color_bundle
+from app.search_engine.ingest import ingest, bulk_indexing_settings
 
 load_dotenv()
 
+
+def color_actions(index_name: str, color_bundles):
+    """
+    Yield one bulk action per color descriptor of each color bundle.
+
+    Args:
+        index_name (str): Name of the color mapping index.
+        color_bundles (List[dict]): Rows of `datasets/colour_bundles.csv`.
+    """
+    for color_bundle in color_bundles:
+        color_descriptors, color_values = parse_color_bundle(color_bundle)
+
+        for color_descriptor in tqdm(color_descriptors, total=len(color_descriptors)):
+            doc = {
+                "name": color_descriptor,
+                "color_values": color_values,
+            }
+
+            yield {"_index": index_name, "_source": doc}
+
+
 if __name__ == '__main__':
     # Name of the Elasticsearch index to create/populate
     index_name = 'color_mappings'
@@ -27,6 +52,7 @@ if __name__ == '__main__':
         }
     }
 
+    full_rebuild = not es.indices.exists(index=index_name)
     es.indices.create(
         index=index_name,
         body=index_body,
@@ -36,28 +62,8 @@ if __name__ == '__main__':
     color_bundles = pd.read_csv('datasets/colour_bundles.csv')
     color_bundles = color_bundles.to_dict(orient='records')
 
-    actions = []
-    batch_size = 500
-    for color_bundle in color_bundles:
-        color_values = list(map(lambda x: x.strip(),color_bundle['Colour Values'].split(',')))
-        color_descriptors = list(map(lambda x: x.strip(),color_bundle['Colour Descriptors'].split(',')))
-
-        for color_descriptor in tqdm(color_descriptors, total=len(color_descriptors)):
-            doc = {
-                "name": color_descriptor,
-                "color_values": color_values,
-            }
-
-            action = {"index": {"_index": index_name}}
-            actions.append(action)
-            actions.append(doc)
-
-            if len(actions) == batch_size:
-                es.bulk(index=index_name, operations=actions)
-                actions.clear()
-
-    if len(actions) > 0:
-        es.bulk(index=index_name, operations=actions)
+    with bulk_indexing_settings(es, index_name) if full_rebuild else nullcontext():
+        stats = ingest(es, color_actions(index_name, color_bundles))
 
     result = es.count(index=index_name)
-    logger.info(f"{result.body['count']} tags indexed.")
\ No newline at end of file
+    logger.info(f"{result.body['count']} tags indexed, {stats['failed']} failed.")
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from itertools import islice
+
+from elasticsearch import Elasticsearch, helpers
+from loguru import logger
+
+INGEST_THREADS = int(os.getenv('INGEST_THREADS', 4))
+INGEST_CHUNK_SIZE = int(os.getenv('INGEST_CHUNK_SIZE', 500))
+INGEST_CHUNK_BYTES = int(os.getenv('INGEST_CHUNK_BYTES', 10 * 1024 * 1024))
+INGEST_MAX_RETRIES = int(os.getenv('INGEST_MAX_RETRIES', 5))
+INGEST_INITIAL_BACKOFF = float(os.getenv('INGEST_INITIAL_BACKOFF', 2))
+INGEST_MAX_BACKOFF = float(os.getenv('INGEST_MAX_BACKOFF', 60))
+
+# Number of per-item failures written to the log; the rest are only counted
+LOGGED_FAILURES = 10
+
+
+def _slices(actions, size: int):
+    actions = iter(actions)
+    while True:
+        chunk = list(islice(actions, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ingest_slice(es: Elasticsearch, actions, chunk_size: int, max_chunk_bytes: int, max_retries: int,
+                  initial_backoff: float, max_backoff: float):
+    start = time.perf_counter()
+    indexed = 0
+    failures = []
+    for ok, item in helpers.streaming_bulk(es, actions,
+                                           chunk_size=chunk_size,
+                                           max_chunk_bytes=max_chunk_bytes,
+                                           max_retries=max_retries,
+                                           initial_backoff=initial_backoff,
+                                           max_backoff=max_backoff,
+                                           raise_on_error=False,
+                                           raise_on_exception=False):
+        if ok:
+            indexed += 1
+        else:
+            failures.append(item)
+    return indexed, failures, time.perf_counter() - start
+
+
+def ingest(es: Elasticsearch, actions, thread_count: int = INGEST_THREADS, chunk_size: int = INGEST_CHUNK_SIZE,
+           max_chunk_bytes: int = INGEST_CHUNK_BYTES, max_retries: int = INGEST_MAX_RETRIES,
+           initial_backoff: float = INGEST_INITIAL_BACKOFF, max_backoff: float = INGEST_MAX_BACKOFF) -> dict:
+    """
+    Send bulk actions to Elasticsearch from several threads, with retries and backpressure.
+
+    Actions are consumed lazily and cut into slices of `chunk_size` documents. Each slice
+    is sent by `helpers.streaming_bulk` on a worker thread, which further splits it by
+    `max_chunk_bytes` and retries documents rejected with 429 using exponential backoff.
+    At most two slices per thread are in flight, so a slow cluster slows down the
+    producer instead of piling up actions in memory.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        actions (Iterable[dict]): Bulk actions in `helpers.bulk` format.
+        thread_count (int): Number of threads sending bulk requests.
+        chunk_size (int): Maximum number of documents per bulk request.
+        max_chunk_bytes (int): Maximum size of a bulk request in bytes.
+        max_retries (int): Number of retries for documents rejected with 429.
+        initial_backoff (float): Seconds to wait before the first retry; doubled on each retry.
+        max_backoff (float): Upper bound of the wait between retries.
+
+    Returns:
+        dict: Number of indexed and failed documents, the per-item failures and the time
+              spent in bulk requests (summed over threads) under "bulk_time".
+    """
+    stats = {"indexed": 0, "failed": 0, "failures": [], "bulk_time": 0.0}
+
+    def collect(futures):
+        for future in futures:
+            indexed, failures, bulk_time = future.result()
+            stats["indexed"] += indexed
+            stats["failed"] += len(failures)
+            stats["failures"].extend(failures)
+            stats["bulk_time"] += bulk_time
+
+    with ThreadPoolExecutor(max_workers=thread_count, thread_name_prefix="ingest") as executor:
+        pending = set()
+        for actions_slice in _slices(actions, chunk_size):
+            if len(pending) >= thread_count * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(_ingest_slice, es, actions_slice, chunk_size, max_chunk_bytes, max_retries,
+                                        initial_backoff, max_backoff))
+        collect(wait(pending).done)
+
+    for failure in stats["failures"][:LOGGED_FAILURES]:
+        logger.error(f"Bulk item failed: {failure}")
+    if stats["failed"] > 0:
+        logger.error(f"{stats['failed']} documents failed to index, {stats['indexed']} succeeded.")
+
+    return stats
+
+
+@contextmanager
+def bulk_indexing_settings(es: Elasticsearch, index_name: str):
+    """
+    Disable refreshes and replicas of an index for the duration of a full rebuild.
+
+    The previous `refresh_interval` and `number_of_replicas` are restored afterwards,
+    even if indexing fails, and the index is refreshed so the new documents are searchable.
+
+    Args:
+        es (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the index being rebuilt.
+    """
+    resp = es.indices.get_settings(index=index_name, flat_settings=True)
+    previous = next(iter(resp.values()))["settings"]
+
+    es.indices.put_settings(index=index_name, settings={"index.refresh_interval": "-1",
+                                                        "index.number_of_replicas": 0})
+    logger.info(f"Disabled refreshes and replicas of {index_name} for bulk indexing.")
+    try:
+        yield
+    finally:
+        es.indices.put_settings(index=index_name,
+                                settings={"index.refresh_interval": previous.get("index.refresh_interval"),
+                                          "index.number_of_replicas": previous.get("index.number_of_replicas")})
+        es.indices.refresh(index=index_name)
+        logger.info(f"Restored refresh and replica settings of {index_name}.")
@@ -0,0 +1,319 @@
+import math
+import re
+import time
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+from .artifact import load_artifact
+from .reader import read_jsonl, manual_mapping_document, file_digest, MANUAL_MAPPING_FIELDS
+
+# Lucene's BM25 defaults, as used by Elasticsearch
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def stem(token: str) -> str:
+    """
+    Strip common English inflections from a token.
+
+    A light approximation of the snowball filter in `es_configs/manual_mapping/settings.json`;
+    queries and documents go through the same function, so matching stays consistent.
+
+    Args:
+        token (str): A lowercased token.
+
+    Returns:
+        str: The stemmed token.
+    """
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith(("xes", "zes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def analyze(text: str):
+    """
+    Tokenize text like the `name_search` analyzer: lowercase, ascii folding and stemming.
+
+    Args:
+        text (str): The text to analyze.
+
+    Returns:
+        List[str]: The analyzed tokens.
+    """
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return [stem(token) for token in TOKEN_PATTERN.findall(folded)]
+
+
+def l2_normalize(matrix):
+    """
+    Scale each row of a matrix to unit length, as float32.
+
+    Args:
+        matrix (np.ndarray): A 1-d vector or a 2-d matrix.
+
+    Returns:
+        np.ndarray: The normalized float32 vector or matrix.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class BM25Index:
+    """
+    In-memory inverted index scoring the `name` field with Lucene's BM25 formula.
+    """
+
+    def __init__(self, texts):
+        """
+        Args:
+            texts (List[str]): The indexed text of each document, in document order.
+        """
+        self.num_docs = len(texts)
+        self.postings = defaultdict(list)
+        self.doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+
+        for doc_id, text in enumerate(texts):
+            tokens = analyze(text)
+            self.doc_lengths[doc_id] = len(tokens)
+            frequencies = defaultdict(int)
+            for token in tokens:
+                frequencies[token] += 1
+            for token, frequency in frequencies.items():
+                self.postings[token].append((doc_id, frequency))
+
+        self.avg_doc_length = float(self.doc_lengths.mean()) if self.num_docs else 0.0
+
+    def score(self, text: str) -> dict:
+        """
+        Score all documents matching any token of `text`, like an Elasticsearch `match` query.
+
+        Args:
+            text (str): The query text.
+
+        Returns:
+            dict: Mapping of document id to BM25 score.
+        """
+        scores = defaultdict(float)
+        for token in analyze(text):
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + (self.num_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[doc_id] / self.avg_doc_length)
+                scores[doc_id] += idf * frequency / (frequency + norm)
+        return scores
+
+
+class LocalIndices:
+    """
+    The subset of `client.indices` used by the serving path.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_mapping(self, index: str) -> dict:
+        return {index: {"mappings": {"_meta": {"generation": self.engine.generation}}}}
+
+
+class LocalSearchEngine:
+    """
+    Exact, in-process replacement for Elasticsearch over the manual mapping.
+
+    The manual mapping is small enough to keep its L2-normalized embedding matrix in
+    memory, so k-NN is a single matrix-vector product and BM25 runs on a local
+    inverted index. The class answers `search` and `msearch` with Elasticsearch-shaped
+    responses, so it can be passed to `search_ops` wherever a client is expected.
+    Hybrid scores follow Elasticsearch: BM25 score plus `(1 + cosine) / 2` for the
+    top-k vector hits.
+    """
+
+    def __init__(self, documents, embeddings, generation: str = None, normalized: bool = False):
+        """
+        Args:
+            documents (List[dict]): Document sources, in the same order as `embeddings`.
+            embeddings (np.ndarray): Embedding matrix with one row per document.
+            generation (str, optional): Identifier of the loaded data, reported as index generation.
+            normalized (bool): Whether `embeddings` are already L2-normalized float32. They are then
+                               used as given, which keeps a memory-mapped matrix shared.
+        """
+        self.documents = documents
+        self.embeddings = embeddings if normalized else l2_normalize(embeddings)
+        self.bm25 = BM25Index([document["name"] for document in documents])
+        self.generation = generation
+        self.indices = LocalIndices(self)
+
+    @classmethod
+    def from_file(cls, fpath: str, model, batch_size: int = 64):
+        """
+        Load the manual mapping JSONL and encode its names with `model`.
+
+        Args:
+            fpath (str): Path to the manual mapping JSONL file.
+            model: The model used to encode document names.
+            batch_size (int): Number of names encoded per forward pass.
+
+        Returns:
+            LocalSearchEngine: The loaded engine.
+        """
+        rows = read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS)
+        documents = [manual_mapping_document(row) for row in rows]
+        embeddings = model.encode([document["name"] for document in documents], batch_size=batch_size)
+        return cls(documents, embeddings, generation=f"local-{file_digest(fpath)}")
+
+    @classmethod
+    def from_artifact(cls, path: str, model_name: str = None):
+        """
+        Load a precomputed embedding artifact written by the indexer, without encoding anything.
+
+        Args:
+            path (str): Artifact directory.
+            model_name (str, optional): Expected model name of the artifact.
+
+        Returns:
+            LocalSearchEngine: The loaded engine, sharing the memory-mapped embedding matrix.
+        """
+        documents, embeddings, manifest = load_artifact(path, model_name=model_name)
+        return cls(documents, embeddings, generation=manifest["generation"], normalized=True)
+
+    def _knn(self, knn: dict) -> dict:
+        query_vector = l2_normalize(knn["query_vector"])
+        similarities = self.embeddings @ query_vector
+        k = min(knn.get("k", 10), len(similarities))
+        if k == 0:
+            return {}
+        top = np.argpartition(-similarities, k - 1)[:k]
+        return {int(doc_id): (1.0 + float(similarities[doc_id])) / 2.0 for doc_id in top}
+
+    def _source(self, doc_id: int, source):
+        document = self.documents[doc_id]
+        if source is None:
+            return dict(document)
+        return {field: document[field] for field in source if field in document}
+
+    def _collapse(self, ranked, field: str):
+        best, seen = [], set()
+        for doc_id, score in ranked:
+            value = self.documents[doc_id][field]
+            if value not in seen:
+                seen.add(value)
+                best.append((doc_id, score))
+        return best
+
+    def search(self, index=None, query=None, knn=None, source=None, size=10, collapse=None, **kwargs) -> dict:
+        """
+        Run a BM25 `match` query, a k-NN query or both, summing their scores.
+
+        Args:
+            index (str, optional): Reported back in the hits; there is only one local index.
+            query (dict, optional): A `{"match": {"name": text}}` query.
+            knn (dict, optional): A k-NN clause with `query_vector` and `k`.
+            source (List[str], optional): Fields to return in `_source`.
+            size (int): Number of hits to return.
+            collapse (dict, optional): A `{"field": name}` clause; only the best hit per value of the field is kept.
+
+        Returns:
+            dict: An Elasticsearch-shaped search response.
+        """
+        start = time.perf_counter()
+        scores = defaultdict(float)
+
+        if query is not None:
+            if list(query) != ["match"] or list(query["match"]) != ["name"]:
+                raise ValueError(f"Unsupported query for the local search engine: {query}")
+            for doc_id, score in self.bm25.score(query["match"]["name"]).items():
+                scores[doc_id] += score
+
+        if knn is not None:
+            for doc_id, score in self._knn(knn).items():
+                scores[doc_id] += score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        if collapse is not None:
+            ranked = self._collapse(ranked, collapse["field"])
+        ranked = ranked[:size]
+        hits = [{"_index": index,
+                 "_id": str(doc_id),
+                 "_score": float(score),
+                 "_source": self._source(doc_id, source)} for doc_id, score in ranked]
+
+        return {
+            "took": int((time.perf_counter() - start) * 1000),
+            "timed_out": False,
+            "hits": {
+                "total": {"value": len(scores), "relation": "eq"},
+                "max_score": hits[0]["_score"] if hits else None,
+                "hits": hits
+            }
+        }
+
+    def msearch(self, searches, **kwargs) -> dict:
+        """
+        Run several searches given as alternating header and body entries.
+
+        Args:
+            searches (List[dict]): `_msearch` body, as built by `construct_msearch_body`.
+
+        Returns:
+            dict: An Elasticsearch-shaped `_msearch` response.
+        """
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            resp = self.search(index=header.get("index"),
+                               query=body.get("query"),
+                               knn=body.get("knn"),
+                               source=body.get("_source"),
+                               size=body.get("size", 10),
+                               collapse=body.get("collapse"))
+            resp["status"] = 200
+            responses.append(resp)
+        return {"took": sum(resp["took"] for resp in responses), "responses": responses}
+
+
+class AsyncLocalIndices:
+    """
+    Awaitable version of `LocalIndices`.
+    """
+
+    def __init__(self, indices):
+        self.indices = indices
+
+    async def get_mapping(self, index: str) -> dict:
+        return self.indices.get_mapping(index=index)
+
+
+class AsyncLocalSearchEngine:
+    """
+    Awaitable facade over `LocalSearchEngine` for the async serving path.
+
+    Local searches take well under a millisecond, so they run directly on the event loop.
+    """
+
+    def __init__(self, engine: LocalSearchEngine):
+        self.engine = engine
+        self.indices = AsyncLocalIndices(engine.indices)
+
+    async def search(self, **kwargs) -> dict:
+        return self.engine.search(**kwargs)
+
+    async def msearch(self, **kwargs) -> dict:
+        return self.engine.msearch(**kwargs)
+
+    async def close(self):
+        pass
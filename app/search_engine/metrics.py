@@ -0,0 +1,285 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Upper bounds in seconds of the latency histograms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the result count histogram
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Measurements of the request being served, see `RequestMetrics`
+_current = ContextVar("request_metrics", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """
+    Base class of the metrics, holding one value per combination of label values.
+    """
+    type = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        """
+        Args:
+            name (str): Metric name in the Prometheus text format.
+            documentation (str): Help text.
+            labelnames (Tuple[str]): Names of the labels, in the order values are passed.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        """
+        Render the metric in the Prometheus text exposition format.
+
+        Returns:
+            List[str]: The HELP, TYPE and sample lines.
+        """
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.extend(self._samples(labelvalues, value))
+        return lines
+
+    def _samples(self, labelvalues, value):
+        return [f"{self.name}{_labels(self.labelnames, labelvalues)} {value}"]
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count.
+    """
+    type = "counter"
+
+    def inc(self, *labelvalues, amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def set(self, *labelvalues, value: float):
+        """
+        Export a count kept elsewhere, e.g. by the caches, when the metrics are scraped.
+        """
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+    """
+    type = "gauge"
+
+    def set(self, *labelvalues, value: float):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    """
+    Counts of observations per bucket, with their sum and count.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Args:
+            buckets (Tuple[float]): Sorted upper bounds of the buckets; +Inf is added.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labelvalues, value: float):
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                # One count per bucket, then +Inf, then the sum of the observations
+                counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def _samples(self, labelvalues, counts):
+        samples, cumulative = [], 0
+        for bound, count in zip(self.buckets + ("+Inf",), counts):
+            cumulative += count
+            bucket = 'le="%s"' % bound
+            samples.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, bucket)} {cumulative}")
+        labels = _labels(self.labelnames, labelvalues)
+        samples.append(f"{self.name}_sum{labels} {counts[-1]}")
+        samples.append(f"{self.name}_count{labels} {cumulative}")
+        return samples
+
+
+REQUEST_SECONDS = Histogram("osm_tag_search_request_seconds", "Wall time of API requests.",
+                            ("endpoint", "status"))
+STAGE_SECONDS = Histogram("osm_tag_search_stage_seconds",
+                          "Time of a request spent per stage: encode, search (client round trip), "
+                          "engine (took reported by Elasticsearch) and parse.", ("endpoint", "stage"))
+RESULTS = Histogram("osm_tag_search_results", "Results returned per query.", ("endpoint",), buckets=COUNT_BUCKETS)
+NO_MATCH = Counter("osm_tag_search_no_match_total", "Queries for which no document matched.", ("endpoint",))
+BELOW_CONFIDENCE = Counter("osm_tag_search_below_confidence_total",
+                           "Hits dropped because their score was below the confidence threshold.", ("endpoint",))
+CACHE_LOOKUPS = Counter("osm_tag_search_cache_lookups_total", "Lookups of the in-process caches.", ("cache", "result"))
+CACHE_HIT_RATIO = Gauge("osm_tag_search_cache_hit_ratio", "Share of lookups answered by the in-process caches.",
+                        ("cache",))
+SINGLEFLIGHT_CALLS = Counter("osm_tag_search_singleflight_calls_total",
+                             "Lookups that ran (executed) or shared an identical lookup in flight (coalesced).",
+                             ("operation", "result"))
+
+METRICS = (REQUEST_SECONDS, STAGE_SECONDS, RESULTS, NO_MATCH, BELOW_CONFIDENCE, CACHE_LOOKUPS, CACHE_HIT_RATIO,
+           SINGLEFLIGHT_CALLS)
+
+
+class RequestMetrics:
+    """
+    Measurements of one request, collected by the search functions while it is served.
+
+    Stage times are summed, so a batch request reports the total time per stage. Outside a
+    request, e.g. in the indexing or validation scripts, nothing is collected.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.results = []
+        self.no_match = 0
+        self.below_confidence = 0
+
+    def server_timing(self, total: float) -> str:
+        """
+        Format the stage times as a `Server-Timing` header value, in milliseconds.
+
+        Args:
+            total (float): Wall time of the request in seconds.
+        """
+        entries = [f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items()]
+        return ", ".join(entries + [f"total;dur={total * 1000:.2f}"])
+
+    def observe(self, endpoint: str, status: int, total: float):
+        """
+        Record the measurements of the finished request in the metrics.
+
+        Args:
+            endpoint (str): Route of the request.
+            status (int): HTTP status code of the response.
+            total (float): Wall time of the request in seconds.
+        """
+        REQUEST_SECONDS.observe(endpoint, str(status), value=total)
+        for stage, seconds in self.stages.items():
+            STAGE_SECONDS.observe(endpoint, stage, value=seconds)
+        for count in self.results:
+            RESULTS.observe(endpoint, value=count)
+        if self.no_match:
+            NO_MATCH.inc(endpoint, amount=self.no_match)
+        if self.below_confidence:
+            BELOW_CONFIDENCE.inc(endpoint, amount=self.below_confidence)
+
+
+def start_request() -> RequestMetrics:
+    """
+    Collect the measurements of the search functions for the current request.
+
+    Returns:
+        RequestMetrics: The measurements, filled in while the request is served.
+    """
+    request_metrics = RequestMetrics()
+    _current.set(request_metrics)
+    return request_metrics
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Add the time spent in the block to a stage of the current request.
+
+    Args:
+        name (str): Stage name, e.g. "encode".
+    """
+    request_metrics = _current.get()
+    if request_metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        request_metrics.stages[name] = request_metrics.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def record_took(resp):
+    """
+    Add the processing time reported by Elasticsearch to the "engine" stage of the current request.
+
+    Args:
+        resp (dict): A search or `_msearch` response.
+    """
+    request_metrics = _current.get()
+    if request_metrics is not None and 'took' in resp:
+        request_metrics.stages["engine"] = request_metrics.stages.get("engine", 0.0) + resp['took'] / 1000
+
+
+def record_results(count: int, below_confidence: int = 0):
+    """
+    Count the results returned for one query of the current request.
+
+    Args:
+        count (int): Number of results returned.
+        below_confidence (int): Number of hits dropped for a score below the confidence.
+    """
+    request_metrics = _current.get()
+    if request_metrics is not None:
+        request_metrics.results.append(count)
+        request_metrics.no_match += count == 0 and below_confidence == 0
+        request_metrics.below_confidence += below_confidence
+
+
+def export_cache_stats(cache: str, stats: dict):
+    """
+    Export the counters of an in-process cache, as returned by its `stats`, to the cache metrics.
+
+    Args:
+        cache (str): Cache name, the `cache` label.
+        stats (dict): Counters with "hits", "misses" and optionally "disk_hits".
+    """
+    lookups = 0
+    for key, result in (("hits", "hit"), ("disk_hits", "disk_hit"), ("misses", "miss")):
+        if key in stats:
+            CACHE_LOOKUPS.set(cache, result, value=stats[key])
+            lookups += stats[key]
+    hits = stats["hits"] + stats.get("disk_hits", 0)
+    CACHE_HIT_RATIO.set(cache, value=hits / lookups if lookups else 0.0)
+
+
+def export_singleflight_stats(operation: str, stats: dict):
+    """
+    Export the counters of a `SingleFlight`, as returned by its `stats`, to the coalescing metrics.
+
+    Args:
+        operation (str): Lookup name, the `operation` label.
+        stats (dict): Counters with "calls" and "coalesced".
+    """
+    SINGLEFLIGHT_CALLS.set(operation, "executed", value=stats["calls"] - stats["coalesced"])
+    SINGLEFLIGHT_CALLS.set(operation, "coalesced", value=stats["coalesced"])
+
+
+def render_metrics() -> str:
+    """
+    Render all metrics in the Prometheus text exposition format.
+
+    Returns:
+        str: The metrics page.
+    """
+    return "\n".join(line for metric in METRICS for line in metric.render()) + "\n"
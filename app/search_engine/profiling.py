@@ -0,0 +1,116 @@
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from loguru import logger
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    # ';' separates the frames in the folded format; the count follows the last space
+    return f"{name} ({code.co_filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler of all threads of the process, one profile at a time.
+
+    The stacks of every thread are sampled at a fixed interval and counted, then returned in
+    the folded format read by flamegraph.pl, speedscope and most flame graph viewers: one
+    line per distinct stack, frames from the thread down to the leaf separated by ';',
+    followed by the number of samples. Nothing runs between profiles.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval: float = 0.005) -> str:
+        """
+        Sample the stacks of all threads for `seconds`; blocks until done.
+
+        Args:
+            seconds (float): Duration of the profile.
+            interval (float): Time between two samples in seconds.
+
+        Returns:
+            str: The folded stacks, most sampled first.
+
+        Raises:
+            RuntimeError: If a profile is already running.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            stacks = Counter()
+            own_thread = threading.get_ident()
+            deadline = time.monotonic() + seconds
+            samples = 0
+            while time.monotonic() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_label(frame))
+                        frame = frame.f_back
+                    stack.append(names.get(thread_id, str(thread_id)).replace(";", ":"))
+                    stacks[";".join(reversed(stack))] += 1
+                samples += 1
+                time.sleep(interval)
+        finally:
+            self._lock.release()
+
+        logger.info(f"Profiled {samples} samples over {seconds}s, {len(stacks)} distinct stacks.")
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class RequestTracer:
+    """
+    Logs the stage times of a random sample of requests and keeps the most recent ones.
+
+    Disabled with a sample rate of 0, when deciding costs a single comparison per request.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, max_traces: int = 1000):
+        """
+        Args:
+            sample_rate (float): Share of requests traced, between 0 and 1.
+            max_traces (int): Number of recent traces kept.
+        """
+        self.sample_rate = sample_rate
+        self.traces = deque(maxlen=max_traces)
+
+    def sampled(self) -> bool:
+        """
+        Decide whether to trace a request.
+        """
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def record(self, endpoint: str, query: str, status: int, total: float, stages: dict):
+        """
+        Log and keep the trace of a sampled request.
+
+        Args:
+            endpoint (str): Route of the request.
+            query (str): Query string of the request.
+            status (int): HTTP status code of the response.
+            total (float): Wall time of the request in seconds.
+            stages (dict): Seconds spent per stage, see `metrics.RequestMetrics`.
+        """
+        trace = {"timestamp": time.time(),
+                 "endpoint": endpoint,
+                 "query": query,
+                 "status": status,
+                 "total_ms": total * 1000,
+                 "stages_ms": {stage: seconds * 1000 for stage, seconds in stages.items()}}
+        self.traces.append(trace)
+        stages_ms = "".join(f", {stage} {ms:.2f}ms" for stage, ms in trace["stages_ms"].items())
+        logger.info(f"Trace {endpoint}?{query} {status}: total {trace['total_ms']:.2f}ms{stages_ms}")
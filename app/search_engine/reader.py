@@ -0,0 +1,126 @@
+import gzip
+import hashlib
+import io
+import json
+from itertools import islice
+
+from loguru import logger
+
+MANUAL_MAPPING_FIELDS = ("key", "imr", "cluster_id", "descriptors")
+
+
+def open_text(fpath: str):
+    """
+    Open a plain, gzip (`.gz`) or zstandard (`.zst`) compressed text file for streaming reads.
+
+    Args:
+        fpath (str): Path to the file.
+
+    Returns:
+        TextIO: A text stream over the decompressed content.
+
+    Raises:
+        ImportError: If the file is zstandard-compressed and `zstandard` is not installed.
+    """
+    if fpath.endswith(".gz"):
+        return gzip.open(fpath, 'rt', encoding='utf-8')
+    if fpath.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Reading .zst files requires the zstandard package (pip install zstandard)") from e
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(open(fpath, 'rb'), closefd=True),
+                                encoding='utf-8')
+    return open(fpath, 'r', encoding='utf-8')
+
+
+def read_jsonl(fpath: str, required_fields=(), skip_invalid: bool = False):
+    """
+    Lazily parse and validate a JSONL file, one row at a time.
+
+    Only the current line is held in memory, so files of any size can be processed.
+
+    Args:
+        fpath (str): Path to the JSONL file, optionally `.gz` or `.zst` compressed.
+        required_fields (Iterable[str]): Fields every row must contain.
+        skip_invalid (bool): Log and skip malformed rows instead of raising.
+
+    Yields:
+        dict: The parsed rows. Blank lines are skipped.
+
+    Raises:
+        ValueError: If a row is not valid JSON or misses a required field, unless `skip_invalid` is set.
+    """
+    with open_text(fpath) as json_file:
+        for line_no, line in enumerate(json_file, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                row = json.loads(line)
+                missing = [field for field in required_fields if field not in row]
+                if missing:
+                    raise ValueError(f"missing fields {missing}")
+            except ValueError as e:
+                if skip_invalid:
+                    logger.warning(f"Skipping invalid row {fpath}:{line_no}: {e}")
+                    continue
+                raise ValueError(f"Invalid row {fpath}:{line_no}: {e}") from e
+
+            yield row
+
+
+def read_batches(rows, size: int):
+    """
+    Group an iterable of rows into lists of at most `size` rows.
+
+    Args:
+        rows (Iterable): The rows, e.g. from `read_jsonl`.
+        size (int): Maximum number of rows per batch.
+
+    Yields:
+        list: Consecutive batches of rows.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def manual_mapping_document(row: dict) -> dict:
+    """
+    Build the indexed document of a manual mapping row.
+
+    Args:
+        row (dict): A row of the manual mapping JSONL.
+
+    Returns:
+        dict: The document, without embeddings.
+    """
+    name = row['key'].strip().lower()
+    return {
+        "name": name,
+        "imr": row['imr'],
+        "cluster_id": row['cluster_id'],
+        "description": name,
+        "descriptors": row['descriptors']
+    }
+
+
+def file_digest(fpath: str) -> str:
+    """
+    Compute the SHA-1 of a file in fixed-size chunks.
+
+    Args:
+        fpath (str): Path to the file.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha1()
+    with open(fpath, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+from .embedding_cache import normalize_query
+
+
+class ResultCache:
+    """
+    Caches complete `search_manual_mapping` responses in a bounded LRU.
+
+    Entries are keyed on (normalized word, limit, confidence, index name, search options) and on the
+    index generation that was current when they were stored. When the generation
+    changes, i.e. the index or its alias was rebuilt, the cache is emptied and
+    results computed against the old index can no longer be served.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        """
+        Args:
+            max_size (int): Maximum number of responses kept in memory.
+        """
+        self.max_size = max_size
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, word: str, limit: int, confidence: float, index_name: str, options: dict):
+        return normalize_query(word), limit, confidence, index_name, tuple(sorted(options.items())), self.generation
+
+    def get(self, word: str, limit: int, confidence: float, index_name: str, **options):
+        """
+        Look up a cached response.
+
+        Args:
+            **options: Further search options the results depend on, e.g. `collapse`.
+
+        Returns:
+            List[dict] or None: The cached results, or None on a miss.
+        """
+        key = self._key(word, limit, confidence, index_name, options)
+        with self._lock:
+            results = self._entries.get(key)
+            if results is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def set(self, word: str, limit: int, confidence: float, index_name: str, results, generation=None, **options):
+        """
+        Store a response.
+
+        Args:
+            generation (str, optional): Generation the results were computed against. If it is
+                                        no longer current, the results are not stored.
+            **options: Further search options the results depend on, as passed to `get`.
+        """
+        if generation is not None and generation != self.generation:
+            return
+
+        key = self._key(word, limit, confidence, index_name, options)
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def set_generation(self, generation: str) -> bool:
+        """
+        Record the current index generation, dropping every entry if it changed.
+
+        Args:
+            generation (str): The generation read from the index mapping.
+
+        Returns:
+            bool: True if the generation changed.
+        """
+        with self._lock:
+            if generation == self.generation:
+                return False
+            self.generation = generation
+            self._entries.clear()
+            self.invalidations += 1
+            return True
+
+    def stats(self) -> dict:
+        """
+        Report cache counters.
+
+        Returns:
+            dict: Hit/miss counters, hit ratio, invalidations and current size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "max_size": self.max_size
+            }
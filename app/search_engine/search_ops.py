@@ -1,3 +1,8 @@
+import asyncio
+
+from .metrics import stage, record_took, record_results
+
+
 def construct_bm25_query(query):
     """
     Construct a BM25 full-text search query on the 'name' field.
@@ -11,12 +16,14 @@ def construct_bm25_query(query):
     return {"match": {"name": query}}
 
 
-def construct_knn_query(query_vector):
+def construct_knn_query(query_vector, k=10, num_candidates=100):
     """
     Construct a k-NN (vector similarity) search query.
 
     Args:
         query_vector (List[float]): The embedding vector for the input query.
+        k (int): Number of nearest neighbours to return.
+        num_candidates (int): Number of candidates considered per shard.
 
     Returns:
         dict: A k-NN query compatible with Elasticsearch's approximate vector search.
@@ -24,39 +31,213 @@ def construct_knn_query(query_vector):
     return {
         "field": "embeddings",
         "query_vector": query_vector,
-        "k": 10,
-        "num_candidates": 100
+        "k": k,
+        "num_candidates": num_candidates
     }
 
 
-def search_manual_mapping(word, client, model, index_name, confidence=0.5, limit=1):
+MANUAL_MAPPING_SOURCE = ["imr", "name", "cluster_id", "descriptors"]
+
+# Field results are collapsed on, so that every returned result is a distinct tag bundle
+COLLAPSE_FIELD = "cluster_id"
+
+# k-NN neighbours fetched per requested cluster when collapsing; manual mapping clusters have
+# about six descriptors on average, so the neighbours of one query often share a cluster
+CLUSTER_FANOUT = 8
+
+# Upper bound of `num_candidates` accepted by Elasticsearch
+MAX_NUM_CANDIDATES = 10000
+
+
+def knn_parameters(limit, collapse=False, k=None, num_candidates=None):
     """
-    Search for a manual mapping of an OSM tag using both BM25 and k-NN search.
+    Derive `k` and `num_candidates` of the k-NN clause from the number of requested results.
 
     Args:
-        word (str): The search query.
-        client (Elasticsearch): Elasticsearch client instance.
-        model: The model used to encode the query into a vector.
-        index_name (str): Name of the Elasticsearch index.
-        confidence (float): Minimum acceptable score for returned results.
         limit (int): Maximum number of results to return.
+        collapse (bool): Whether results are collapsed on `COLLAPSE_FIELD`.
+        k (int, optional): Explicit number of nearest neighbours, used instead of the derived one.
+        num_candidates (int, optional): Explicit number of candidates, used instead of the derived one.
 
     Returns:
-        List[dict]: A list of matching OSM tag documents, each containing 'imr', 'name', and 'score'.
+        Tuple[int, int]: `k` and `num_candidates`.
+    """
+    k = k or max(10, limit * CLUSTER_FANOUT if collapse else limit)
+    num_candidates = num_candidates or max(100, 10 * k)
+    num_candidates = min(max(num_candidates, k), MAX_NUM_CANDIDATES)
+    return min(k, num_candidates), num_candidates
 
-    Notes:
-        Combines semantic vector search and keyword match using hybrid search.
+
+def construct_hybrid_search(word, query_vector, limit=10, collapse=False, k=None, num_candidates=None):
+    """
+    Construct the body of a hybrid (BM25 + k-NN) search request.
+
+    Args:
+        word (str): The input search term.
+        query_vector (List[float]): The embedding vector for the input query.
+        limit (int): Maximum number of hits to return.
+        collapse (bool): Return only the best hit of each cluster.
+        k (int, optional): Number of nearest neighbours; derived from `limit` if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        dict: A search body usable on its own or as an `_msearch` sub-request.
+    """
+    k, num_candidates = knn_parameters(limit, collapse=collapse, k=k, num_candidates=num_candidates)
+    body = {
+        "query": construct_bm25_query(query=word),
+        "knn": construct_knn_query(query_vector, k=k, num_candidates=num_candidates),
+        "_source": MANUAL_MAPPING_SOURCE,
+        "size": limit
+    }
+    if collapse:
+        body["collapse"] = {"field": COLLAPSE_FIELD}
+    return body
+
+
+# Ranking strategies of the manual mapping search:
+#   sum      - Elasticsearch adds the raw BM25 score to the k-NN score (unbounded, the original behaviour)
+#   rrf      - reciprocal rank fusion of a BM25 and a k-NN search, scaled to [0, 1]
+#   weighted - weighted sum of the saturated BM25 score and the k-NN score, in [0, 1]
+#   knn      - the k-NN score alone, (1 + cosine) / 2, in [0, 1]
+RANKING_STRATEGIES = ("sum", "rrf", "weighted", "knn")
+
+# Rank constant of reciprocal rank fusion; larger values flatten the contribution of top ranks
+RRF_RANK_CONSTANT = 60
+
+# Share of the k-NN score in the weighted strategy; the rest is the saturated BM25 score
+KNN_WEIGHT = 0.7
+
+# BM25 score that the weighted strategy maps to 0.5, through score / (score + BM25_PIVOT)
+BM25_PIVOT = 5.0
+
+
+def construct_ranked_searches(word, query_vector, limit=10, collapse=False, ranking="sum", k=None,
+                              num_candidates=None):
+    """
+    Construct the search bodies a ranking strategy needs for one word.
+
+    Args:
+        word (str): The input search term.
+        query_vector (List[float]): The embedding vector for the input query.
+        limit (int): Maximum number of hits to return.
+        collapse (bool): Return only the best hit of each cluster.
+        ranking (str): One of `RANKING_STRATEGIES`.
+        k (int, optional): Number of nearest neighbours; derived from `limit` if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[dict]: One search body for `sum` and `knn`, a BM25 and a k-NN body for the fused strategies.
+
+    Raises:
+        ValueError: If the ranking strategy is unknown.
+    """
+    if ranking not in RANKING_STRATEGIES:
+        raise ValueError(f"Invalid ranking strategy {ranking}, expected one of {RANKING_STRATEGIES}")
+
+    hybrid = construct_hybrid_search(word, query_vector, limit=limit, collapse=collapse, k=k,
+                                     num_candidates=num_candidates)
+    if ranking == "sum":
+        return [hybrid]
+
+    # Fused strategies rank the whole k-NN window of both searches before cutting to `limit`
+    window = limit if ranking == "knn" else max(limit, hybrid["knn"]["k"])
+    bodies = [{"knn": hybrid["knn"], "_source": MANUAL_MAPPING_SOURCE, "size": window}]
+    if ranking != "knn":
+        bodies.insert(0, {"query": hybrid["query"], "_source": MANUAL_MAPPING_SOURCE, "size": window})
+    if collapse:
+        for body in bodies:
+            body["collapse"] = hybrid["collapse"]
+    return bodies
+
+
+def fuse_responses(responses, ranking="sum", limit=10, collapse=False, rank_constant=RRF_RANK_CONSTANT,
+                   knn_weight=KNN_WEIGHT, bm25_pivot=BM25_PIVOT):
+    """
+    Combine the responses to `construct_ranked_searches` into one search response.
+
+    Args:
+        responses (List[dict]): The search responses, in the order of the search bodies.
+        ranking (str): The ranking strategy the bodies were built for.
+        limit (int): Maximum number of hits to keep.
+        collapse (bool): Keep only the best hit of each cluster after fusion.
+        rank_constant (int): Rank constant of the `rrf` strategy.
+        knn_weight (float): Share of the k-NN score in the `weighted` strategy.
+        bm25_pivot (float): BM25 score mapped to 0.5 by the `weighted` strategy.
+
+    Returns:
+        dict: An Elasticsearch-shaped response whose `_score` is the fused score.
     """
-    query_vector = model.encode(word)
-    resp = client.search(index=index_name,
-                         query=construct_bm25_query(query=word),
-                         knn=construct_knn_query(query_vector),
-                         source=["imr", "name", "cluster_id", "descriptors"],
-                         request_timeout=30)
+    if len(responses) == 1:
+        return responses[0]
+
+    bm25_resp, knn_resp = responses
+    scores, hits = {}, {}
+    for resp, is_knn in ((bm25_resp, False), (knn_resp, True)):
+        for rank, hit in enumerate(resp['hits']['hits'], start=1):
+            hits.setdefault(hit['_id'], hit)
+            if ranking == "rrf":
+                score = 1.0 / (rank_constant + rank)
+            elif is_knn:
+                score = knn_weight * hit['_score']
+            else:
+                score = (1.0 - knn_weight) * hit['_score'] / (hit['_score'] + bm25_pivot)
+            scores[hit['_id']] = scores.get(hit['_id'], 0.0) + score
+
+    # A document ranked first by both searches scores 1
+    scale = (rank_constant + 1) / 2.0 if ranking == "rrf" else 1.0
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
 
+    fused, clusters = [], set()
+    for doc_id, score in ranked:
+        if collapse:
+            cluster_id = hits[doc_id]['_source'][COLLAPSE_FIELD]
+            if cluster_id in clusters:
+                continue
+            clusters.add(cluster_id)
+        fused.append(dict(hits[doc_id], _score=score * scale))
+        if len(fused) == limit:
+            break
+
+    return {"hits": {"total": {"value": len(scores), "relation": "eq"},
+                     "max_score": fused[0]['_score'] if fused else None,
+                     "hits": fused}}
+
+
+def search_arguments(body):
+    """
+    Turn a search body into keyword arguments of `client.search`.
+
+    Args:
+        body (dict): A body built by `construct_ranked_searches`.
+
+    Returns:
+        dict: The `query`, `knn`, `source`, `size` and `collapse` arguments.
+    """
+    return {"query": body.get("query"),
+            "knn": body.get("knn"),
+            "source": body["_source"],
+            "size": body["size"],
+            "collapse": body.get("collapse")}
+
+
+def parse_manual_mapping_response(resp, confidence, limit, collapse=False):
+    """
+    Turn a hybrid search response into the manual mapping result schema.
+
+    Args:
+        resp (dict): Elasticsearch search response (or one `_msearch` response).
+        confidence (float): Minimum acceptable score for returned results.
+        limit (int): Maximum number of results to return.
+        collapse (bool): Whether the search was collapsed on `COLLAPSE_FIELD`; the descriptor
+                         that matched best is then also returned as 'matched_descriptor'.
+
+    Returns:
+        List[dict]: A list of matching OSM tag documents, each containing 'imr', 'name', and 'score'.
+    """
     num_docs = resp['hits']['total']['value']
     if num_docs == 0:
-        print("No document is matched")
+        record_results(0)
         return []
 
     else:
@@ -68,42 +249,404 @@ def search_manual_mapping(word, client, model, index_name, confidence=0.5, limit
             if result['_score'] < confidence:
                 continue
 
-            search_results.append({
+            search_result = {
                 'imr': result['_source']['imr'],
                 'cluster_id': result['_source']['cluster_id'],
                 "name": result['_source']['name'],
                 "score": result['_score'],
                 'descriptors': result['_source']['descriptors']
-            })
+            }
+            if collapse:
+                search_result['matched_descriptor'] = result['_source']['name']
+            search_results.append(search_result)
 
+        record_results(len(search_results), below_confidence=len(results) - len(search_results))
         return search_results
 
-def search_color_mapping(word, client, index_name, limit=1):
+
+def construct_msearch_body(words, query_vectors, index_name, limits=None, collapse=False, ranking="sum", k=None,
+                           num_candidates=None):
     """
-    Search for color descriptor mappings in the color index using BM25.
+    Construct an `_msearch` body with the sub-requests of every word.
 
     Args:
-        word (str): The input color descriptor to search for.
+        words (List[str]): The search queries.
+        query_vectors (List[List[float]]): The embedding vectors, aligned with `words`.
+        index_name (str): Name of the Elasticsearch index.
+        limits (List[int], optional): Maximum number of hits per word. Defaults to 10 each.
+        collapse (bool): Return only the best hit of each cluster.
+        ranking (str): One of `RANKING_STRATEGIES`; fused strategies send two sub-requests per word.
+        k (int, optional): Number of nearest neighbours; derived from each limit if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[dict]: Alternating header and body entries for `client.msearch(searches=...)`.
+    """
+    searches = []
+    for word, query_vector, limit in zip(words, query_vectors, limits or [10] * len(words)):
+        for body in construct_ranked_searches(word, query_vector, limit=limit, collapse=collapse, ranking=ranking,
+                                              k=k, num_candidates=num_candidates):
+            searches.append({"index": index_name})
+            searches.append(body)
+    return searches
+
+
+def parse_msearch_response(resp, words, limits, confidence, collapse=False, ranking="sum"):
+    """
+    Split an `_msearch` response into one manual mapping result list per word.
+
+    Args:
+        resp (dict): Elasticsearch `_msearch` response.
+        words (List[str]): The search queries, in request order.
+        limits (List[int]): Maximum number of results to return, one per word.
+        confidence (float): Minimum acceptable score for returned results.
+        collapse (bool): Whether the searches were collapsed on `COLLAPSE_FIELD`.
+        ranking (str): The ranking strategy the searches were built for.
+
+    Returns:
+        List[List[dict]]: One result list per word, in input order.
+
+    Raises:
+        RuntimeError: If Elasticsearch reports an error for one of the sub-requests.
+    """
+    per_word = 2 if ranking in ("rrf", "weighted") else 1
+    responses = resp['responses']
+
+    search_results = []
+    for idx, (word, limit) in enumerate(zip(words, limits)):
+        sub_resps = responses[idx * per_word:(idx + 1) * per_word]
+        for sub_resp in sub_resps:
+            if 'error' in sub_resp:
+                raise RuntimeError(f"Search for '{word}' failed: {sub_resp['error']}")
+        fused = fuse_responses(sub_resps, ranking=ranking, limit=limit, collapse=collapse)
+        search_results.append(parse_manual_mapping_response(fused, confidence=confidence, limit=limit,
+                                                            collapse=collapse))
+    return search_results
+
+
+def search_manual_mapping(word, client, model, index_name, confidence=0.5, limit=1, collapse=False, ranking="sum",
+                          k=None, num_candidates=None):
+    """
+    Search for a manual mapping of an OSM tag using both BM25 and k-NN search.
+
+    Args:
+        word (str): The search query.
         client (Elasticsearch): Elasticsearch client instance.
-        index_name (str): Name of the color mapping index.
-        limit (int): Number of results to return (default is 1).
+        model: The model used to encode the query into a vector.
+        index_name (str): Name of the Elasticsearch index.
+        confidence (float): Minimum acceptable score for returned results.
+        limit (int): Maximum number of results to return.
+        collapse (bool): Return at most one result per cluster, so `limit` results are distinct tag bundles.
+        ranking (str): One of `RANKING_STRATEGIES`. Scores, and hence `confidence`, are bounded to
+                       [0, 1] for every strategy but `sum`.
+        k (int, optional): Number of nearest neighbours; derived from `limit` if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[dict]: A list of matching OSM tag documents, each containing 'imr', 'name', and 'score'.
+
+    Notes:
+        Combines semantic vector search and keyword match using hybrid search.
+    """
+    with stage("encode"):
+        query_vector = model.encode(word)
+    bodies = construct_ranked_searches(word, query_vector, limit=limit, collapse=collapse, ranking=ranking, k=k,
+                                       num_candidates=num_candidates)
+    if len(bodies) == 1:
+        with stage("search"):
+            resp = client.search(index=index_name, **search_arguments(bodies[0]), request_timeout=30)
+        record_took(resp)
+    else:
+        with stage("search"):
+            resp = client.msearch(searches=[entry for body in bodies for entry in ({"index": index_name}, body)],
+                                  request_timeout=30)
+        record_took(resp)
+        with stage("parse"):
+            return parse_msearch_response(resp, words=[word], limits=[limit], confidence=confidence,
+                                          collapse=collapse, ranking=ranking)[0]
+
+    with stage("parse"):
+        return parse_manual_mapping_response(resp, confidence=confidence, limit=limit, collapse=collapse)
+
+
+def search_manual_mapping_batch(words, limits, client, model, index_name, confidence=0.5, collapse=False,
+                                ranking="sum", k=None, num_candidates=None):
+    """
+    Search manual mappings for many words with one encode call and one `_msearch`.
+
+    Args:
+        words (List[str]): The search queries.
+        limits (List[int]): Maximum number of results to return, one per word.
+        client (Elasticsearch): Elasticsearch client instance.
+        model: The model used to encode the queries into vectors.
+        index_name (str): Name of the Elasticsearch index.
+        confidence (float): Minimum acceptable score for returned results.
+        collapse (bool): Return at most one result per cluster for every word.
+        ranking (str): One of `RANKING_STRATEGIES`.
+        k (int, optional): Number of nearest neighbours; derived from each limit if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[List[dict]]: One result list per word, in input order, each identical in
+                          shape to the output of `search_manual_mapping`.
+
+    Raises:
+        RuntimeError: If Elasticsearch reports an error for one of the sub-requests.
+    """
+    if len(words) == 0:
+        return []
+
+    with stage("encode"):
+        query_vectors = model.encode(words)
+
+    searches = construct_msearch_body(words, query_vectors, index_name, limits=limits, collapse=collapse,
+                                      ranking=ranking, k=k, num_candidates=num_candidates)
+    with stage("search"):
+        resp = client.msearch(searches=searches, request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_msearch_response(resp, words=words, limits=limits, confidence=confidence, collapse=collapse,
+                                      ranking=ranking)
+
+def parse_color_mapping_response(resp, limit):
+    """
+    Turn a color search response into the color mapping result schema.
+
+    Args:
+        resp (dict): Elasticsearch search response.
+        limit (int): Number of results to consider.
 
     Returns:
         dict or None: A dictionary with the matched 'name' and its corresponding 'color_values',
                       or None if no match is found.
     """
-    resp = client.search(index=index_name,
-                         query=construct_bm25_query(query=word),
-                         source=["name", "color_values"],
-                         request_timeout=30)
-
     num_docs = resp['hits']['total']['value']
     if num_docs == 0:
-        print("No document is matched")
+        record_results(0)
         return None
     else:
+        record_results(1)
         result = resp['hits']['hits'][:limit][0]
         return {
             "name":  result['_source']['name'],
             "color_values": result['_source']["color_values"],
-        }
\ No newline at end of file
+        }
+
+
+def search_color_mapping(word, client, index_name, limit=1):
+    """
+    Search for color descriptor mappings in the color index using BM25.
+
+    Args:
+        word (str): The input color descriptor to search for.
+        client (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the color mapping index.
+        limit (int): Number of results to return (default is 1).
+
+    Returns:
+        dict or None: A dictionary with the matched 'name' and its corresponding 'color_values',
+                      or None if no match is found.
+    """
+    with stage("search"):
+        resp = client.search(index=index_name,
+                             query=construct_bm25_query(query=word),
+                             source=["name", "color_values"],
+                             request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_color_mapping_response(resp, limit=limit)
+
+
+def construct_color_msearch_body(words, index_name):
+    """
+    Construct an `_msearch` body with one color lookup per word.
+
+    Args:
+        words (List[str]): The color descriptors.
+        index_name (str): Name of the color mapping index.
+
+    Returns:
+        List[dict]: Alternating header and body entries for `client.msearch(searches=...)`.
+    """
+    searches = []
+    for word in words:
+        searches.append({"index": index_name})
+        searches.append({"query": construct_bm25_query(query=word), "_source": ["name", "color_values"], "size": 1})
+    return searches
+
+
+def parse_color_msearch_response(resp, words):
+    """
+    Split an `_msearch` response into one color mapping result per word.
+
+    Args:
+        resp (dict): Elasticsearch `_msearch` response.
+        words (List[str]): The color descriptors, in request order.
+
+    Returns:
+        List[dict or None]: Same as `search_color_mapping`, one per word.
+
+    Raises:
+        RuntimeError: If Elasticsearch reports an error for one of the sub-requests.
+    """
+    search_results = []
+    for word, sub_resp in zip(words, resp['responses']):
+        if 'error' in sub_resp:
+            raise RuntimeError(f"Color search for '{word}' failed: {sub_resp['error']}")
+        search_results.append(parse_color_mapping_response(sub_resp, limit=1))
+    return search_results
+
+
+def search_color_mapping_batch(words, client, index_name):
+    """
+    Search the color index for many color descriptors with one `_msearch`.
+
+    Args:
+        words (List[str]): The color descriptors to search for.
+        client (Elasticsearch): Elasticsearch client instance.
+        index_name (str): Name of the color mapping index.
+
+    Returns:
+        List[dict or None]: Same as `search_color_mapping`, one per word, in input order.
+    """
+    if len(words) == 0:
+        return []
+
+    with stage("search"):
+        resp = client.msearch(searches=construct_color_msearch_body(words, index_name), request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_color_msearch_response(resp, words=words)
+
+
+async def async_search_manual_mapping(word, client, model, index_name, executor=None, confidence=0.5, limit=1,
+                                      collapse=False, ranking="sum", k=None, num_candidates=None):
+    """
+    Awaitable version of `search_manual_mapping`.
+
+    Args:
+        word (str): The search query.
+        client (AsyncElasticsearch): Non-blocking Elasticsearch client instance.
+        model: The model used to encode the query into a vector.
+        index_name (str): Name of the Elasticsearch index.
+        executor (Executor, optional): Executor running `model.encode`. Defaults to the loop's default executor.
+        confidence (float): Minimum acceptable score for returned results.
+        limit (int): Maximum number of results to return.
+        collapse (bool): Return at most one result per cluster.
+        ranking (str): One of `RANKING_STRATEGIES`.
+        k (int, optional): Number of nearest neighbours; derived from `limit` if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[dict]: Same as `search_manual_mapping`.
+    """
+    loop = asyncio.get_running_loop()
+    with stage("encode"):
+        query_vector = await loop.run_in_executor(executor, model.encode, word)
+    bodies = construct_ranked_searches(word, query_vector, limit=limit, collapse=collapse, ranking=ranking, k=k,
+                                       num_candidates=num_candidates)
+    if len(bodies) == 1:
+        with stage("search"):
+            resp = await client.search(index=index_name, **search_arguments(bodies[0]), request_timeout=30)
+        record_took(resp)
+    else:
+        with stage("search"):
+            resp = await client.msearch(searches=[entry for body in bodies for entry in ({"index": index_name}, body)],
+                                        request_timeout=30)
+        record_took(resp)
+        with stage("parse"):
+            return parse_msearch_response(resp, words=[word], limits=[limit], confidence=confidence,
+                                          collapse=collapse, ranking=ranking)[0]
+
+    with stage("parse"):
+        return parse_manual_mapping_response(resp, confidence=confidence, limit=limit, collapse=collapse)
+
+
+async def async_search_manual_mapping_batch(words, limits, client, model, index_name, executor=None,
+                                            confidence=0.5, collapse=False, ranking="sum", k=None,
+                                            num_candidates=None):
+    """
+    Awaitable version of `search_manual_mapping_batch`.
+
+    Args:
+        words (List[str]): The search queries.
+        limits (List[int]): Maximum number of results to return, one per word.
+        client (AsyncElasticsearch): Non-blocking Elasticsearch client instance.
+        model: The model used to encode the queries into vectors.
+        index_name (str): Name of the Elasticsearch index.
+        executor (Executor, optional): Executor running `model.encode`. Defaults to the loop's default executor.
+        confidence (float): Minimum acceptable score for returned results.
+        collapse (bool): Return at most one result per cluster for every word.
+        ranking (str): One of `RANKING_STRATEGIES`.
+        k (int, optional): Number of nearest neighbours; derived from each limit if None.
+        num_candidates (int, optional): k-NN candidates per shard; derived from `k` if None.
+
+    Returns:
+        List[List[dict]]: Same as `search_manual_mapping_batch`.
+    """
+    if len(words) == 0:
+        return []
+
+    loop = asyncio.get_running_loop()
+    with stage("encode"):
+        query_vectors = await loop.run_in_executor(executor, model.encode, words)
+
+    searches = construct_msearch_body(words, query_vectors, index_name, limits=limits, collapse=collapse,
+                                      ranking=ranking, k=k, num_candidates=num_candidates)
+    with stage("search"):
+        resp = await client.msearch(searches=searches, request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_msearch_response(resp, words=words, limits=limits, confidence=confidence, collapse=collapse,
+                                      ranking=ranking)
+
+
+async def async_search_color_mapping(word, client, index_name, limit=1):
+    """
+    Awaitable version of `search_color_mapping`.
+
+    Args:
+        word (str): The input color descriptor to search for.
+        client (AsyncElasticsearch): Non-blocking Elasticsearch client instance.
+        index_name (str): Name of the color mapping index.
+        limit (int): Number of results to return (default is 1).
+
+    Returns:
+        dict or None: Same as `search_color_mapping`.
+    """
+    with stage("search"):
+        resp = await client.search(index=index_name,
+                                   query=construct_bm25_query(query=word),
+                                   source=["name", "color_values"],
+                                   request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_color_mapping_response(resp, limit=limit)
+
+
+async def async_search_color_mapping_batch(words, client, index_name):
+    """
+    Awaitable version of `search_color_mapping_batch`.
+
+    Args:
+        words (List[str]): The color descriptors to search for.
+        client (AsyncElasticsearch): Non-blocking Elasticsearch client instance.
+        index_name (str): Name of the color mapping index.
+
+    Returns:
+        List[dict or None]: Same as `search_color_mapping_batch`.
+    """
+    if len(words) == 0:
+        return []
+
+    with stage("search"):
+        resp = await client.msearch(searches=construct_color_msearch_body(words, index_name), request_timeout=30)
+    record_took(resp)
+
+    with stage("parse"):
+        return parse_color_msearch_response(resp, words=words)
@@ -0,0 +1,57 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Shares one execution between concurrent identical lookups.
+
+    The first call for a key starts the lookup as a task; calls for the same key made
+    before it finishes await that task instead of running their own, and all of them get
+    its result or its exception. Nothing is kept once the task is done, so unlike a cache
+    this never returns stale results. The task is shielded, so a caller that disconnects
+    does not cancel the lookup for the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """
+        Run `fn()`, unless a call with the same key is in flight, and return its result.
+
+        Args:
+            key (Hashable): Identifies identical lookups.
+            fn (Callable[[], Awaitable]): Starts the lookup.
+
+        Returns:
+            The result of the lookup.
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Mark the exception as retrieved, even if every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """
+        Report how many lookups were coalesced.
+
+        Returns:
+            dict: Number of calls, calls that shared a lookup in flight, and lookups in flight.
+        """
+        return {"calls": self.calls,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+                "in_flight": len(self._tasks)}
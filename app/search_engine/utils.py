@@ -1,37 +1,126 @@
 import os
-from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
-from docarray.typing import NdArray
-from docarray import BaseDoc
-from docarray.index.backends.elastic import ElasticDocIndex
-from pydantic import Field
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch, Elasticsearch
 
 load_dotenv()
 
+SENT_TRANSFORMER = os.getenv('SENT_TRANSFORMER')
 MANUAL_MAPPING = os.getenv('MANUAL_MAPPING')
 SEARCH_CONFIDENCE = float(os.getenv('SEARCH_CONFIDENCE'))
 COLOR_MAPPING = os.getenv('COLOR_MAPPING')
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'elasticsearch')
+MANUAL_MAPPING_FILE = os.getenv('MANUAL_MAPPING_FILE', 'datasets/imr-tag-search-indices.jsonl')
+EMBEDDING_ARTIFACT_DIR = os.getenv('EMBEDDING_ARTIFACT_DIR', 'model/artifacts')
+MANUAL_MAPPING_ARTIFACT = os.getenv('MANUAL_MAPPING_ARTIFACT', os.path.join(EMBEDDING_ARTIFACT_DIR, str(MANUAL_MAPPING)))
+ASYNC_SEARCH = os.getenv('ASYNC_SEARCH', 'false').lower() == 'true'
+ENCODE_WORKERS = int(os.getenv('ENCODE_WORKERS', 2))
+SEARCH_ENGINE_CONNECTIONS = int(os.getenv('SEARCH_ENGINE_CONNECTIONS', 32))
+EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', 10000))
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR')
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 10000))
+RESULT_CACHE_CHECK_INTERVAL = float(os.getenv('RESULT_CACHE_CHECK_INTERVAL', 30))
+ENCODER_BACKEND = os.getenv('ENCODER_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', 'model/onnx')
+ONNX_MODEL_FILE = os.getenv('ONNX_MODEL_FILE', 'model.onnx')
+ENCODER_THREADS = int(os.getenv('ENCODER_THREADS', 0))
+ENCODE_BATCH_SIZE = int(os.getenv('ENCODE_BATCH_SIZE', 32))
+ENCODE_BATCH_WAIT_MS = float(os.getenv('ENCODE_BATCH_WAIT_MS', 0))
+SEARCH_RANKING = os.getenv('SEARCH_RANKING', 'sum')
+SEARCH_KNN_K = int(os.getenv('SEARCH_KNN_K', 0))
+SEARCH_NUM_CANDIDATES = int(os.getenv('SEARCH_NUM_CANDIDATES', 0))
+# Confidence threshold per ranking strategy, e.g. "rrf=0.45,knn=0.8"; SEARCH_CONFIDENCE for the others
+RANKING_CONFIDENCE = {strategy.strip(): float(value)
+                      for strategy, value in (item.split('=') for item in os.getenv('RANKING_CONFIDENCE', '').split(',')
+                                              if item.strip())}
+COLOR_BACKEND = os.getenv('COLOR_BACKEND', 'elasticsearch')
+COLOR_MAPPING_FILE = os.getenv('COLOR_MAPPING_FILE', 'datasets/colour_bundles.csv')
+COLOR_FUZZY_THRESHOLD = int(os.getenv('COLOR_FUZZY_THRESHOLD', 85))
+LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'false').lower() == 'true'
+EXACT_MATCH = os.getenv('EXACT_MATCH', 'false').lower() == 'true'
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+COALESCE_LOOKUPS = os.getenv('COALESCE_LOOKUPS', 'true').lower() == 'true'
+# Bearer token of the /admin endpoints, which are disabled without it
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+TRACE_SAMPLE_PERCENT = float(os.getenv('TRACE_SAMPLE_PERCENT', 0))
+# Hot queries whose embeddings and results are precomputed after startup and every reindex
+WARMUP_FILE = os.getenv('WARMUP_FILE')
+WARMUP_MAX_QUERIES = int(os.getenv('WARMUP_MAX_QUERIES', 1000))
+WARMUP_RATE = float(os.getenv('WARMUP_RATE', 20))
+WARMUP_LIMIT = int(os.getenv('WARMUP_LIMIT', 10))
+# Identifies the query embeddings of the configured backend, e.g. for the embedding cache; the ONNX
+# graph file is part of it, so switching between the fp32 and the int8 graph clears the cache
+if ENCODER_BACKEND == 'torch':
+    ENCODER_NAME = SENT_TRANSFORMER
+elif ENCODER_BACKEND == 'onnx':
+    ENCODER_NAME = f"{SENT_TRANSFORMER}:onnx:{ONNX_MODEL_FILE}"
+else:
+    ENCODER_NAME = f"{SENT_TRANSFORMER}:{ENCODER_BACKEND}"
 
-class OSMTag(BaseDoc):
-    text: str
-    osm_tag: str
-    uri: str
-    name: str
-    name_embedding: NdArray[384]
-    description_embedding: NdArray[384]
+# sentence_transformers (and torch) and docarray are only imported when first used, so that
+# processes which never encode or use the doc index, like the serving path, start quickly
+@lru_cache(maxsize=None)
+def _osm_tag_doc():
+    from docarray import BaseDoc
+    from docarray.typing import NdArray
 
+    class OSMTag(BaseDoc):
+        text: str
+        osm_tag: str
+        uri: str
+        name: str
+        name_embedding: NdArray[384]
+        description_embedding: NdArray[384]
 
-def load_model():
-    return SentenceTransformer(
-        os.getenv('SENT_TRANSFORMER')
-    )
+    return OSMTag
+
+
+def __getattr__(name):
+    # `from app.search_engine.utils import OSMTag` builds the docarray schema on first access
+    if name == "OSMTag":
+        return _osm_tag_doc()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def load_model(backend: str = None):
+    """
+    Load the query encoder of the configured backend.
+
+    Args:
+        backend (str, optional): `torch` for the fp32 SentenceTransformer, `torch-int8` for its
+                                 dynamically quantized version or `onnx` for the model exported to
+                                 `ONNX_MODEL_DIR`. Defaults to `ENCODER_BACKEND`.
+
+    Returns:
+        An object with the `encode` method of a SentenceTransformer.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    backend = backend or ENCODER_BACKEND
+    if backend in ('torch', 'torch-int8'):
+        from sentence_transformers import SentenceTransformer
+    if backend == 'torch':
+        return SentenceTransformer(
+            SENT_TRANSFORMER
+        )
+    if backend == 'torch-int8':
+        from .encoders import quantize_dynamic
+
+        return quantize_dynamic(SentenceTransformer(SENT_TRANSFORMER, device='cpu'))
+    if backend == 'onnx':
+        from .encoders import OnnxEncoder
+
+        return OnnxEncoder(ONNX_MODEL_DIR, model_file=ONNX_MODEL_FILE, threads=ENCODER_THREADS or None)
+    raise ValueError(f"Invalid encoder backend {backend}")
 
 
 def connect_search_engine():
-    return ElasticDocIndex[OSMTag](hosts=os.getenv("SEARCH_ENGINE_HOST"),
-                                   index_name=os.getenv("SEARCH_ENGINE_INDEX"))
+    from docarray.index.backends.elastic import ElasticDocIndex
+
+    return ElasticDocIndex[_osm_tag_doc()](hosts=os.getenv("SEARCH_ENGINE_HOST"),
+                                           index_name=os.getenv("SEARCH_ENGINE_INDEX"))
 
 
 def search_engine_client():
@@ -41,6 +130,34 @@ def search_engine_client():
     )
 
 
+def search_engine_async_client():
+    """
+    Build a non-blocking Elasticsearch client for the async serving path.
+
+    The connection pool is sized with `SEARCH_ENGINE_CONNECTIONS` so that concurrent
+    requests are not serialised behind a handful of sockets.
+    """
+    return AsyncElasticsearch(
+        os.getenv("SEARCH_ENGINE_HOST"),  # Elasticsearch endpoint
+        connections_per_node=SEARCH_ENGINE_CONNECTIONS,
+        request_timeout=30,
+        retry_on_timeout=True
+    )
+
+
+def encode_executor(max_workers: int = ENCODE_WORKERS):
+    """
+    Build the dedicated executor that runs `model.encode` off the event loop.
+
+    It is bounded by `ENCODE_WORKERS`, so model inference cannot take over the
+    threads used for anything else in the process.
+
+    Args:
+        max_workers (int): Number of threads; raise it when they mostly wait for a `BatchingEncoder`.
+    """
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="encode")
+
+
 def encode(text: str, model):
     embedding = model.encode(text)
     return embedding
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import time
+from collections import Counter
+
+from loguru import logger
+
+
+def read_hot_queries(fpath: str, max_queries: int = 1000, default_limit: int = 10):
+    """
+    Read the queries to warm the caches with, most frequent first.
+
+    Every line is either a plain query, or a JSON object with the `word` and optionally the
+    `limit`, `collapse` and `ranking` of a `/search_osm_tag_v2` request, e.g. sampled from the
+    access logs. Queries repeated in the file rank by how often they occur, ties in file order.
+
+    Args:
+        fpath (str): Path to the file.
+        max_queries (int): Maximum number of queries returned.
+        default_limit (int): `limit` of the queries that do not give one.
+
+    Returns:
+        List[dict]: Queries with `word` and `limit`, and `collapse` and `ranking` where given.
+    """
+    counts = Counter()
+    with open(fpath, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            query = json.loads(line) if line.startswith('{') else {"word": line}
+            query = {"word": query["word"], "limit": int(query.get("limit", default_limit)),
+                     **{key: query[key] for key in ("collapse", "ranking") if query.get(key) is not None}}
+            counts[tuple(query.items())] += 1
+    return [dict(query) for query, _ in counts.most_common(max_queries)]
+
+
+async def warm_up(queries, lookup, max_rate: float = 20.0) -> int:
+    """
+    Run the lookups of the queries one at a time, at most `max_rate` per second.
+
+    Only one lookup is in flight at any time and they are spaced out, so warm-up never competes
+    with live traffic for more than a sliver of the encoder and the search engine. A failing
+    lookup is logged and skipped.
+
+    Args:
+        queries (List[dict]): Keyword arguments of the lookups, see `read_hot_queries`.
+        lookup (Callable[..., Awaitable]): Resolves one query and stores the result in the caches.
+        max_rate (float): Maximum number of lookups per second; 0 for no limit.
+
+    Returns:
+        int: Number of successful lookups.
+    """
+    interval = 1 / max_rate if max_rate > 0 else 0.0
+    start = time.monotonic()
+    next_start, warmed = start, 0
+    for query in queries:
+        await asyncio.sleep(max(0.0, next_start - time.monotonic()))
+        next_start = time.monotonic() + interval
+        try:
+            await lookup(**query)
+            warmed += 1
+        except Exception as e:
+            logger.warning(f"Could not warm up {query}: {e}")
+    logger.info(f"Warmed up {warmed} of {len(queries)} queries in {time.monotonic() - start:.1f}s.")
+    return warmed
@@ -1,13 +1,13 @@
 echo indexing manual mappings
 
-INDEX_NAME=manual_mapping_v5
+ALIAS=manual_mapping
 MANUAL_MAPPINGS="datasets/imr-tag-search-indices.jsonl"
 CONFIG_SETTINGS="es_configs/manual_mapping/settings.json"
 CONFIG_MAPPINGS="es_configs/manual_mapping/mappings.json"
 
 python -m app.search_engine.index \
 --index_manual_mappings \
---index_name $INDEX_NAME \
+--alias $ALIAS \
 --fpath $MANUAL_MAPPINGS \
 --config_settings $CONFIG_SETTINGS \
 --config_mappings $CONFIG_MAPPINGS
\ No newline at end of file
@@ -0,0 +1,81 @@
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+def latency_summary(latencies) -> dict:
+    """
+    Summarize latencies measured in seconds.
+
+    Args:
+        latencies (List[float]): The measured latencies.
+
+    Returns:
+        dict: Count, mean, median, 95th and 99th percentile and maximum in milliseconds.
+    """
+    latencies = np.asarray(latencies) * 1000
+    return {"count": int(len(latencies)),
+            "mean_ms": float(latencies.mean()),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "p99_ms": float(np.percentile(latencies, 99)),
+            "max_ms": float(latencies.max())}
+
+
+def measure(fn, repeat: int = 1000, warmup: int = 10) -> dict:
+    """
+    Time repeated calls of a function.
+
+    Args:
+        fn (Callable[[], Any]): The function to time.
+        repeat (int): Number of timed calls.
+        warmup (int): Number of untimed calls before, so caches and lazy imports are warm.
+
+    Returns:
+        dict: The `latency_summary` of the timed calls.
+    """
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latency_summary(latencies)
+
+
+def environment() -> dict:
+    """
+    Describe where and on which commit a benchmark ran, so reports can be compared across commits.
+
+    Returns:
+        dict: Git commit, UTC timestamp, Python version, platform and CPU count.
+    """
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()}
+
+
+def write_report(fpath: str, results: dict, **options):
+    """
+    Write benchmark results with the environment and the options they were measured with.
+
+    Args:
+        fpath (str): Path of the JSON report.
+        results (dict): Results keyed by benchmark name.
+        **options: The options of the run.
+    """
+    with open(fpath, 'w') as f:
+        json.dump({"environment": environment(), "options": options, "results": results}, f, indent=2)
@@ -0,0 +1,47 @@
+import json
+from argparse import ArgumentParser
+
+from loguru import logger
+
+# Latency statistics compared between reports; throughput is compared where reported
+COMPARED = ("mean_ms", "p95_ms", "p99_ms")
+
+
+def compare_reports(baseline: dict, candidate: dict) -> dict:
+    """
+    Compute the relative change of every benchmark present in both reports.
+
+    Args:
+        baseline (dict): A report written by `write_report`, e.g. of the parent commit.
+        candidate (dict): A report of the same benchmark, e.g. of the current commit.
+
+    Returns:
+        dict: Per benchmark, the change of each compared statistic as a fraction of the
+              baseline value, e.g. 0.1 for 10% slower or higher throughput.
+    """
+    changes = {}
+    for name, result in candidate["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        stats = [stat for stat in COMPARED + ("throughput_rps",) if stat in result and reference.get(stat)]
+        changes[name] = {stat: result[stat] / reference[stat] - 1 for stat in stats}
+    return changes
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Compare two benchmark reports, e.g. of two commits.")
+    parser.add_argument("baseline", type=str)
+    parser.add_argument("candidate", type=str)
+
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    logger.info(f"{baseline['environment']['commit']} -> {candidate['environment']['commit']}")
+    if baseline["options"] != candidate["options"]:
+        logger.warning("The reports were made with different options.")
+    for name, change in compare_reports(baseline, candidate).items():
+        logger.info(f"{name}: " + ", ".join(f"{stat} {value:+.1%}" for stat, value in change.items()))
@@ -0,0 +1,203 @@
+import asyncio
+import csv
+import itertools
+import os
+import random
+import sys
+import time
+from argparse import ArgumentParser
+
+from app.search_engine.color_engine import parse_color_bundle
+from app.search_engine.local_engine import AsyncLocalSearchEngine
+from app.search_engine.reader import read_jsonl, MANUAL_MAPPING_FIELDS
+from loguru import logger
+
+from tests.benchmarks.common import latency_summary, write_report
+from tests.benchmarks.fake_search_engine import FakeSearchEngine, HashingEncoder
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "app")
+
+
+def build_app(encoder: str, manual_mapping_file: str, color_mapping_file: str):
+    """
+    Import the API with its Elasticsearch clients replaced by an in-process `FakeSearchEngine`.
+
+    The configuration is read from the environment like in production; only the connection
+    settings the fake makes irrelevant get defaults. The encoder is loaded by the startup event.
+
+    Args:
+        encoder (str): "model" for the configured encoder, "hashing" for `HashingEncoder`.
+        manual_mapping_file (str): Manual mapping JSONL indexed into the fake cluster.
+        color_mapping_file (str): Color bundles CSV indexed into the fake cluster.
+
+    Returns:
+        FastAPI: The application.
+    """
+    for name, value in {"SEARCH_CONFIDENCE": "0.5", "MANUAL_MAPPING": "manual_mapping",
+                        "COLOR_MAPPING": "color_mappings", "SEARCH_ENGINE_HOST": "http://localhost:9200"}.items():
+        os.environ.setdefault(name, value)
+    # Defer loading the encoder to the startup event, after it may have been swapped below
+    os.environ["LAZY_STARTUP"] = "true"
+    sys.path.insert(0, APP_DIR)
+    import main
+
+    model = main.load_model() if encoder == "model" else HashingEncoder()
+    main.load_model = lambda: model
+
+    engine = FakeSearchEngine.from_datasets(model, manual_mapping_file, color_mapping_file,
+                                            manual_mapping_index=main.MANUAL_MAPPING,
+                                            color_mapping_index=main.COLOR_MAPPING)
+    main.SEARCH_ENGINE = engine
+    if main.SEARCH_BACKEND == "elasticsearch":
+        main.MAPPING_ENGINE = engine
+    if main.ASYNC_SEARCH:
+        main.ASYNC_SEARCH_ENGINE = AsyncLocalSearchEngine(engine)
+        if main.SEARCH_BACKEND == "elasticsearch":
+            main.ASYNC_MAPPING_ENGINE = main.ASYNC_SEARCH_ENGINE
+    return main.app
+
+
+def workload(words, colors, endpoints, limit: int, batch_size: int, seed: int = 0):
+    """
+    Generate an endless, reproducible mix of API requests.
+
+    Args:
+        words (List[str]): Manual mapping queries.
+        colors (List[str]): Color queries.
+        endpoints (List[str]): Any of "search", "batch" and "color", drawn with equal probability.
+        limit (int): `limit` of every manual mapping query.
+        batch_size (int): Number of words per batch request.
+        seed (int): Seed of the request mix.
+
+    Yields:
+        Tuple[str, str, dict]: Endpoint name, HTTP method and the keyword arguments of the request.
+    """
+    rng = random.Random(seed)
+    words, colors = itertools.cycle(words), itertools.cycle(colors)
+    while True:
+        endpoint = rng.choice(endpoints)
+        if endpoint == "search":
+            yield endpoint, "GET", {"url": "/search_osm_tag_v2", "params": {"word": next(words), "limit": limit}}
+        elif endpoint == "batch":
+            yield endpoint, "POST", {"url": "/search_osm_tag_v2/batch",
+                                     "json": [{"word": next(words), "limit": limit} for _ in range(batch_size)]}
+        else:
+            yield endpoint, "GET", {"url": "/color_mapping", "params": {"color": next(colors)}}
+
+
+async def run_load(client, requests, concurrency: int, total: int) -> dict:
+    """
+    Send `total` requests with `concurrency` requests in flight at any time.
+
+    Args:
+        client (httpx.AsyncClient): Client of the API.
+        requests (Iterator[Tuple[str, str, dict]]): Requests, as generated by `workload`.
+        concurrency (int): Number of concurrent requests.
+        total (int): Number of requests to send.
+
+    Returns:
+        dict: Throughput, error count and latency summary, overall and per endpoint.
+    """
+    latencies, errors = {}, 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            endpoint, method, kwargs = next(requests)
+            start = time.perf_counter()
+            resp = await client.request(method, **kwargs)
+            latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+            errors += resp.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {"concurrency": concurrency,
+            "throughput_rps": total / elapsed,
+            "errors": errors,
+            **latency_summary([latency for values in latencies.values() for latency in values]),
+            "endpoints": {endpoint: latency_summary(values) for endpoint, values in latencies.items()}}
+
+
+async def wait_until_ready(client, timeout: float = 300):
+    """
+    Poll `/ready` until the API can serve searches.
+
+    Raises:
+        TimeoutError: If the API is not ready within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while (await client.get("/ready")).status_code != 200:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"The API was not ready within {timeout}s")
+        await asyncio.sleep(0.5)
+
+
+async def benchmark(args, words, colors) -> dict:
+    """
+    Run the load at every concurrency level of `args.concurrency`, after a warm-up.
+
+    Returns:
+        dict: The `run_load` result of every concurrency level.
+    """
+    try:
+        import httpx
+    except ImportError as e:
+        raise ImportError("The end-to-end benchmark requires the httpx package (pip install httpx)") from e
+
+    endpoints = args.endpoints.split(",")
+    requests = workload(words, colors, endpoints, limit=args.limit, batch_size=args.batch_size, seed=args.seed)
+    if args.url:
+        app = None
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        app = build_app(args.encoder, args.manual_mapping_file, args.color_mapping_file)
+        # ASGITransport does not run lifespan events, so start the background tasks by hand
+        await app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=60)
+
+    results = {}
+    try:
+        await wait_until_ready(client)
+        await run_load(client, requests, concurrency=1, total=args.warmup)
+        for concurrency in map(int, args.concurrency.split(",")):
+            results[f"concurrency_{concurrency}"] = result = await run_load(client, requests, concurrency,
+                                                                            total=args.requests)
+            logger.info(f"concurrency {concurrency}: {result['throughput_rps']:.1f} req/s, "
+                        f"p50 {result['p50_ms']:.2f}ms, p95 {result['p95_ms']:.2f}ms, "
+                        f"p99 {result['p99_ms']:.2f}ms, {result['errors']} errors")
+    finally:
+        await client.aclose()
+        if app is not None:
+            await app.router.shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Measure API throughput and latency at several concurrency levels.")
+    parser.add_argument("--url", type=str, help="Benchmark a running server instead of the in-process app "
+                                                "with a fake Elasticsearch.")
+    parser.add_argument("--manual_mapping_file", type=str, default="datasets/imr-tag-search-indices.jsonl")
+    parser.add_argument("--color_mapping_file", type=str, default="datasets/colour_bundles.csv")
+    parser.add_argument("--encoder", type=str, default="model", choices=["model", "hashing"])
+    parser.add_argument("--endpoints", type=str, default="search,batch,color")
+    parser.add_argument("--concurrency", type=str, default="1,8,32")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level.")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=5)
+    parser.add_argument("--batch_size", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="end_to_end.json")
+
+    args = parser.parse_args()
+    words = [row["key"].strip().lower()
+             for row in read_jsonl(args.manual_mapping_file, required_fields=MANUAL_MAPPING_FIELDS)]
+    random.Random(args.seed).shuffle(words)
+    with open(args.color_mapping_file, newline='', encoding='utf-8') as f:
+        colors = [descriptor for row in csv.DictReader(f) for descriptor in parse_color_bundle(row)[0]]
+
+    results = asyncio.run(benchmark(args, words, colors))
+    write_report(args.output, results, **vars(args))
+    logger.info(f"Results written to {args.output}.")
@@ -0,0 +1,266 @@
+import csv
+import hashlib
+import itertools
+import json
+
+import numpy as np
+from app.search_engine.color_engine import parse_color_bundle
+from app.search_engine.local_engine import LocalSearchEngine
+from app.search_engine.reader import read_jsonl, manual_mapping_document, MANUAL_MAPPING_FIELDS
+from elasticsearch.serializer import JSONSerializer
+
+
+class FakeResponse(dict):
+    """
+    A response that can be used like the dict it holds or through `.body`, like an `ObjectApiResponse`.
+    """
+
+    @property
+    def body(self):
+        return self
+
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for the sentence transformer, for runs without the model weights.
+
+    Texts are embedded as signed bags of hashed character trigrams, so similar strings get
+    similar vectors and encoding costs microseconds instead of a forward pass.
+    """
+
+    def __init__(self, dimensions: int = 384):
+        """
+        Args:
+            dimensions (int): Size of the embeddings.
+        """
+        self.dimensions = dimensions
+
+    def _encode_one(self, text: str):
+        embedding = np.zeros(self.dimensions, dtype=np.float32)
+        padded = f"  {text.lower()} "
+        for idx in range(len(padded) - 2):
+            digest = int.from_bytes(hashlib.blake2b(padded[idx:idx + 3].encode(), digest_size=8).digest(), "little")
+            embedding[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        return embedding
+
+    def encode(self, text, **kwargs):
+        if isinstance(text, str):
+            return self._encode_one(text)
+        return np.stack([self._encode_one(item) for item in text]) if text else np.empty((0, self.dimensions))
+
+
+class FakeTransport:
+    """
+    The part of the client transport used by `elasticsearch.helpers`.
+    """
+
+    class Serializers:
+        def get_serializer(self, mimetype: str):
+            return JSONSerializer()
+
+    serializers = Serializers()
+
+
+class FakeIndices:
+    """
+    The subset of `client.indices` used by the indexers and the serving path.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def exists(self, index: str, **kwargs) -> bool:
+        return index in self.engine.indexes
+
+    def create(self, index: str, **kwargs):
+        self.engine.indexes.setdefault(index, FakeIndex(index))
+        return FakeResponse({"acknowledged": True, "index": index})
+
+    def delete(self, index: str, **kwargs):
+        self.engine.indexes.pop(index, None)
+        return FakeResponse({"acknowledged": True})
+
+    def get_mapping(self, index: str, **kwargs):
+        return FakeResponse({index: {"mappings": {"_meta": {"generation": self.engine.index(index).generation}}}})
+
+    def put_mapping(self, index: str, meta: dict = None, **kwargs):
+        if meta and "generation" in meta:
+            self.engine.index(index).generation = meta["generation"]
+        return FakeResponse({"acknowledged": True})
+
+    def get_settings(self, index: str, **kwargs):
+        return FakeResponse({index: {"settings": {}}})
+
+    def put_settings(self, index: str, **kwargs):
+        return FakeResponse({"acknowledged": True})
+
+    def refresh(self, index: str, **kwargs):
+        return FakeResponse({"_shards": {"failed": 0}})
+
+
+class FakeIndex:
+    """
+    Documents of one fake index, searched through a `LocalSearchEngine` rebuilt after every change.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.documents = {}
+        self.generation = f"{name}-0"
+        self._ids = itertools.count()
+        self._engine = None
+
+    def put(self, doc_id, source: dict) -> str:
+        doc_id = str(next(self._ids)) if doc_id is None else str(doc_id)
+        self.documents[doc_id] = source
+        self._engine = None
+        return doc_id
+
+    def delete(self, doc_id) -> bool:
+        self._engine = None
+        return self.documents.pop(str(doc_id), None) is not None
+
+    def engine(self) -> LocalSearchEngine:
+        if self._engine is None:
+            documents = list(self.documents.values())
+            vectors = [doc.get("embeddings") for doc in documents]
+            dimensions = next((len(vector) for vector in vectors if vector is not None), 1)
+            embeddings = np.array([np.zeros(dimensions) if vector is None else vector for vector in vectors],
+                                  dtype=np.float32).reshape(len(documents), dimensions)
+            self._engine = LocalSearchEngine(documents, embeddings, generation=self.generation)
+        return self._engine
+
+
+class FakeSearchEngine:
+    """
+    In-process stand-in for an Elasticsearch cluster, so benchmarks and tests run offline.
+
+    Each index is searched by a `LocalSearchEngine`, which answers the `match` and k-NN
+    queries built by `search_ops` with Elasticsearch-shaped responses. `bulk` accepts the
+    NDJSON lines sent by `elasticsearch.helpers`, so `ingest` works unchanged. Unlike a
+    `keyword` field in Elasticsearch, `name` is always matched with BM25 on analyzed tokens.
+    Wrap it in `AsyncLocalSearchEngine` for the async serving path.
+    """
+
+    def __init__(self):
+        self.indexes = {}
+        self.indices = FakeIndices(self)
+        self.transport = FakeTransport()
+
+    @classmethod
+    def from_datasets(cls, model, manual_mapping_file: str, color_mapping_file: str,
+                      manual_mapping_index: str = "manual_mapping", color_mapping_index: str = "color_mappings"):
+        """
+        Build a fake cluster with the manual mapping and the color mapping indexes.
+
+        Args:
+            model: The model used to encode the manual mapping.
+            manual_mapping_file (str): Path to the manual mapping JSONL file.
+            color_mapping_file (str): Path to the color bundles CSV.
+            manual_mapping_index (str): Name of the manual mapping index.
+            color_mapping_index (str): Name of the color mapping index.
+
+        Returns:
+            FakeSearchEngine: The loaded fake cluster.
+        """
+        engine = cls()
+        engine.load_manual_mapping(manual_mapping_index, manual_mapping_file, model)
+        engine.load_color_mapping(color_mapping_index, color_mapping_file)
+        return engine
+
+    def index(self, name: str) -> FakeIndex:
+        if name not in self.indexes:
+            raise KeyError(f"no such index [{name}]")
+        return self.indexes[name]
+
+    def load_manual_mapping(self, index_name: str, fpath: str, model, batch_size: int = 64):
+        """
+        Index the manual mapping JSONL the way `index_from_file` does, with embeddings under `embeddings`.
+
+        Args:
+            index_name (str): Name of the index to fill.
+            fpath (str): Path to the manual mapping JSONL file.
+            model: The model used to encode document names.
+            batch_size (int): Number of names encoded per forward pass.
+        """
+        documents = [manual_mapping_document(row) for row in read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS)]
+        embeddings = model.encode([document["name"] for document in documents], batch_size=batch_size)
+        index = self.indexes[index_name] = FakeIndex(index_name)
+        for document, embedding in zip(documents, embeddings):
+            index.put(None, dict(document, embeddings=embedding))
+
+    def load_color_mapping(self, index_name: str, fpath: str):
+        """
+        Index the color bundles CSV the way `index_colors.py` does.
+
+        Args:
+            index_name (str): Name of the index to fill.
+            fpath (str): Path to the color bundles CSV.
+        """
+        index = self.indexes[index_name] = FakeIndex(index_name)
+        with open(fpath, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                color_descriptors, color_values = parse_color_bundle(row)
+                for color_descriptor in color_descriptors:
+                    index.put(None, {"name": color_descriptor, "color_values": color_values})
+
+    def options(self, **kwargs):
+        return self
+
+    def search(self, index: str = None, **kwargs):
+        return FakeResponse(self.index(index).engine().search(index=index, **kwargs))
+
+    def msearch(self, searches, index: str = None, **kwargs):
+        responses = []
+        for header, body in zip(searches[::2], searches[1::2]):
+            resp = self.search(index=header.get("index", index),
+                               query=body.get("query"),
+                               knn=body.get("knn"),
+                               source=body.get("_source"),
+                               size=body.get("size", 10),
+                               collapse=body.get("collapse"))
+            resp["status"] = 200
+            responses.append(resp)
+        return FakeResponse({"took": sum(resp["took"] for resp in responses), "responses": responses})
+
+    def count(self, index: str, **kwargs):
+        return FakeResponse({"count": len(self.index(index).documents)})
+
+    def bulk(self, operations, index: str = None, **kwargs):
+        """
+        Apply `index`, `create`, `update` and `delete` actions.
+
+        Args:
+            operations (List[bytes or str or dict] or str): Alternating action and source lines,
+                                                            as serialized by `elasticsearch.helpers`.
+            index (str, optional): Index of actions without `_index`.
+
+        Returns:
+            FakeResponse: An Elasticsearch-shaped bulk response.
+        """
+        if isinstance(operations, (str, bytes)):
+            operations = operations.splitlines()
+        lines = iter(line if isinstance(line, dict) else json.loads(line) for line in operations if line)
+
+        items = []
+        for action in lines:
+            (op_type, meta), = action.items()
+            name = meta.get("_index", index)
+            target = self.indexes.setdefault(name, FakeIndex(name))
+            if op_type == "delete":
+                found = target.delete(meta["_id"])
+                items.append({op_type: {"_index": name, "_id": str(meta["_id"]), "status": 200 if found else 404}})
+                continue
+
+            source = next(lines)
+            if op_type == "update":
+                source = dict(target.documents.get(str(meta["_id"]), {}), **source["doc"])
+            doc_id = target.put(meta.get("_id"), source)
+            items.append({op_type: {"_index": name, "_id": doc_id, "status": 201}})
+
+        errors = any(item[op]["status"] >= 300 for item in items for op in item)
+        return FakeResponse({"took": 0, "errors": errors, "items": items})
+
+    def close(self):
+        pass
+
@@ -0,0 +1,126 @@
+import itertools
+import random
+from argparse import ArgumentParser
+
+from app.search_engine.reader import read_jsonl, MANUAL_MAPPING_FIELDS
+from app.search_engine.search_ops import (construct_ranked_searches, construct_msearch_body, parse_manual_mapping_response,
+                                          parse_msearch_response, search_manual_mapping, search_manual_mapping_batch,
+                                          construct_bm25_query, construct_color_msearch_body,
+                                          parse_color_mapping_response, parse_color_msearch_response,
+                                          search_color_mapping, search_arguments, RANKING_STRATEGIES)
+from loguru import logger
+
+from tests.benchmarks.common import measure, write_report
+from tests.benchmarks.fake_search_engine import FakeSearchEngine, HashingEncoder
+
+
+def benchmark_encoder(name: str):
+    """
+    Load the encoder a benchmark runs with.
+
+    Args:
+        name (str): "model" for the configured encoder (`load_model`), "hashing" for `HashingEncoder`.
+
+    Returns:
+        An object with an `encode` method.
+    """
+    if name == "hashing":
+        return HashingEncoder()
+    from app.search_engine.utils import load_model
+    return load_model()
+
+
+def run_microbenchmarks(model, engine, words, colors, repeat: int, batch_size: int, ranking: str = "sum") -> dict:
+    """
+    Time each stage of the manual mapping and color searches separately.
+
+    Request building and post-processing run on canned queries, vectors and responses, so they
+    are timed without encoding or searching; the `search_*` entries time the complete calls.
+
+    Args:
+        model: The query encoder.
+        engine (FakeSearchEngine): The fake cluster holding "manual_mapping" and "color_mappings".
+        words (List[str]): Manual mapping queries, cycled through by the timed calls.
+        colors (List[str]): Color queries.
+        repeat (int): Number of timed calls per benchmark.
+        batch_size (int): Number of queries of the batch benchmarks.
+        ranking (str): Ranking strategy of the manual mapping searches.
+
+    Returns:
+        dict: The `measure` summary of every benchmark, keyed by name.
+    """
+    word, color = words[0], colors[0]
+    batch, limits = words[:batch_size], [10] * batch_size
+    vector = model.encode(word)
+    vectors = model.encode(batch)
+    options = {"client": engine, "model": model, "index_name": "manual_mapping", "confidence": 0.0,
+               "ranking": ranking}
+
+    bodies = construct_ranked_searches(word, vector, limit=10, ranking=ranking)
+    response = engine.search(index="manual_mapping", **search_arguments(bodies[0]))
+    msearch_body = construct_msearch_body(batch, vectors, "manual_mapping", limits=limits, ranking=ranking)
+    msearch_response = engine.msearch(searches=msearch_body)
+    color_response = engine.search(index="color_mappings", query=construct_bm25_query(color),
+                                   source=["name", "color_values"])
+    color_msearch_body = construct_color_msearch_body(colors[:batch_size], "color_mappings")
+    color_msearch_response = engine.msearch(searches=color_msearch_body)
+
+    # Cycle through the queries, so timings are not flattered by repeating one query
+    queries = itertools.cycle(words)
+
+    benchmarks = {
+        "encode": lambda: model.encode(next(queries)),
+        f"encode_batch_{batch_size}": lambda: model.encode(batch),
+        "build_manual_mapping_request": lambda: construct_ranked_searches(word, vector, limit=10, ranking=ranking),
+        "parse_manual_mapping_response": lambda: parse_manual_mapping_response(response, confidence=0.0, limit=10),
+        f"build_manual_mapping_msearch_{batch_size}": lambda: construct_msearch_body(batch, vectors, "manual_mapping",
+                                                                                     limits=limits, ranking=ranking),
+        f"parse_manual_mapping_msearch_{batch_size}": lambda: parse_msearch_response(msearch_response, batch, limits,
+                                                                                     confidence=0.0, ranking=ranking),
+        "search_manual_mapping": lambda: search_manual_mapping(word=next(queries), limit=10, **options),
+        f"search_manual_mapping_batch_{batch_size}": lambda: search_manual_mapping_batch(words=batch, limits=limits,
+                                                                                         **options),
+        "build_color_request": lambda: construct_bm25_query(color),
+        "parse_color_response": lambda: parse_color_mapping_response(color_response, limit=1),
+        f"build_color_msearch_{batch_size}": lambda: construct_color_msearch_body(colors[:batch_size],
+                                                                                  "color_mappings"),
+        f"parse_color_msearch_{batch_size}": lambda: parse_color_msearch_response(color_msearch_response,
+                                                                                  colors[:batch_size]),
+        "search_color_mapping": lambda: search_color_mapping(word=color, client=engine, index_name="color_mappings"),
+    }
+
+    results = {}
+    for name, fn in benchmarks.items():
+        # Forward passes and complete searches are orders of magnitude slower than the rest
+        slow = name.startswith(("encode", "search"))
+        results[name] = measure(fn, repeat=max(1, repeat // 10) if slow else repeat)
+        logger.info(f"{name}: mean {results[name]['mean_ms']:.4f}ms, p95 {results[name]['p95_ms']:.4f}ms")
+    return results
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Time the stages of the search hot path against an in-process fake cluster.")
+    parser.add_argument("--manual_mapping_file", type=str, default="datasets/imr-tag-search-indices.jsonl")
+    parser.add_argument("--color_mapping_file", type=str, default="datasets/colour_bundles.csv")
+    parser.add_argument("--encoder", type=str, default="model", choices=["model", "hashing"],
+                        help="`hashing` needs no model weights, but then encode timings are meaningless.")
+    parser.add_argument("--ranking", type=str, default="sum", choices=RANKING_STRATEGIES)
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=str, default="microbenchmarks.json")
+
+    args = parser.parse_args()
+    model = benchmark_encoder(args.encoder)
+    engine = FakeSearchEngine.from_datasets(model, args.manual_mapping_file, args.color_mapping_file)
+
+    words = [row["key"].strip().lower()
+             for row in read_jsonl(args.manual_mapping_file, required_fields=MANUAL_MAPPING_FIELDS)]
+    random.Random(args.seed).shuffle(words)
+    colors = [document["name"] for document in engine.index("color_mappings").documents.values()]
+    random.Random(args.seed).shuffle(colors)
+
+    results = run_microbenchmarks(model, engine, words, colors, repeat=args.repeat, batch_size=args.batch_size,
+                                  ranking=args.ranking)
+    write_report(args.output, results, **vars(args))
+    logger.info(f"Results written to {args.output}.")
@@ -0,0 +1,82 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.search_engine.batching import BatchingEncoder
+
+
+class RecordingModel:
+    """
+    Stand-in for a SentenceTransformer that records the batches it encodes.
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def encode(self, texts, **kwargs):
+        self.release.wait(timeout=5)
+        self.batches.append(list(texts))
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+class TestBatchingEncoder(unittest.TestCase):
+    """
+    Unit tests for the encode micro-batcher.
+    """
+
+    def setUp(self):
+        self.model = RecordingModel()
+        self.encoder = BatchingEncoder(self.model, max_batch_size=4, max_wait=0.05)
+
+    def tearDown(self):
+        self.model.release.set()
+        self.encoder.close()
+
+    def test_concurrent_calls_share_batches(self):
+        words = ["a", "bb", "ccc", "dddd", "eeeee", "ffffff"]
+        with ThreadPoolExecutor(max_workers=len(words)) as executor:
+            futures = [executor.submit(self.encoder.encode, word) for word in words]
+            self.model.release.set()
+            results = [future.result() for future in futures]
+
+        self.assertEqual([result[0] for result in results], [len(word) for word in words])
+        self.assertLess(len(self.model.batches), len(words))
+        self.assertTrue(all(len(batch) <= 4 for batch in self.model.batches))
+
+        stats = self.encoder.stats()
+        self.assertEqual(stats["items"], len(words))
+        self.assertEqual(sum(size * count for size, count in stats["batch_sizes"].items()), len(words))
+
+    def test_list_input_and_errors(self):
+        self.model.release.set()
+
+        self.assertEqual(self.encoder.encode(["a", "bb"]).shape, (2, 2))
+        with self.assertRaises(RuntimeError):
+            self.encoder.encode("boom")
+
+    def test_failing_text_does_not_fail_its_batch(self):
+        words = ["a", "boom", "ccc"]
+        with ThreadPoolExecutor(max_workers=len(words)) as executor:
+            futures = [executor.submit(self.encoder.encode, word) for word in words]
+            self.model.release.set()
+
+        self.assertEqual(futures[0].result()[0], 1)
+        self.assertEqual(futures[2].result()[0], 3)
+        with self.assertRaises(RuntimeError):
+            futures[1].result()
+
+    def test_arguments_bypass_the_batcher(self):
+        self.model.release.set()
+        self.encoder.encode(["a", "bb"], batch_size=8)
+
+        self.assertEqual(self.model.batches, [["a", "bb"]])
+        self.assertEqual(self.encoder.stats()["items"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
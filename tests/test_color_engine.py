@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from app.search_engine.color_engine import ColorEngine, fold_color, split_color_phrase, merge_color_results
+
+COLOR_BUNDLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             "datasets", "colour_bundles.csv")
+
+
+class TestColorEngine(unittest.TestCase):
+    """
+    Unit tests for the in-memory color resolver.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self.directory.name, "colour_bundles.csv")
+        shutil.copy(COLOR_BUNDLES, self.fpath)
+        self.engine = ColorEngine(self.fpath, check_interval=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exact_and_folded_lookup(self):
+        self.assertEqual(self.engine.search("navy"), {"name": "navy", "color_values": ["blue", "#3399FF"]})
+        self.assertEqual(fold_color(" Off - White "), "offwhite")
+        for word in ["Off White", "off_white", "OFFWHITE"]:
+            self.assertEqual(self.engine.search(word)["name"], "off-white")
+
+    def test_fuzzy_fallback(self):
+        self.assertEqual(self.engine.search("burgandy")["name"], "burgundy")
+        self.assertIsNone(self.engine.search("bicycle"))
+
+    def test_reload_on_change(self):
+        self.assertIsNone(self.engine.search("vantablack"))
+        with open(self.fpath, "a") as f:
+            f.write('14,"vantablack","black, #000000"\n')
+
+        self.assertEqual(self.engine.search("vantablack")["color_values"], ["black", "#000000"])
+
+
+class TestColorPhrases(unittest.TestCase):
+    """
+    Unit tests for splitting compound color phrases and merging their results.
+    """
+
+    def test_split_color_phrase(self):
+        self.assertEqual(split_color_phrase("Red and White"), ["red", "white"])
+        self.assertEqual(split_color_phrase("dark gray/black"), ["dark gray", "black"])
+        self.assertEqual(split_color_phrase("off-white"), ["off-white"])
+
+    def test_merge_color_results(self):
+        merged = merge_color_results([{"name": "white", "color_values": ["white", "#ffffff", "#FFFFFF"]},
+                                      None,
+                                      {"name": "snow", "color_values": ["white", "#eeeeee"]}])
+
+        self.assertEqual(merged, {"names": ["white", "snow"], "color_values": ["white", "#ffffff", "#eeeeee"]})
+        self.assertIsNone(merge_color_results([None]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.search_engine.embedding_cache import CachedEncoder
+
+
+class CountingModel:
+    """
+    Stand-in for a SentenceTransformer that records every text it encodes.
+    """
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+class TestCachedEncoder(unittest.TestCase):
+    """
+    Unit tests for the query-embedding cache.
+    """
+
+    def test_normalized_queries_share_an_entry(self):
+        model = CountingModel()
+        encoder = CachedEncoder(model, model_name="test-model", max_size=10)
+
+        first = encoder.encode("Bus  Stop")
+        second = encoder.encode(" bus stop ")
+
+        np.testing.assert_array_equal(first, second)
+        self.assertEqual(model.encoded, ["bus stop"])
+        self.assertEqual(encoder.stats()["hits"], 1)
+        self.assertEqual(encoder.stats()["misses"], 1)
+
+    def test_batch_encodes_only_misses(self):
+        model = CountingModel()
+        encoder = CachedEncoder(model, model_name="test-model", max_size=10)
+        encoder.encode("park")
+
+        embeddings = encoder.encode(["park", "church", "church"])
+
+        self.assertEqual(embeddings.shape, (3, 2))
+        self.assertEqual(model.encoded, ["park", "church"])
+
+    def test_lru_eviction(self):
+        model = CountingModel()
+        encoder = CachedEncoder(model, model_name="test-model", max_size=2)
+        for word in ["park", "church", "school", "park"]:
+            encoder.encode(word)
+
+        self.assertEqual(model.encoded, ["park", "church", "school", "park"])
+        self.assertEqual(encoder.stats()["size"], 2)
+
+    def test_disk_tier_is_scoped_to_model(self):
+        with tempfile.TemporaryDirectory() as directory:
+            CachedEncoder(CountingModel(), model_name="model-a", directory=directory).encode("park")
+
+            model = CountingModel()
+            CachedEncoder(model, model_name="model-a", directory=directory).encode("park")
+            self.assertEqual(model.encoded, [])
+
+            model = CountingModel()
+            CachedEncoder(model, model_name="model-b", directory=directory).encode("park")
+            self.assertEqual(model.encoded, ["park"])
+
+
+if __name__ == '__main__':
+    unittest.main()
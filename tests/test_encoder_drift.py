@@ -0,0 +1,33 @@
+import unittest
+
+import numpy as np
+
+from app.search_engine.encoder_drift import measure_drift
+
+
+class TestMeasureDrift(unittest.TestCase):
+    """
+    Unit tests for the comparison of encoder backends.
+    """
+
+    def setUp(self):
+        self.reference = np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32)
+
+    def test_identical_embeddings_have_no_drift(self):
+        drift = measure_drift(self.reference, self.reference * 2, k=5)
+
+        self.assertAlmostEqual(drift["cosine_min"], 1.0, places=5)
+        self.assertEqual(drift["top1_agreement"], 1.0)
+        self.assertEqual(drift["overlap_at_k"], 1.0)
+
+    def test_noise_lowers_similarity_and_parity(self):
+        noise = np.random.default_rng(1).normal(scale=2.0, size=self.reference.shape)
+        drift = measure_drift(self.reference, self.reference + noise, k=5)
+
+        self.assertLess(drift["cosine_mean"], 0.9)
+        self.assertLess(drift["top1_agreement"], 1.0)
+        self.assertEqual(drift["terms"], 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.search_engine.exact_match import ExactMatchIndex
+
+ROWS = [
+    {"key": "bus stop", "cluster_id": "bus", "imr": [{"key": "highway", "operator": "=", "value": "bus_stop"}],
+     "descriptors": ["bus stop", "bus station"]},
+    {"key": "café", "cluster_id": "cafe", "imr": [{"key": "amenity", "operator": "=", "value": "cafe"}],
+     "descriptors": ["café", "coffee shop"]},
+    {"key": "station", "cluster_id": "rail", "imr": [{"key": "railway", "operator": "=", "value": "station"}],
+     "descriptors": ["station", "bus station"]},
+]
+
+
+class TestExactMatchIndex(unittest.TestCase):
+    """
+    Unit tests for answering literal descriptors without a search.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.fpath = os.path.join(self.directory.name, "mapping.jsonl")
+        with open(self.fpath, "w") as f:
+            f.writelines(json.dumps(row) + "\n" for row in ROWS)
+        self.index = ExactMatchIndex(self.fpath, check_interval=0)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_folded_lookup(self):
+        for word in ["bus stop", "Bus  Stops", "CAFES", "coffee shops"]:
+            results = self.index.search(word)
+            self.assertEqual(len(results), 1)
+            self.assertEqual(results[0]["score"], 1.0)
+        self.assertEqual(self.index.search("Bus Stops")[0]["cluster_id"], "bus")
+        self.assertEqual(self.index.search("cafe", collapse=True)[0]["matched_descriptor"], "café")
+
+    def test_misses_and_ambiguous_descriptors_fall_through(self):
+        self.assertIsNone(self.index.search("playground"))
+        # "bus station" is a descriptor of two clusters, so only the hybrid search can rank them
+        self.assertIsNone(self.index.search("bus station"))
+        self.assertEqual(self.index.stats()["misses"], 2)
+
+    def test_limit(self):
+        self.assertEqual(self.index.search("bus stop", limit=0), [])
+        # One bundle cannot fill a larger limit, e.g. five distinct bundles with collapse
+        self.assertIsNone(self.index.search("bus stop", limit=5, collapse=True))
+        self.assertIsNone(self.index.search("bus stop", limit=5))
+        self.assertEqual(len(self.index.search("bus stop", limit=1, collapse=True)), 1)
+
+    def test_reload_on_change(self):
+        self.assertIsNone(self.index.search("playground"))
+        with open(self.fpath, "a") as f:
+            f.write(json.dumps({"key": "playground", "cluster_id": "play", "imr": [], "descriptors": []}) + "\n")
+        # Lookups keep using the previous table until the file is reloaded
+        self.assertIsNone(self.index.search("playgrounds"))
+        self.assertTrue(self.index.reload_if_changed())
+        self.assertEqual(self.index.search("playgrounds")[0]["cluster_id"], "play")
+        self.assertEqual(self.index.stats()["hits"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import unittest
+
+from app.search_engine.ingest import ingest
+from app.search_engine.reader import read_jsonl, manual_mapping_document
+from app.search_engine.search_ops import search_manual_mapping, search_color_mapping_batch
+from tests.benchmarks.fake_search_engine import FakeSearchEngine, HashingEncoder
+
+DATASETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "datasets")
+
+
+class TestFakeSearchEngine(unittest.TestCase):
+    """
+    Unit tests for the in-process Elasticsearch stand-in of the benchmarks.
+    """
+
+    def setUp(self):
+        self.model = HashingEncoder()
+        self.engine = FakeSearchEngine()
+
+    def test_ingest_then_search(self):
+        documents = [manual_mapping_document(row)
+                     for row in read_jsonl(os.path.join(DATASETS, "imr-tag-search-indices.jsonl"))][:200]
+        actions = ({"_index": "manual_mapping", "_source": dict(doc, embeddings=self.model.encode(doc["name"]))}
+                   for doc in documents)
+        stats = ingest(self.engine, actions, thread_count=2, chunk_size=50)
+
+        self.assertEqual(stats["indexed"], len(documents))
+        self.assertEqual(self.engine.count(index="manual_mapping").body["count"], len(documents))
+        results = search_manual_mapping(word=documents[0]["name"], client=self.engine, model=self.model,
+                                        index_name="manual_mapping", confidence=0.0, limit=1)
+        self.assertEqual(results[0]["name"], documents[0]["name"])
+
+    def test_bulk_delete(self):
+        self.engine.bulk(operations=['{"index": {"_index": "colors", "_id": "1"}}', '{"name": "red"}',
+                                     '{"delete": {"_index": "colors", "_id": "1"}}'])
+        self.assertEqual(self.engine.count(index="colors")["count"], 0)
+
+    def test_color_msearch(self):
+        self.engine.load_color_mapping("color_mappings", os.path.join(DATASETS, "colour_bundles.csv"))
+        results = search_color_mapping_batch(words=["navy", "red"], client=self.engine, index_name="color_mappings")
+        self.assertEqual([result["name"] for result in results], ["navy", "red"])
+
+
+if __name__ == '__main__':
+    unittest.main()
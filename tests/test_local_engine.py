@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from app.search_engine.artifact import write_artifact
+from app.search_engine.local_engine import LocalSearchEngine, analyze
+from app.search_engine.search_ops import search_manual_mapping, search_manual_mapping_batch
+
+
+class TableModel:
+    """
+    Stand-in for a SentenceTransformer that looks embeddings up in a table.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def encode(self, text, **kwargs):
+        if isinstance(text, list):
+            return np.array([self.table[t] for t in text], dtype=np.float32)
+        return np.array(self.table[text], dtype=np.float32)
+
+
+def _document(name, cluster_id):
+    return {"name": name, "imr": [{"key": "amenity", "operator": "=", "value": name}],
+            "cluster_id": cluster_id, "description": name, "descriptors": [name]}
+
+
+class TestLocalSearchEngine(unittest.TestCase):
+    """
+    Unit tests for the in-process manual mapping search backend.
+    """
+
+    def setUp(self):
+        self.model = TableModel({
+            "bus stop": [1.0, 0.0, 0.0],
+            "train station": [0.0, 1.0, 0.0],
+            "church": [0.0, 0.0, 1.0],
+            "coach stop": [0.9, 0.1, 0.0],
+        })
+        documents = [_document("bus stop", "c1"), _document("train station", "c2"), _document("church", "c3")]
+        embeddings = self.model.encode([document["name"] for document in documents])
+        self.engine = LocalSearchEngine(documents, embeddings, generation="test")
+
+    def test_analyze_folds_case_accents_and_plurals(self):
+        self.assertEqual(analyze("Cafés"), ["cafe"])
+        self.assertEqual(analyze("Churches"), ["church"])
+
+    def test_hybrid_score_adds_bm25_and_knn(self):
+        resp = self.engine.search(index="test", query={"match": {"name": "bus stop"}},
+                                  knn={"field": "embeddings", "query_vector": [1.0, 0.0, 0.0], "k": 1},
+                                  source=["name"])
+
+        top = resp["hits"]["hits"][0]
+        bm25 = self.engine.bm25.score("bus stop")[0]
+        self.assertEqual(top["_source"], {"name": "bus stop"})
+        self.assertAlmostEqual(top["_score"], bm25 + 1.0, places=5)
+        self.assertEqual(resp["hits"]["total"]["value"], 1)
+
+    def test_knn_only_match(self):
+        results = search_manual_mapping(word="coach stop", client=self.engine, model=self.model, index_name="test",
+                                        confidence=0.5, limit=1)
+
+        self.assertEqual(results[0]["cluster_id"], "c1")
+        self.assertEqual(set(results[0]), {"imr", "cluster_id", "name", "score", "descriptors"})
+
+    def test_msearch_matches_search(self):
+        words = ["church", "train station"]
+        batch = search_manual_mapping_batch(words=words, limits=[2, 2], client=self.engine, model=self.model,
+                                            index_name="test")
+        single = [search_manual_mapping(word=word, client=self.engine, model=self.model, index_name="test", limit=2)
+                  for word in words]
+
+        self.assertEqual(batch, single)
+
+    def test_collapse_returns_distinct_clusters(self):
+        documents = self.engine.documents + [_document("bus station", "c1"), _document("coach stop", "c1")]
+        embeddings = self.model.encode(["bus stop", "train station", "church", "coach stop", "coach stop"])
+        engine = LocalSearchEngine(documents, embeddings, generation="test")
+
+        flat = search_manual_mapping(word="coach stop", client=engine, model=self.model, index_name="test",
+                                     confidence=0.0, limit=3)
+        collapsed = search_manual_mapping(word="coach stop", client=engine, model=self.model, index_name="test",
+                                          confidence=0.0, limit=3, collapse=True)
+
+        self.assertEqual([result["cluster_id"] for result in flat], ["c1", "c1", "c1"])
+        self.assertEqual([result["cluster_id"] for result in collapsed], ["c1", "c2", "c3"])
+        self.assertEqual(collapsed[0]["matched_descriptor"], "coach stop")
+
+    def test_engine_from_artifact_matches_engine_from_embeddings(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = write_artifact(os.path.join(directory, "test"), documents=self.engine.documents,
+                                  embeddings=self.engine.embeddings * 3, model_name="table", generation="g1")
+            engine = LocalSearchEngine.from_artifact(path, model_name="table")
+
+            self.assertIsInstance(engine.embeddings, np.memmap)
+            self.assertEqual(engine.generation, "g1")
+            self.assertEqual(
+                search_manual_mapping(word="coach stop", client=engine, model=self.model, index_name="test", limit=3),
+                search_manual_mapping(word="coach stop", client=self.engine, model=self.model, index_name="test",
+                                      limit=3))
+
+            with self.assertRaises(ValueError):
+                LocalSearchEngine.from_artifact(path, model_name="another-model")
+
+            # Republishing replaces the artifact and leaves nothing behind
+            write_artifact(path, documents=self.engine.documents, embeddings=self.engine.embeddings,
+                           model_name="table", generation="g2")
+            self.assertEqual(LocalSearchEngine.from_artifact(path, model_name="table").generation, "g2")
+            self.assertEqual(os.listdir(directory), ["test"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import contextvars
+import unittest
+
+from app.search_engine.metrics import Histogram, start_request, stage, record_took, record_results
+from app.search_engine.search_ops import parse_manual_mapping_response
+
+
+def hit(score, name):
+    return {"_score": score, "_source": {"name": name, "imr": [], "cluster_id": name, "descriptors": [name]}}
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Unit tests for the request instrumentation and the Prometheus text format.
+    """
+
+    def test_histogram_render(self):
+        histogram = Histogram("latency_seconds", "Latency.", ("endpoint",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe("/search", value=value)
+
+        lines = histogram.render()
+        self.assertIn('latency_seconds_bucket{endpoint="/search",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="/search",le="1.0"} 3', lines)
+        self.assertIn('latency_seconds_bucket{endpoint="/search",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_count{endpoint="/search"} 4', lines)
+        self.assertEqual(lines[1], "# TYPE latency_seconds histogram")
+
+    def test_request_collects_stages_and_results(self):
+        def serve():
+            request_metrics = start_request()
+            with stage("encode"):
+                pass
+            record_took({"took": 12})
+            resp = {"hits": {"total": {"value": 3}, "hits": [hit(2.0, "park"), hit(0.2, "garden"), hit(0.1, "yard")]}}
+            parse_manual_mapping_response(resp, confidence=0.5, limit=10)
+            parse_manual_mapping_response({"hits": {"total": {"value": 0}, "hits": []}}, confidence=0.5, limit=10)
+            return request_metrics
+
+        request_metrics = contextvars.copy_context().run(serve)
+        self.assertEqual(set(request_metrics.stages), {"encode", "engine"})
+        self.assertAlmostEqual(request_metrics.stages["engine"], 0.012)
+        self.assertEqual(request_metrics.results, [1, 0])
+        self.assertEqual(request_metrics.below_confidence, 2)
+        self.assertEqual(request_metrics.no_match, 1)
+
+        header = request_metrics.server_timing(0.05)
+        self.assertIn("engine;dur=12.00", header)
+        self.assertTrue(header.endswith("total;dur=50.00"))
+
+    def test_no_request_is_noop(self):
+        # Outside a request, e.g. in the indexing scripts, nothing is recorded
+        with stage("encode"):
+            record_took({"took": 5})
+            record_results(0)
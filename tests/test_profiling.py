@@ -0,0 +1,49 @@
+import threading
+import unittest
+
+from app.search_engine.profiling import SamplingProfiler, RequestTracer
+
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+    """
+    Unit tests for the admin profiler and request tracer.
+    """
+
+    def test_folded_stacks(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=spin, args=(stop,), name="busy worker")
+        thread.start()
+        try:
+            stacks = SamplingProfiler().profile(seconds=0.1, interval=0.005)
+        finally:
+            stop.set()
+            thread.join()
+
+        lines = stacks.splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertTrue(stack)
+        self.assertTrue(any(line.startswith("busy worker;") and ";spin (" in line for line in lines))
+
+    def test_one_profile_at_a_time(self):
+        profiler = SamplingProfiler()
+        with profiler._lock:
+            self.assertTrue(profiler.running)
+            with self.assertRaises(RuntimeError):
+                profiler.profile(seconds=0.01)
+
+    def test_tracer_sample_rate(self):
+        tracer = RequestTracer(sample_rate=0.0)
+        self.assertFalse(any(tracer.sampled() for _ in range(100)))
+        tracer.sample_rate = 1.0
+        self.assertTrue(all(tracer.sampled() for _ in range(100)))
+
+        tracer.record("/search_osm_tag_v2", "word=park&limit=5", 200, 0.01, {"encode": 0.004})
+        self.assertEqual(tracer.traces[-1]["stages_ms"], {"encode": 4.0})
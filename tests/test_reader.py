@@ -0,0 +1,53 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from app.search_engine.reader import read_jsonl, read_batches, MANUAL_MAPPING_FIELDS
+
+
+ROWS = [
+    '{"cluster_id": "c1", "key": "Park ", "imr": [], "descriptors": ["park"]}\n',
+    '\n',
+    '{"cluster_id": "c2", "key": "church", "imr": [], "descriptors": ["church"]}\n',
+]
+
+
+class TestReadJsonl(unittest.TestCase):
+    """
+    Unit tests for the streaming JSONL reader.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, name, lines, opener=open):
+        path = os.path.join(self.directory.name, name)
+        with opener(path, 'wt') as f:
+            f.writelines(lines)
+        return path
+
+    def test_plain_and_gzip_give_the_same_rows(self):
+        plain = list(read_jsonl(self._write("rows.jsonl", ROWS), required_fields=MANUAL_MAPPING_FIELDS))
+        compressed = list(read_jsonl(self._write("rows.jsonl.gz", ROWS, opener=gzip.open),
+                                     required_fields=MANUAL_MAPPING_FIELDS))
+
+        self.assertEqual([row["cluster_id"] for row in plain], ["c1", "c2"])
+        self.assertEqual(plain, compressed)
+
+    def test_invalid_rows(self):
+        path = self._write("rows.jsonl", ROWS + ['{"key": "school"}\n', 'not json\n'])
+
+        with self.assertRaises(ValueError):
+            list(read_jsonl(path, required_fields=MANUAL_MAPPING_FIELDS))
+        self.assertEqual(len(list(read_jsonl(path, required_fields=MANUAL_MAPPING_FIELDS, skip_invalid=True))), 2)
+
+    def test_read_batches(self):
+        self.assertEqual(list(read_batches(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+
+if __name__ == '__main__':
+    unittest.main()
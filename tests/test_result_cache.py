@@ -0,0 +1,46 @@
+import unittest
+
+from app.search_engine.generation import parse_index_generation
+from app.search_engine.result_cache import ResultCache
+
+
+class TestResultCache(unittest.TestCase):
+    """
+    Unit tests for the search response cache and its generation-based invalidation.
+    """
+
+    def setUp(self):
+        self.cache = ResultCache(max_size=10)
+        self.cache.set_generation("manual_mapping_v5:a")
+        self.results = [{"imr": [], "cluster_id": "c1", "name": "park", "score": 1.5, "descriptors": ["park"]}]
+
+    def test_hit_on_normalized_word(self):
+        self.cache.set("Park", 1, 0.5, "manual_mapping", self.results)
+
+        self.assertEqual(self.cache.get(" park ", 1, 0.5, "manual_mapping"), self.results)
+        self.assertIsNone(self.cache.get("park", 2, 0.5, "manual_mapping"))
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_generation_change_invalidates(self):
+        self.cache.set("park", 1, 0.5, "manual_mapping", self.results)
+
+        self.assertFalse(self.cache.set_generation("manual_mapping_v5:a"))
+        self.assertTrue(self.cache.set_generation("manual_mapping_v5:b"))
+        self.assertIsNone(self.cache.get("park", 1, 0.5, "manual_mapping"))
+
+    def test_results_from_stale_generation_are_not_stored(self):
+        generation = self.cache.generation
+        self.cache.set_generation("manual_mapping_v5:b")
+        self.cache.set("park", 1, 0.5, "manual_mapping", self.results, generation=generation)
+
+        self.assertIsNone(self.cache.get("park", 1, 0.5, "manual_mapping"))
+
+    def test_parse_index_generation(self):
+        resp = {"manual_mapping_v5": {"mappings": {"_meta": {"generation": "abc"}, "properties": {}}},
+                "manual_mapping_v4": {"mappings": {"properties": {}}}}
+
+        self.assertEqual(parse_index_generation(resp), "manual_mapping_v4:|manual_mapping_v5:abc")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import asyncio
+import unittest
+
+from app.search_engine.search_ops import (search_manual_mapping, search_manual_mapping_batch,
+                                          async_search_manual_mapping, async_search_color_mapping, fuse_responses)
+
+
+class FakeModel:
+    """
+    Stand-in for a SentenceTransformer: encodes text as its length.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        if isinstance(text, list):
+            return [[float(len(t))] for t in text]
+        return [float(len(text))]
+
+
+class FakeClient:
+    """
+    Stand-in for an Elasticsearch client returning canned hits per query word.
+    """
+
+    def __init__(self, hits):
+        self.hits = hits
+        self.msearch_calls = 0
+
+    def _response(self, word):
+        hits = self.hits.get(word, [])
+        return {"hits": {"total": {"value": len(hits)}, "hits": hits}}
+
+    def search(self, index, query, knn, source, **kwargs):
+        return self._response(query["match"]["name"])
+
+    def msearch(self, searches, **kwargs):
+        self.msearch_calls += 1
+        bodies = searches[1::2]
+        return {"responses": [self._response(body["query"]["match"]["name"]) for body in bodies]}
+
+
+class FakeAsyncClient(FakeClient):
+    """
+    Awaitable variant of `FakeClient`, mimicking `AsyncElasticsearch`.
+    """
+
+    async def search(self, index, query, source, knn=None, **kwargs):
+        return self._response(query["match"]["name"])
+
+
+def _hit(name, score):
+    return {"_score": score,
+            "_source": {"imr": [{"key": "amenity", "operator": "=", "value": name}],
+                        "cluster_id": f"cluster-{name}",
+                        "name": name,
+                        "descriptors": [name]}}
+
+
+class TestSearchManualMappingBatch(unittest.TestCase):
+    """
+    Unit tests for resolving several descriptors with one `_msearch` request.
+    """
+
+    def setUp(self):
+        self.client = FakeClient({
+            "park": [_hit("park", 2.0), _hit("garden", 1.2), _hit("playground", 0.3)],
+            "church": [_hit("church", 1.8)],
+        })
+
+    def test_batch_matches_single_word_path(self):
+        words = ["park", "church", "unknown"]
+        limits = [2, 1, 3]
+        model = FakeModel()
+
+        batch = search_manual_mapping_batch(words=words, limits=limits, client=self.client, model=model,
+                                            index_name="test", confidence=0.5)
+        single = [search_manual_mapping(word=word, client=self.client, model=FakeModel(), index_name="test",
+                                        confidence=0.5, limit=limit)
+                  for word, limit in zip(words, limits)]
+
+        self.assertEqual(batch, single)
+        self.assertEqual(model.calls, 1)
+        self.assertEqual(self.client.msearch_calls, 1)
+
+    def test_empty_batch(self):
+        self.assertEqual(search_manual_mapping_batch(words=[], limits=[], client=self.client, model=FakeModel(),
+                                                     index_name="test"), [])
+        self.assertEqual(self.client.msearch_calls, 0)
+
+
+class TestAsyncSearch(unittest.TestCase):
+    """
+    Unit tests for the awaitable search functions used by the async serving path.
+    """
+
+    def test_async_matches_sync(self):
+        hits = {"park": [_hit("park", 2.0), _hit("garden", 1.2)]}
+        expected = search_manual_mapping(word="park", client=FakeClient(hits), model=FakeModel(), index_name="test",
+                                         confidence=0.5, limit=2)
+        result = asyncio.run(async_search_manual_mapping(word="park", client=FakeAsyncClient(hits), model=FakeModel(),
+                                                         index_name="test", confidence=0.5, limit=2))
+        self.assertEqual(result, expected)
+
+    def test_async_color_without_match(self):
+        result = asyncio.run(async_search_color_mapping(word="red", client=FakeAsyncClient({}), index_name="test"))
+        self.assertIsNone(result)
+
+
+class TestFuseResponses(unittest.TestCase):
+    """
+    Unit tests for fusing the BM25 and k-NN responses of the `rrf` and `weighted` strategies.
+    """
+
+    def setUp(self):
+        def response(*hits):
+            return {"hits": {"total": {"value": len(hits)},
+                             "hits": [dict(_hit(name, score), _id=name) for name, score in hits]}}
+
+        self.responses = [response(("park", 12.0), ("garden", 4.0)),
+                          response(("park", 0.9), ("playground", 0.8))]
+
+    def test_rrf_scores_top_hit_of_both_searches_as_one(self):
+        hits = fuse_responses(self.responses, ranking="rrf")["hits"]["hits"]
+        self.assertEqual([hit["_id"] for hit in hits], ["park", "garden", "playground"])
+        self.assertAlmostEqual(hits[0]["_score"], 1.0)
+        self.assertTrue(all(0.0 < hit["_score"] <= 1.0 for hit in hits))
+
+    def test_weighted_scores_are_bounded(self):
+        hits = fuse_responses(self.responses, ranking="weighted", limit=2)["hits"]["hits"]
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(hits[0]["_id"], "park")
+        self.assertTrue(all(0.0 < hit["_score"] < 1.0 for hit in hits))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import asyncio
+import unittest
+
+from app.search_engine.singleflight import SingleFlight
+
+
+class TestSingleFlight(unittest.TestCase):
+    """
+    Unit tests for sharing identical lookups in flight.
+    """
+
+    def test_concurrent_calls_share_one_execution(self):
+        executions = []
+
+        async def lookup(word):
+            executions.append(word)
+            await asyncio.sleep(0.01)
+            return [word]
+
+        async def run():
+            flights = SingleFlight()
+            results = await asyncio.gather(*(flights.do(word, lambda word=word: lookup(word))
+                                             for word in ["park", "park", "zoo", "park"]))
+            # Once the lookup is done, the next call runs again
+            results.append(await flights.do("park", lambda: lookup("park")))
+            return flights, results
+
+        flights, results = asyncio.run(run())
+        self.assertEqual(results, [["park"], ["park"], ["zoo"], ["park"], ["park"]])
+        self.assertEqual(executions, ["park", "zoo", "park"])
+        self.assertEqual(flights.stats()["coalesced"], 2)
+        self.assertEqual(flights.stats()["in_flight"], 0)
+
+    def test_errors_and_cancellation(self):
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ConnectionError("search engine unreachable")
+
+        async def run():
+            flights = SingleFlight()
+            first = asyncio.ensure_future(flights.do("park", failing))
+            second = asyncio.ensure_future(flights.do("park", failing))
+            await asyncio.sleep(0)
+            # A caller going away does not cancel the lookup for the others
+            first.cancel()
+            with self.assertRaises(ConnectionError):
+                await second
+            self.assertTrue(first.cancelled())
+
+        asyncio.run(run())
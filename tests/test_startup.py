@@ -0,0 +1,42 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+
+# Seconds `import main` may take in lazy startup mode; override on slow CI machines
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", 5))
+
+# Modules that must only be imported once the encoder or the doc index is actually used
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "onnxruntime", "docarray", "tqdm"]
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({"seconds": time.perf_counter() - start,
+                  "heavy": [name for name in %r if name in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+class TestImportTime(unittest.TestCase):
+    """
+    Guards the startup time of the API in lazy startup mode.
+    """
+
+    def test_import_main_is_light_and_fast(self):
+        env = dict(os.environ, LAZY_STARTUP="true", SEARCH_BACKEND="elasticsearch", SEARCH_CONFIDENCE="0.5",
+                   MANUAL_MAPPING="manual_mapping", COLOR_MAPPING="color_mappings",
+                   SEARCH_ENGINE_HOST=os.getenv("SEARCH_ENGINE_HOST", "http://localhost:9200"))
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=APP_DIR, env=env, capture_output=True,
+                                text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+
+        self.assertEqual(result["heavy"], [])
+        self.assertLess(result["seconds"], IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from app.search_engine.warmup import read_hot_queries, warm_up
+
+
+class TestWarmUp(unittest.TestCase):
+    """
+    Unit tests for warming the caches with hot queries.
+    """
+
+    def test_read_hot_queries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fpath = os.path.join(directory, "hot_queries.txt")
+            with open(fpath, "w") as f:
+                f.write('park\n\n{"word": "restaurant", "limit": 5}\n{"word": "restaurant", "limit": 5}\n'
+                        '{"word": "park", "limit": 10, "collapse": true}\nzoo\n')
+            queries = read_hot_queries(fpath, max_queries=3, default_limit=10)
+
+        self.assertEqual(queries, [{"word": "restaurant", "limit": 5},
+                                   {"word": "park", "limit": 10},
+                                   {"word": "park", "limit": 10, "collapse": True}])
+
+    def test_rate_limited_and_tolerates_failures(self):
+        looked_up = []
+
+        async def lookup(word, limit):
+            looked_up.append(word)
+            if word == "broken":
+                raise ConnectionError("search engine unreachable")
+
+        queries = [{"word": word, "limit": 5} for word in ["park", "broken", "zoo", "cafe"]]
+        start = time.monotonic()
+        warmed = asyncio.run(warm_up(queries, lookup, max_rate=50))
+
+        self.assertEqual(warmed, 3)
+        self.assertEqual(looked_up, ["park", "broken", "zoo", "cafe"])
+        # Four lookups at 50 per second are spread over at least three intervals of 20ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.06)
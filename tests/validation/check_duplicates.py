@@ -1,9 +1,9 @@
-import json
 from argparse import ArgumentParser
 from pathlib import Path
 from tqdm import tqdm
 import pandas as pd
 from tqdm import tqdm
+from app.search_engine.reader import read_jsonl
 
 if __name__ == '__main__':
     parser = ArgumentParser()
@@ -15,19 +15,15 @@ if __name__ == '__main__':
     imr_tag_db = args.input_file
     output_file = args.output_file
 
-    with open(imr_tag_db, 'r') as json_file:
-        imr_tag_db = list(json_file)
-
-    processed_data = list()
+    processed_data = set()
     duplicates = set()
-    for imr_tag in tqdm(imr_tag_db, total=len(imr_tag_db)):
-        imr_tag = json.loads(imr_tag)
+    for imr_tag in tqdm(read_jsonl(imr_tag_db, required_fields=['key'])):
         keyword = imr_tag['key'].lower().strip()
 
         if keyword in processed_data:
             duplicates.add(keyword)
         else:
-            processed_data.append(keyword)
+            processed_data.add(keyword)
 
     with open(output_file, 'a') as f:
         for duplicate in duplicates:
@@ -1,197 +1,214 @@
 import json
+import time
 from argparse import ArgumentParser
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import inflect
-import pandas as pd
-from app.search_engine.utils import search_engine_client, load_model
+import numpy as np
+from app.search_engine.embedding_cache import CachedEncoder
+from app.search_engine.reader import read_jsonl, read_batches
+from app.search_engine.search_ops import search_manual_mapping, search_manual_mapping_batch, RANKING_STRATEGIES
+from app.search_engine.utils import search_engine_client, load_model, ENCODER_NAME, SEARCH_CONFIDENCE
 from loguru import logger
 from tqdm import tqdm
 
+VARIANTS = ("singular", "plural")
 
-def construct_bm25_query(query: str) -> dict:
+
+def validation_queries(rows, variant: str):
     """
-    Build a BM25 match query on the `name` field.
+    Build the queries of one validation variant from the manual mapping rows.
 
     Args:
-        query (str): The raw search string.
+        rows (List[dict]): Rows with "key" (the term to query) and "imr" (the expected mapping).
+        variant (str): "singular" queries every key as is, "plural" its plural form.
 
     Returns:
-        dict: Elasticsearch-compatible query body that matches `name` using BM25.
+        List[Tuple[str, list]]: The queries and the IMR each should resolve to. Empty keys are skipped.
     """
-    return {"match": {"name": query}}
+    inflect_engine = inflect.engine()
+    queries = []
+    for row in rows:
+        name = row["key"].strip().lower()
+        if not name:
+            continue
+        queries.append((inflect_engine.plural_noun(name) if variant == "plural" else name, row["imr"]))
+    return queries
 
 
-def construct_knn_query(query_vector) -> dict:
+def search_concurrently(queries, search, concurrency: int):
     """
-    Build a k‑NN (vector) search clause.
+    Run one search per query on a thread pool, timing each.
 
     Args:
-        query_vector (List[float]): Embedding for the query text.
+        queries (List[str]): The queries.
+        search (Callable[[str], List[dict]]): Searches one query.
+        concurrency (int): Number of searches in flight.
 
     Returns:
-        dict: Elasticsearch kNN block (for use alongside a lexical query).
+        Tuple[List[List[dict]], List[float]]: The results and the latency of every query in milliseconds.
     """
-    return {
-        "field": "embeddings",
-        "query_vector": query_vector,
-        "k": 10,
-        "num_candidates": 100
-    }
+    def timed(word):
+        start = time.perf_counter()
+        results = search(word)
+        return results, (time.perf_counter() - start) * 1000
 
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        timed_results = list(tqdm(executor.map(timed, queries), total=len(queries), leave=False))
+    return [results for results, _ in timed_results], [latency for _, latency in timed_results]
 
-def search_manual_mapping(word: str, client, model, index_name: str, confidence: float = 0.79, limit: int = 1):
+
+def search_in_batches(queries, search_batch, batch_size: int):
     """
-    Hybrid search (BM25 + k‑NN) against a manual OSM mapping index.
+    Run the queries as `_msearch` requests of `batch_size` queries, timing each request.
 
     Args:
-        word (str): Query string to search for.
-        client: Elasticsearch client instance.
-        model: Embedding model with an `.encode(text)` method.
-        index_name (str): Name of the target index.
-        confidence (float, optional): Minimum score threshold to include a hit. Defaults to 0.79.
-        limit (int, optional): Max number of results to return. Defaults to 1.
+        queries (List[str]): The queries.
+        search_batch (Callable[[List[str]], List[List[dict]]]): Searches a batch of queries.
+        batch_size (int): Number of queries per request.
 
     Returns:
-        List[dict]: Up to `limit` results with keys: `imr`, `name`, `score`.
-                    Returns an empty list if no documents match or pass the threshold.
+        Tuple[List[List[dict]], List[float]]: The results of every query and the latency of every
+                                              request in milliseconds.
     """
-    logger.info(f"Querying {word}")
-
-    query_vector = model.encode(word)
-    resp = client.search(index=index_name, query=construct_bm25_query(query=word),
-                         knn=construct_knn_query(query_vector),
-                         source=["imr", "name"],
-                         timeout="60s")
-
-    num_docs = resp['hits']['total']['value']
-
-    if num_docs == 0:
-        logger.info("No document is matched")
-        return []
-
-    else:
-        results = resp['hits']['hits'][:limit]
+    results, latencies = [], []
+    for batch in tqdm(list(read_batches(queries, batch_size)), leave=False):
+        start = time.perf_counter()
+        results.extend(search_batch(batch))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, latencies
 
-        search_results = []
 
-        for result in results:
-            if result['_score'] < confidence:
-                continue
-
-            search_results.append({
-                'imr': result['_source']['imr'],
-                "name": result['_source']['name'],
-                "score": result['_score'],
-            })
-
-        return search_results
-
-
-def one_to_one_match(data):
+def evaluate(queries, results, latencies, k: int) -> dict:
     """
-    Validate that each singular key maps 1:1 to its expected IMR.
+    Score search results against the expected IMRs.
 
     Args:
-        data (Iterable[str]): Iterable of JSON lines where each line includes:
-                              - "key" (str): the term to query
-                              - "imr" (str): the expected mapping
-
-    Side Effects:
-        Prints mismatches and a final error count summary.
+        queries (List[Tuple[str, list]]): The queries and their expected IMRs.
+        results (List[List[dict]]): Up to k ranked results per query.
+        latencies (List[float]): Latencies in milliseconds, per query or per request.
+        k (int): Cut-off of the top-k accuracy and the MRR.
 
-    Notes:
-        This function calls the search for each entry and checks equality with the
-        expected IMR. It skips empty keys.
+    Returns:
+        dict: Top-1 and top-k accuracy, MRR@k, latency percentiles and the queries whose
+              first result is not the expected IMR.
     """
-    err = 0
-    for idx, row in enumerate(tqdm(data, total=len(data))):
-        row = json.loads(row)
-        name = row["key"].lower()
-        if len(name) == 0:
-            continue
-
-        expected_query = row["imr"]
-        result = search_manual_mapping(word=name, model=load_model(), client=es_client, index_name=index_name,
-                                       limit=1)
-        if len(result) == 0:
-            print(f"No match is found for {keyword}")
-            err += 1
-            continue
-
-        if expected_query != result[0]["imr"]:
-            print(f"the mismatch for {name}")
-            print("===expected===")
-            print(expected_query)
-            print("===real===")
-            print(result)
-            err += 1
-            continue
-    print(f"Number of mismatch is {err}")
-
-
-def plural_match(data):
+    top1 = topk = reciprocal_rank = 0.0
+    mismatches = []
+    for (word, expected), hits in zip(queries, results):
+        ranks = [rank for rank, hit in enumerate(hits[:k], start=1) if hit["imr"] == expected]
+        if ranks:
+            topk += 1
+            reciprocal_rank += 1.0 / ranks[0]
+            top1 += ranks[0] == 1
+        if not ranks or ranks[0] != 1:
+            mismatches.append({"query": word, "expected": expected, "found": hits[0]["imr"] if hits else None})
+
+    return {"queries": len(queries),
+            "top1_accuracy": top1 / len(queries),
+            f"top{k}_accuracy": topk / len(queries),
+            f"mrr@{k}": reciprocal_rank / len(queries),
+            "latency_ms": {"mean": float(np.mean(latencies)),
+                           "p50": float(np.percentile(latencies, 50)),
+                           "p95": float(np.percentile(latencies, 95)),
+                           "p99": float(np.percentile(latencies, 99))},
+            "mismatches": mismatches}
+
+
+def regressions(report: dict, baseline: dict, max_accuracy_drop: float, max_latency_increase: float):
     """
-    Validate that pluralized forms of each key still map to the same expected IMR.
+    Compare a report with a stored baseline report.
 
     Args:
-        data (Iterable[str]): Iterable of JSON lines where each line includes:
-                              - "key" (str): the singular term
-                              - "imr" (str): the expected mapping
+        report (dict): The report of this run.
+        baseline (dict): A report of an earlier run, made with the same options.
+        max_accuracy_drop (float): Top-1 accuracy a variant may lose.
+        max_latency_increase (float): Relative p95 latency increase a variant may have, e.g. 0.2 for 20%.
 
-    Side Effects:
-        Prints mismatches and a final error count summary.
-
-    Notes:
-        Uses the `inflect` library to pluralize nouns before querying.
+    Returns:
+        List[str]: A description of every regression; empty if there is none.
     """
-    p = inflect.engine()
-    err = 0
-    for idx, row in enumerate(tqdm(data, total=len(data))):
-        row = json.loads(row)
-        name = row["key"].lower()
-        expected_query = row["imr"]
-        keyword = p.plural_noun(name)
-
-        result = search_manual_mapping(word=keyword, model=load_model(), client=es_client, index_name=index_name,
-                                       limit=1)
-        if len(result) == 0:
-            print(f"No match is found for {keyword}")
-            err += 1
+    failures = []
+    for variant, metrics in report["variants"].items():
+        reference = baseline["variants"].get(variant)
+        if reference is None:
             continue
+        if metrics["top1_accuracy"] < reference["top1_accuracy"] - max_accuracy_drop:
+            failures.append(f"{variant} top-1 accuracy {metrics['top1_accuracy']:.4f} "
+                            f"< baseline {reference['top1_accuracy']:.4f}")
+        if metrics["latency_ms"]["p95"] > reference["latency_ms"]["p95"] * (1 + max_latency_increase):
+            failures.append(f"{variant} p95 latency {metrics['latency_ms']['p95']:.1f}ms "
+                            f"> baseline {reference['latency_ms']['p95']:.1f}ms")
+    return failures
 
-        if expected_query != result[0]["imr"]:
-            print(f"the mismatch for {name}")
-            print("===expected===")
-            print(expected_query)
-            print("===real===")
-            print(result)
-            err += 1
-            continue
-    print(f"Number of mismatch is {err}")
 
 if __name__ == '__main__':
-    parser = ArgumentParser()
+    parser = ArgumentParser(description="Measure the accuracy and latency of the manual mapping index.")
     parser.add_argument('--index_name', type=str)
     parser.add_argument('--synonyms', type=str)
-    parser.add_argument('--validate', type=str, choices=['plural', 'singular'])
+    parser.add_argument('--validate', type=str, default='all', choices=['plural', 'singular', 'all'])
+    parser.add_argument('--mode', type=str, default='concurrent', choices=['concurrent', 'msearch'],
+                        help="Search concurrently (latency per query) or in `_msearch` batches (latency per request).")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--k', type=int, default=5)
+    parser.add_argument('--confidence', type=float, default=SEARCH_CONFIDENCE)
+    parser.add_argument('--ranking', type=str, default='sum', choices=RANKING_STRATEGIES)
+    parser.add_argument('--collapse', action='store_true', help="Rank distinct clusters for the top-k metrics.")
+    parser.add_argument('--report', type=str, default='index_validation_report.json')
+    parser.add_argument('--baseline', type=str, help="Report of an earlier run to check for regressions.")
+    parser.add_argument('--max_accuracy_drop', type=float, default=0.005)
+    parser.add_argument('--max_latency_increase', type=float, default=0.2)
 
     args = parser.parse_args()
-    synonyms = args.synonyms
-
-    index_name = args.index_name
     es_client = search_engine_client()
-    result = es_client.count(index=index_name)
+    result = es_client.count(index=args.index_name)
     logger.info(f"{result.body['count']} tags indexed.")
 
-    model = load_model()
-
-    with open(synonyms, 'r') as json_file:
-        data = list(json_file)
-
-    if args.validate == 'singular':
-        one_to_one_match(data)
-    elif args.validate == 'plural':
-        plural_match(data)
-    else:
-        raise ValueError("Invalid option for validation")
+    rows = list(read_jsonl(args.synonyms, required_fields=['key', 'imr']))
+    variants = VARIANTS if args.validate == 'all' else (args.validate,)
+    queries = {variant: validation_queries(rows, variant) for variant in variants}
+
+    # Load the model once and encode every query up front in batches, so the searches only read the cache
+    all_queries = [word for variant in variants for word, _ in queries[variant]]
+    model = CachedEncoder(load_model(), model_name=ENCODER_NAME, max_size=len(all_queries))
+    model.encode(all_queries, batch_size=args.batch_size)
+
+    options = {"client": es_client, "model": model, "index_name": args.index_name, "confidence": args.confidence,
+               "collapse": args.collapse, "ranking": args.ranking}
+    report = {"options": {key: value for key, value in vars(args).items()
+                          if key in ("index_name", "mode", "concurrency", "batch_size", "k", "confidence",
+                                     "ranking", "collapse")},
+              "variants": {}}
+    for variant in variants:
+        words = [word for word, _ in queries[variant]]
+        if args.mode == 'concurrent':
+            results, latencies = search_concurrently(
+                words, lambda word: search_manual_mapping(word=word, limit=args.k, **options), args.concurrency)
+        else:
+            results, latencies = search_in_batches(
+                words, lambda batch: search_manual_mapping_batch(words=batch, limits=[args.k] * len(batch), **options),
+                args.batch_size)
+
+        metrics = evaluate(queries[variant], results, latencies, k=args.k)
+        report["variants"][variant] = metrics
+        logger.info(f"{variant}: top-1 {metrics['top1_accuracy']:.4f}, top-{args.k} "
+                    f"{metrics[f'top{args.k}_accuracy']:.4f}, MRR@{args.k} {metrics[f'mrr@{args.k}']:.4f}, "
+                    f"p50 {metrics['latency_ms']['p50']:.1f}ms, p95 {metrics['latency_ms']['p95']:.1f}ms, "
+                    f"{len(metrics['mismatches'])} mismatches")
+
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report written to {args.report}.")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["options"] != report["options"]:
+            logger.warning(f"{args.baseline} was made with other options: {baseline['options']}")
+        failures = regressions(report, baseline, args.max_accuracy_drop, args.max_latency_increase)
+        for failure in failures:
+            logger.error(failure)
+        if failures:
+            raise SystemExit(1)
+        logger.info(f"No regression against {args.baseline}.")
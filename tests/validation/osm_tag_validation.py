@@ -1,10 +1,10 @@
-import json
 from argparse import ArgumentParser
 from pathlib import Path
 
 import pandas as pd
 from tqdm import tqdm
 from tqdm import tqdm
+from app.search_engine.reader import read_jsonl
 
 if __name__ == '__main__':
     parser = ArgumentParser()
@@ -14,12 +14,8 @@ if __name__ == '__main__':
 
     imr_tag_db = args.input_file
 
-    with open(imr_tag_db, 'r') as json_file:
-        imr_tag_db = list(json_file)
-
     unique_osm_tags = set()
-    for imr_tag in tqdm(imr_tag_db, total=len(imr_tag_db)):
-        imr_tag = json.loads(imr_tag)
+    for imr_tag in tqdm(read_jsonl(imr_tag_db, required_fields=['keyword', 'imr'])):
         keyword = imr_tag['keyword'].lower().strip()
 
         for osm_tag_comb in imr_tag['imr']:
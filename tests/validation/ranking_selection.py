@@ -0,0 +1,148 @@
+import random
+import time
+from argparse import ArgumentParser
+
+import inflect
+import numpy as np
+from app.search_engine.embedding_cache import CachedEncoder
+from app.search_engine.local_engine import LocalSearchEngine
+from app.search_engine.reader import read_jsonl, MANUAL_MAPPING_FIELDS
+from app.search_engine.search_ops import search_manual_mapping, RANKING_STRATEGIES
+from app.search_engine.utils import (search_engine_client, load_model, ENCODER_NAME, SENT_TRANSFORMER,
+                                     MANUAL_MAPPING_FILE)
+from loguru import logger
+from tqdm import tqdm
+
+
+def evaluation_queries(fpath: str, sample_size: int, seed: int = 0):
+    """
+    Build (query, expected cluster) pairs from the manual mapping.
+
+    Every sampled row contributes its key and, if different, the plural of its key, so that
+    both exact and inflected lookups are measured.
+
+    Args:
+        fpath (str): Path to the manual mapping JSONL file.
+        sample_size (int): Number of rows to sample; all rows if 0.
+        seed (int): Seed of the row sample.
+
+    Returns:
+        List[Tuple[str, str]]: The queries and the cluster ids they should resolve to.
+    """
+    rows = list(read_jsonl(fpath, required_fields=MANUAL_MAPPING_FIELDS))
+    if 0 < sample_size < len(rows):
+        rows = random.Random(seed).sample(rows, sample_size)
+
+    inflect_engine = inflect.engine()
+    queries = []
+    for row in rows:
+        key = row['key'].strip().lower()
+        queries.append((key, row['cluster_id']))
+        plural = inflect_engine.plural(key)
+        if plural != key:
+            queries.append((plural, row['cluster_id']))
+    return queries
+
+
+def calibrated_threshold(scored, target_precision: float):
+    """
+    Find the lowest confidence at which top-1 results are correct often enough.
+
+    Args:
+        scored (List[Tuple[float, bool]]): Top-1 score and correctness of every query.
+        target_precision (float): Required share of correct results above the threshold.
+
+    Returns:
+        Tuple[float, float]: The threshold and the share of queries answered above it,
+                             or (None, 0.0) if the precision is never reached.
+    """
+    correct = 0
+    best = (None, 0.0)
+    for answered, (score, is_correct) in enumerate(sorted(scored, key=lambda item: -item[0]), start=1):
+        correct += is_correct
+        if correct / answered >= target_precision:
+            best = (score, answered / len(scored))
+    return best
+
+
+def evaluate(client, model, index_name: str, queries, ranking: str, k: int = None, target_precision: float = 0.95):
+    """
+    Measure top-1 accuracy, latency and a calibrated confidence of one ranking configuration.
+
+    Args:
+        client: Elasticsearch client or `LocalSearchEngine`.
+        model: Query encoder; wrap it in a warm cache so encoding does not dominate the latency.
+        index_name (str): Name of the manual mapping index.
+        queries (List[Tuple[str, str]]): Queries and their expected cluster ids.
+        ranking (str): One of `RANKING_STRATEGIES`.
+        k (int, optional): Number of nearest neighbours; derived from the limit if None.
+        target_precision (float): Precision the calibrated confidence must reach.
+
+    Returns:
+        dict: Accuracy, mean and 95th percentile latency in milliseconds, and the calibrated confidence.
+    """
+    latencies, scored = [], []
+    for word, cluster_id in tqdm(queries, desc=f"{ranking} k={k}", leave=False):
+        start = time.perf_counter()
+        results = search_manual_mapping(word=word, client=client, model=model, index_name=index_name,
+                                        confidence=float("-inf"), limit=1, ranking=ranking, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if results:
+            scored.append((results[0]['score'], results[0]['cluster_id'] == cluster_id))
+        else:
+            scored.append((float("-inf"), False))
+
+    threshold, coverage = calibrated_threshold(scored, target_precision)
+    return {"ranking": ranking,
+            "k": k,
+            "accuracy": sum(is_correct for _, is_correct in scored) / len(scored),
+            "mean_ms": float(np.mean(latencies)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "confidence": threshold,
+            "coverage": coverage}
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description="Pick the fastest ranking strategy that keeps top-1 accuracy.")
+    parser.add_argument("--fpath", type=str, default=MANUAL_MAPPING_FILE)
+    parser.add_argument("--backend", type=str, default="local", choices=["local", "elasticsearch"])
+    parser.add_argument("--index_name", type=str, help="Index searched with the elasticsearch backend.")
+    parser.add_argument("--artifact", type=str, help="Embedding artifact used by the local backend.")
+    parser.add_argument("--sample_size", type=int, default=500)
+    parser.add_argument("--k_values", type=str, default="10,20,50")
+    parser.add_argument("--target_precision", type=float, default=0.95)
+    parser.add_argument("--max_accuracy_drop", type=float, default=0.005,
+                        help="Accuracy a faster configuration may lose compared to the `sum` baseline.")
+
+    args = parser.parse_args()
+    queries = evaluation_queries(args.fpath, args.sample_size)
+
+    model = load_model()
+    if args.backend == "local":
+        client = LocalSearchEngine.from_artifact(args.artifact, model_name=SENT_TRANSFORMER) if args.artifact \
+            else LocalSearchEngine.from_file(args.fpath, model)
+    else:
+        client = search_engine_client()
+
+    # Encode every query once up front, so latencies compare the ranking strategies only
+    model = CachedEncoder(model, model_name=ENCODER_NAME, max_size=len(queries))
+    model.encode([word for word, _ in queries])
+
+    configurations = [("sum", None)] + [(ranking, int(k)) for ranking in RANKING_STRATEGIES
+                                        for k in args.k_values.split(",")]
+    reports = [evaluate(client, model, args.index_name, queries, ranking, k=k,
+                        target_precision=args.target_precision) for ranking, k in configurations]
+
+    logger.info(f"{len(queries)} queries, calibrated for {args.target_precision:.0%} precision:")
+    for report in reports:
+        confidence = "-" if report["confidence"] is None else f"{report['confidence']:.3f}"
+        logger.info(f"{report['ranking']:>8} k={str(report['k']):>4} accuracy={report['accuracy']:.4f} "
+                    f"mean={report['mean_ms']:.2f}ms p95={report['p95_ms']:.2f}ms "
+                    f"confidence={confidence} coverage={report['coverage']:.2%}")
+
+    baseline = reports[0]
+    eligible = [report for report in reports if report["accuracy"] >= baseline["accuracy"] - args.max_accuracy_drop]
+    best = min(eligible, key=lambda report: report["mean_ms"])
+    logger.info(f"Fastest configuration within {args.max_accuracy_drop} of the baseline accuracy "
+                f"{baseline['accuracy']:.4f}: SEARCH_RANKING={best['ranking']} SEARCH_KNN_K={best['k'] or 0} "
+                f"RANKING_CONFIDENCE={best['ranking']}={best['confidence']}")